@@ -0,0 +1,292 @@
+# JSON-API voor kiosks en de app: dezelfde aanbevelingen als de Streamlit-
+# pagina, beantwoord uit de gedeelde snapshot in het geheugen.
+#
+#   uvicorn api:app --port 8000
+#
+#   GET  /parks
+#   GET  /parks/{park}/waits
+#   GET  /parks/{park}/recommendation?current_ride=...&max_wait=45&max_walk=10&preset=all_on
+#   POST /parks/{park}/recommendation  {"current_ride": ..., "ratings": {...}, "max_wait": 45, "max_walk": 10}
+#   POST /parks/{park}/recommendations {"rides": [...], "current": [...], "ratings": [[...], ...],
+#                                       "max_wait": 45 | [...], "max_walk": 10 | [...], "k": 3}
+#   GET  /metrics                      tijden per fase, Prometheus-tekstformaat (WALIBI_TIMING=1)
+#
+# Een request raakt nooit het netwerk: per park haalt één ingest-thread de
+# bronnen op, net als in de Streamlit-app.
+
+import json
+import os
+import threading
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from forecast import WaitForecaster
+from history import HistoryStore
+from ingest import IngestWorker, SnapshotStore
+from recommend import DEFAULT_RATING, PRESETS, get_open_rides, preset_ratings, recommend, recommend_batch
+from registry import available_parks, get_park
+from timing import timings
+from waits import OPEN
+
+
+POLL_INTERVAL = int(os.environ.get("WALIBI_POLL_INTERVAL", "60"))
+SNAPSHOT_DIR = os.environ.get("WALIBI_SNAPSHOT_DIR", "data/snapshots")
+HISTORY_DIR = os.environ.get("WALIBI_HISTORY_DIR", "data/history")
+
+# Standaardgrenzen, gelijk aan de sliders in de app
+DEFAULT_MAX_WAIT = 45
+DEFAULT_MAX_WALK = 10
+
+# Geldige waarden: voorkeuren zoals de sliders, grenzen hooguit een dag
+MAX_RATING = 10
+MAX_LIMIT = 24 * 60
+
+
+class IngestPool:
+    # Eén ingest-thread per park, gestart bij de eerste vraag naar dat park.
+    # De geschiedenis schrijft de Streamlit-app; de API leest die alleen om de
+    # voorspeller net zo te trainen, zodat de aanbevelingen gelijk zijn.
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.history = HistoryStore(HISTORY_DIR, readonly=True)
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, slug):
+        with self._lock:
+            if slug not in self._workers:
+                park = get_park(slug)
+                worker = IngestWorker(
+                    SnapshotStore(os.path.join(SNAPSHOT_DIR, f"{slug}.json"), tz=park.timezone),
+                    interval=self.interval,
+                    park_id=park.park_id,
+                    looopings_url=park.looopings_url,
+                    queue_times_id=park.queue_times_id,
+                    history=self.history,
+                    forecaster=WaitForecaster(park.timezone),
+                )
+                worker.start()
+                self._workers[slug] = worker
+            return self._workers[slug]
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _error(status_code, message):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def _int_param(value, name, default):
+    # Uit JSON een getal, uit de query string tekst; 1.7 of "1.7" wordt niet
+    # stilletjes 1, en true/false tellen niet als getal
+    if value is None:
+        return default
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise BadRequest(f"{name} moet een geheel getal zijn")
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f"{name} moet een geheel getal zijn")
+
+
+def _bounded_param(value, name, default, high):
+    # Geheel getal in [0, high]; ook de bovengrens, zodat numpy niet overloopt
+    value = _int_param(value, name, default)
+    if not 0 <= value <= high:
+        raise BadRequest(f"{name} moet tussen 0 en {high} liggen")
+    return value
+
+
+def _bounded_list(values, name, high):
+    if not isinstance(values, list):
+        raise BadRequest(f"{name} moet een lijst zijn")
+    checked = []
+    for i, value in enumerate(values):
+        if value is None:
+            raise BadRequest(f"{name}[{i}] ontbreekt")
+        checked.append(_bounded_param(value, f"{name}[{i}]", None, high))
+    return checked
+
+
+def _str_param(value, name):
+    if value is not None and not isinstance(value, str):
+        raise BadRequest(f"{name} moet tekst zijn")
+    return value
+
+
+def create_app(workers=None):
+    # `workers` geeft per park-slug een object met .store en .forecaster
+    # (een IngestWorker); de loadtest geeft hier een vaste snapshot mee.
+    workers = workers or IngestPool()
+    parks = set(available_parks())
+
+    async def list_parks(request):
+        return JSONResponse([{"park": slug, "name": get_park(slug).name} for slug in sorted(parks)])
+
+    async def waits(request):
+        slug = request.path_params["park"]
+        if slug not in parks:
+            return _error(404, f"onbekend park: {slug}")
+
+        store = workers(slug).store
+        snapshot = store.latest()
+        fetched_at = snapshot["fetched_at"]
+        now = store.calendar.now()
+        park_day = store.calendar.day(now)
+        return JSONResponse({
+            "park": slug,
+            "fetched_at": fetched_at.isoformat() if fetched_at else None,
+            "opening_hours": snapshot["opening_hours"],
+            "opens_at": park_day.opens.isoformat() if park_day else None,
+            "closes_at": park_day.closes.isoformat() if park_day else None,
+            "is_open": park_day.is_open(now) if park_day else None,
+            "attractions": snapshot["attractions"].to_dict(),
+        })
+
+    async def recommendation(request):
+        slug = request.path_params["park"]
+        if slug not in parks:
+            return _error(404, f"onbekend park: {slug}")
+
+        if request.method == "POST":
+            try:
+                params = json.loads(await request.body() or b"{}")
+            except ValueError:
+                return _error(400, "body is geen geldige JSON")
+            if not isinstance(params, dict):
+                return _error(400, "body moet een JSON-object zijn")
+        else:
+            params = dict(request.query_params)
+
+        park = get_park(slug)
+        worker = workers(slug)
+        snapshot = worker.store.latest()
+        wait_data = snapshot["attractions"]
+        open_rides = get_open_rides(park, wait_data)
+
+        try:
+            max_wait = _bounded_param(params.get("max_wait"), "max_wait", DEFAULT_MAX_WAIT, MAX_LIMIT)
+            max_walk = _bounded_param(params.get("max_walk"), "max_walk", DEFAULT_MAX_WALK, MAX_LIMIT)
+
+            current_ride = _str_param(params.get("current_ride"), "current_ride")
+            if current_ride is None:
+                raise BadRequest("current_ride ontbreekt")
+            if current_ride not in park.index:
+                raise BadRequest(f"onbekende attractie: {current_ride}")
+
+            # Preset als basis, expliciete voorkeuren gaan voor
+            preset = _str_param(params.get("preset"), "preset")
+            if preset is not None and preset not in PRESETS:
+                raise BadRequest(f"onbekende preset: {preset}")
+            if preset:
+                ratings = preset_ratings(preset, park, wait_data, open_rides)
+            else:
+                ratings = dict.fromkeys(open_rides, DEFAULT_RATING)
+
+            explicit = params.get("ratings")
+            if explicit is None:
+                explicit = {}
+            if not isinstance(explicit, dict):
+                raise BadRequest("ratings moet een object zijn")
+            for ride, rating in explicit.items():
+                if ride in ratings:
+                    ratings[ride] = _bounded_param(rating, f"ratings[{ride}]", DEFAULT_RATING, MAX_RATING)
+        except BadRequest as e:
+            return _error(400, str(e))
+
+        # Zelfde volgorde als de sliders in de app (bepaalt wie wint bij gelijke score)
+        ratings = {ride: ratings[ride] for ride in sorted(ratings)}
+        candidates = recommend(park, wait_data, current_ride, ratings, max_wait, max_walk, worker.forecaster)
+
+        fetched_at = snapshot["fetched_at"]
+        return JSONResponse({
+            "park": slug,
+            "fetched_at": fetched_at.isoformat() if fetched_at else None,
+            "best": candidates[0] if candidates else None,
+            "candidates": candidates,
+        })
+
+    async def batch(request):
+        # Veel bezoekers in één keer (kiosks die een rij bezoekers bedienen):
+        # kolomsgewijs, rij i van `ratings` hoort bij `current[i]`
+        slug = request.path_params["park"]
+        if slug not in parks:
+            return _error(404, f"onbekend park: {slug}")
+        try:
+            params = json.loads(await request.body() or b"{}")
+        except ValueError:
+            return _error(400, "body is geen geldige JSON")
+        if not isinstance(params, dict):
+            return _error(400, "body moet een JSON-object zijn")
+
+        park = get_park(slug)
+        worker = workers(slug)
+        snapshot = worker.store.latest()
+        wait_data = snapshot["attractions"]
+
+        try:
+            rides = params.get("rides") or sorted(get_open_rides(park, wait_data))
+            unknown = [ride for ride in rides if ride not in park.index]
+            if unknown:
+                raise BadRequest(f"onbekende attracties: {unknown}")
+            current = [park.index.get(ride, -1) for ride in params.get("current", [])]
+            if -1 in current:
+                raise BadRequest("onbekende attractie in current")
+            # Elk getal gecontroleerd zoals bij één bezoeker: 5.9 of true wordt
+            # niet stilletjes 5 of 1, en 1e20 laat numpy niet overlopen
+            rows = params.get("ratings", [])
+            if not isinstance(rows, list):
+                raise BadRequest("ratings moet een lijst van lijsten zijn")
+            ratings = np.array([_bounded_list(row, f"ratings[{i}]", MAX_RATING) for i, row in enumerate(rows)],
+                               dtype=int).reshape(len(current), len(rides))
+            limits = []
+            for name, default in (("max_wait", DEFAULT_MAX_WAIT), ("max_walk", DEFAULT_MAX_WALK)):
+                value = params.get(name, default)
+                value = _bounded_list(value, name, MAX_LIMIT) if isinstance(value, list) else _bounded_param(value, name, default, MAX_LIMIT)
+                limits.append(np.broadcast_to(np.asarray(value, dtype=int), len(current)))
+            max_wait, max_walk = limits
+            k = _int_param(params.get("k"), "k", 1)
+            if k < 1:
+                raise BadRequest("k moet minstens 1 zijn")
+            # Meer dan alle attracties kan niet; negatieve k zou van achteren snijden
+            k = min(k, len(rides))
+        except (TypeError, ValueError, OverflowError):
+            return _error(400, "rides, current, ratings, max_wait en max_walk passen niet bij elkaar")
+        except BadRequest as e:
+            return _error(400, str(e))
+
+        # Gesloten attracties tellen niet mee, zoals in de app
+        ratings[:, wait_data.align(rides)[1] != OPEN] = 0
+
+        top, scores = recommend_batch(park, wait_data, rides, current, ratings, max_wait, max_walk, worker.forecaster, k=k)
+        fetched_at = snapshot["fetched_at"]
+        return JSONResponse({
+            "park": slug,
+            "fetched_at": fetched_at.isoformat() if fetched_at else None,
+            "recommendations": [
+                [{"ride": rides[i], "score": int(s)} for i, s in zip(row, row_scores) if i >= 0]
+                for row, row_scores in zip(top.tolist(), scores.tolist())
+            ],
+        })
+
+    async def metrics(request):
+        return PlainTextResponse(timings.prometheus(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[
+        Route("/parks", list_parks),
+        Route("/parks/{park}/waits", waits),
+        Route("/parks/{park}/recommendation", recommendation, methods=["GET", "POST"]),
+        Route("/parks/{park}/recommendations", batch, methods=["POST"]),
+        Route("/metrics", metrics),
+    ])
+
+
+app = create_app()
@@ -0,0 +1,154 @@
+# Loadtest van de JSON-API: start uvicorn (één proces, één worker) met een
+# vaste snapshot uit de opgenomen looopings.nl-pagina en bestookt
+# /recommendation met keep-alive verbindingen. Elke upstream-call in het
+# serverproces wordt geteld; dat moeten er 0 zijn.
+#
+#   python benchmarks/bench_api.py [seconden] [verbindingen]
+#
+# Client en server delen deze machine; op één core krijgt de server dus
+# maar een deel van de CPU. Daarom wordt ook de CPU-tijd van het
+# serverproces per request gerapporteerd.
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import pytz
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import client
+from api import create_app
+from forecast import WaitForecaster
+from ingest import SnapshotStore
+from scraper import extract_park_page
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+RIDES = ["UNTAMED", "Goliath", "Condor", "Crazy River", "Lost Gravity"]
+PRESETS = ["all_on", "thrill", "no_water", "chill"]
+
+
+class StaticWorker:
+    # Zelfde vorm als een IngestWorker, maar zonder thread of netwerk
+    def __init__(self, snapshot):
+        self.store = SnapshotStore()
+        self.store.publish(snapshot)
+        self.forecaster = WaitForecaster()
+
+
+def serve(port, upstream_calls):
+    real_get = client.get
+
+    def counting_get(*args, **kwargs):
+        with upstream_calls.get_lock():
+            upstream_calls.value += 1
+        return real_get(*args, **kwargs)
+
+    client.get = counting_get
+
+    with open(os.path.join(FIXTURES, "looopings_walibiholland.html"), encoding="utf-8") as f:
+        snapshot = extract_park_page(f.read())
+    snapshot.update(queue_times=[], fetched_at=datetime.now(pytz.timezone("Europe/Amsterdam")))
+    worker = StaticWorker(snapshot)
+
+    app = create_app(lambda slug: worker)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False, http="httptools")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request_paths():
+    for i in range(10 ** 9):
+        ride = RIDES[i % len(RIDES)]
+        preset = PRESETS[i // len(RIDES) % len(PRESETS)]
+        yield f"/parks/walibi_holland/recommendation?current_ride={quote(ride)}&preset={preset}&max_wait={30 + i % 30}"
+
+
+async def connection(port, paths, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            path = next(paths)
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"content-length: ", 1)[1].split(b"\r\n", 1)[0])
+            body = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200") or "best" not in json.loads(body):
+                errors.append(head.split(b"\r\n", 1)[0])
+    finally:
+        writer.close()
+
+
+async def load(port, seconds, connections):
+    paths = request_paths()
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[connection(port, paths, deadline, latencies, errors) for _ in range(connections)])
+    return latencies, errors
+
+
+def cpu_seconds(pid):
+    # utime + stime van een proces (Linux)
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def wait_for_server(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server start niet")
+
+
+def main(seconds=5, connections=16):
+    port = free_port()
+    upstream_calls = multiprocessing.Value("i", 0)
+    server = multiprocessing.Process(target=serve, args=(port, upstream_calls), daemon=True)
+    server.start()
+    try:
+        wait_for_server(port)
+        asyncio.run(load(port, 0.5, connections))  # opwarmen
+        cpu_before = cpu_seconds(server.pid)
+        latencies, errors = asyncio.run(load(port, seconds, connections))
+        server_cpu = cpu_seconds(server.pid) - cpu_before
+    finally:
+        server.terminate()
+        server.join()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {seconds} s over {connections} verbindingen")
+    print(f"doorvoer          {len(latencies) / seconds:8.0f} req/s")
+    print(f"latency p50       {statistics.median(latencies) * 1000:8.2f} ms")
+    print(f"latency p99       {latencies[int(len(latencies) * 0.99)] * 1000:8.2f} ms")
+    # Wat de server zelf per request aan CPU gebruikt, dus wat één vrije core haalt
+    print(f"server-CPU        {server_cpu / len(latencies) * 1e6:8.0f} µs/req  (~{len(latencies) / server_cpu:.0f} req/s per core)")
+    print(f"fouten            {len(errors):8d}")
+    print(f"upstream-calls    {upstream_calls.value:8d}")
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+    )
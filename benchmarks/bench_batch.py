@@ -0,0 +1,94 @@
+# Vergelijkt recommend_batch() met de lus in recommend() voor willekeurige
+# bezoekers (voorkeuren, locaties, grenzen) op de opgenomen looopings.nl-
+# pagina, met een voorspeller die een trend heeft. Eerst moeten de top-k en
+# scores exact gelijk zijn, daarna wordt de batch op meerdere groottes getimed.
+#
+#   python benchmarks/bench_batch.py [te_vergelijken_bezoekers]
+
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from forecast import WaitForecaster
+from recommend import get_open_rides, recommend, recommend_batch
+from registry import get_park
+from scraper import extract_park_page
+from waits import NO_WAIT, RideWaits
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+TOP_K = 3
+
+
+def load_snapshot():
+    with open(os.path.join(FIXTURES, "looopings_walibiholland.html"), encoding="utf-8") as f:
+        return extract_park_page(f.read())
+
+
+def trending_forecaster(snapshot, now):
+    # Twee metingen 20 minuten uit elkaar, alle wachttijden 7 minuten gestegen
+    forecaster = WaitForecaster()
+    waits = snapshot["attractions"]
+    later = {"attractions": RideWaits(waits.names, np.where(waits.wait != NO_WAIT, waits.wait + 7, NO_WAIT), waits.status)}
+    forecaster.observe(snapshot, now - timedelta(minutes=20))
+    forecaster.observe(later, now)
+    return forecaster
+
+
+def random_visitors(park, rides, count, rng):
+    return (
+        rng.integers(0, len(park.rides), count),
+        rng.integers(0, 11, (count, len(rides))),
+        rng.integers(0, 60, count),
+        rng.integers(0, 15, count),
+    )
+
+
+def check_equivalence(park, wait_data, rides, forecaster, now, count):
+    current, ratings, max_wait, max_walk = random_visitors(park, rides, count, np.random.default_rng(0))
+    top, scores = recommend_batch(park, wait_data, rides, current, ratings, max_wait, max_walk, forecaster, now, k=TOP_K)
+
+    for v in range(count):
+        expected = recommend(
+            park, wait_data, park.rides[current[v]], dict(zip(rides, ratings[v].tolist())),
+            max_wait[v], max_walk[v], forecaster, now,
+        )[:TOP_K]
+        actual = [(rides[i], s) for i, s in zip(top[v].tolist(), scores[v].tolist()) if i >= 0]
+        assert actual == [(c["ride"], c["score"]) for c in expected], f"bezoeker {v} wijkt af:\n{actual}\n!=\n{expected}"
+
+
+def main(compare=5000):
+    park = get_park("walibi_holland")
+    snapshot = load_snapshot()
+    wait_data = snapshot["attractions"]
+    rides = sorted(get_open_rides(park, wait_data))
+    now = datetime.now(pytz.utc)
+    forecaster = trending_forecaster(snapshot, now)
+
+    check_equivalence(park, wait_data, rides, forecaster, now, compare)
+    print(f"OK: {compare} bezoekers gelijk aan de lus (top-{TOP_K})")
+
+    loop_visitor = random_visitors(park, rides, 1, np.random.default_rng(1))
+    loop = min(timeit.repeat(lambda: recommend(
+        park, wait_data, park.rides[loop_visitor[0][0]], dict(zip(rides, loop_visitor[1][0].tolist())),
+        loop_visitor[2][0], loop_visitor[3][0], forecaster, now,
+    ), number=200, repeat=5)) / 200
+    print(f"lus          {loop * 1e6:8.1f} µs per bezoeker")
+
+    for count in (1_000, 10_000, 50_000):
+        visitors = random_visitors(park, rides, count, np.random.default_rng(2))
+        best = min(timeit.repeat(
+            lambda: recommend_batch(park, wait_data, rides, *visitors, forecaster, now, k=TOP_K),
+            number=5, repeat=5,
+        )) / 5
+        print(f"batch {count:>6}  {best * 1000:8.2f} ms  ({best / count * 1e6:.2f} µs per bezoeker)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
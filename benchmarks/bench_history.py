@@ -0,0 +1,136 @@
+# De geschiedenis-tab met een vol seizoen: elke minuut van openingstijd een
+# snapshot (simulate.synthetic_day, per weekdag een ander verloop), via
+# observe() in de rollups zoals de ingest dat doet. Daarna de tijd per
+# observe(), de grootte op schijf, de voorbereiding van de grafieken, en de
+# tab zelf via AppTest (eerste run met het laden van altair, en een rerun).
+# De rollups hebben een vaste grootte, dus de tab hoort niet trager te
+# worden naarmate het seizoen vordert.
+#
+#   python benchmarks/bench_history.py [--days 210] [--runs 5]
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import client
+from registry import get_park
+from rollups import WaitRollups
+from simulate import synthetic_day
+from standin import StandIn
+from views import best_times, heatmap_chart, history_profile, wait_curve_chart
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HISTORY_TAB = "📈 History"
+
+
+def fill_season(park, path, days):
+    # Seizoen dat `days` dagen geleden begon. Zonder pad tijdens het vullen,
+    # zodat save() (eens per SAVE_EVERY polls) apart gemeten wordt.
+    rollups = WaitRollups(park.rides, park.timezone)
+    timelines = [synthetic_day(park, step=1, seed=weekday) for weekday in range(7)]
+    snapshots = [[timeline.snapshot(row) for row in range(len(timeline.wait))] for timeline in timelines]
+    first = datetime.now(rollups.tz).date() - timedelta(days=days)
+
+    started = time.perf_counter()
+    count = 0
+    for offset in range(days):
+        date = first + timedelta(days=offset)
+        timeline = timelines[date.weekday()]
+        midnight = datetime.combine(date, datetime.min.time())
+        for row, snapshot in enumerate(snapshots[date.weekday()]):
+            moment = rollups.tz.localize(midnight + timedelta(minutes=timeline.start + row * timeline.step))
+            rollups.observe(snapshot, moment)
+            count += 1
+    per_observe = (time.perf_counter() - started) / count
+    rollups.path = path
+    started = time.perf_counter()
+    rollups.save()
+    return rollups, count, per_observe * 1e6, time.perf_counter() - started
+
+
+def time_render(park, rollups, runs):
+    def render(weekday):
+        profile = history_profile(park, rollups, weekday)
+        best_times(profile)
+        wait_curve_chart(profile[profile["Attraction"].isin(park.rides[:3])]).to_dict()
+        heatmap_chart(profile).to_dict()
+
+    results = {}
+    for weekday in (None, 5):
+        render(weekday)  # opwarmen (altair importeren)
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            render(weekday)
+            timings.append(time.perf_counter() - started)
+        results["alle dagen" if weekday is None else "zaterdag"] = statistics.median(timings) * 1000
+    return results
+
+
+def time_tab(runs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=120)
+    at.session_state["active_tab"] = HISTORY_TAB
+    started = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    timings = []
+    for _ in range(runs):
+        at.session_state["active_tab"] = HISTORY_TAB
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    charts = len(at.get("vega_lite_chart"))
+    return first * 1000, statistics.median(timings) * 1000, charts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=210, help="lengte van het seizoen")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    park = get_park("walibi_holland")
+    tmp = tempfile.mkdtemp(prefix="walibi-history-")
+    path = os.path.join(tmp, "rollups", f"{park.slug}.npz")
+
+    rollups, count, per_observe, save = fill_season(park, path, args.days)
+    print(f"seizoen: {args.days} dagen, {count} snapshots van {len(park.rides)} attracties")
+    print(f"  observe()          {per_observe:8.0f} µs per snapshot")
+    print(f"  save()             {save * 1000:8.0f} ms, {os.path.getsize(path) / 1024:.0f} kB op schijf")
+
+    for name, ms in time_render(park, rollups, args.runs).items():
+        print(f"  grafieken, {name:<10}{ms:6.0f} ms")
+
+    standin = StandIn().start()
+    client.UPSTREAM_OVERRIDE = standin.url
+    os.environ.update(
+        WALIBI_UPSTREAM=standin.url,
+        WALIBI_HISTORY_DIR=os.path.join(tmp, "history"),
+        WALIBI_WIKI_DIR=os.path.join(tmp, "wiki"),
+        WALIBI_SNAPSHOT_DIR=os.path.join(tmp, "snapshots"),
+        WALIBI_ROLLUP_DIR=os.path.dirname(path),
+    )
+    try:
+        first, rerun, charts = time_tab(args.runs)
+    finally:
+        standin.stop()
+    print(f"  tab, eerste run    {first:8.0f} ms ({charts} grafieken)")
+    print(f"  tab, rerun         {rerun:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# Belastingstest: steeds meer gelijktijdige sessies tegen main.py via
+# AppTest, met de stand-in (benchmarks/standin.py) als upstream. Elke sessie
+# doet per ronde wat een bezoeker doet: een preset kiezen, de maximale
+# wachttijd schuiven, een andere attractie als huidige kiezen, naar het
+# overzicht en terug. Alle sessies blijven leven, dus bij elke stap zitten
+# hun session_state, hun ingest-snapshot en de gedeelde caches in het geheugen.
+#
+# AppTest is niet thread-safe (elke run zet een proces-globale Runtime op),
+# dus de sessies draaien om de beurt in één thread; met de GIL is dat ook hoe
+# CPU-werk van reruns op één pod verloopt. "burst" is de wachttijd van de
+# laatste sessie als alle sessies tegelijk dezelfde stap doen.
+#
+# Per sessie: RSS-groei van het proces (inclusief de elementboom die AppTest
+# per sessie bewaart, ruwweg wat de server naar de browser stuurt), het aantal
+# session_state-sleutels en de gepickelde grootte daarvan. Met --tracemalloc
+# ook de Python-allocaties per sessie en waar ze vandaan komen; tracemalloc
+# maakt reruns enkele keren trager, dus zo'n run gaat niet in de geschiedenis.
+#
+#   python benchmarks/bench_load.py [--sessions 1,5,10,25] [--rounds 3] [--tracemalloc]
+#                                   [--history pad] [--check]
+#
+# --check geeft exit-code 1 als het geheugen per sessie of de p90 van een
+# rerun meer dan de drempel slechter is dan de vorige run op deze machine.
+# RSS groeit in pagina's en de allocator hergebruikt vrijgekomen geheugen,
+# dus bij weinig sessies is het getal per sessie grof; verschillen onder de
+# vloer tellen niet.
+
+import argparse
+import gc
+import json
+import logging
+import os
+import pickle
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import client
+from standin import StandIn
+from suite import git_commit, previous_run
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "load.jsonl")
+
+OPTIMIZER, OVERVIEW = "🚀 Ride Optimizer", "🗺️ Overview Attractions"
+PRESET_LABEL = "🎛️ Choose a preference preset"
+PRESETS = ["🎢 Thrill Seeker", "🧘 Chill Mode", "✅ All On", "🚫 No Water"]
+
+MEMORY_THRESHOLD = 0.20
+MEMORY_FLOOR_MB = 0.5
+LATENCY_THRESHOLD = 0.25
+LATENCY_FLOOR_MS = 10
+TRACEMALLOC_TOP = 10
+
+
+def rss_bytes():
+    # Huidige RSS (Linux); anders de piek, wat bij een stijgende belasting hetzelfde is
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Session:
+    # Eén bezoeker: een AppTest met zijn eigen session_state
+
+    def __init__(self, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=120)
+        self.at.session_state["active_tab"] = OPTIMIZER
+
+    def _run(self, action):
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+        return elapsed
+
+    def steps(self):
+        # (naam, functie zonder argumenten) voor één ronde
+        at = self.at
+
+        def preset():
+            box = next(box for box in at.selectbox if box.label == PRESET_LABEL)
+            box.select(self.rng.choice([p for p in PRESETS if p != box.value])).run()
+
+        def max_wait():
+            at.slider(key="max_wait").set_value(self.rng.randrange(15, 90, 5)).run()
+
+        def current_ride():
+            box = at.selectbox(key="current_ride")
+            if len(box.options) > 1:
+                box.select(self.rng.choice([o for o in box.options if o != box.value]))
+            at.run()
+
+        def switch(tab):
+            def run():
+                at.session_state["active_tab"] = tab
+                at.run()
+            return run
+
+        return [
+            ("preset", preset),
+            ("max_wait", max_wait),
+            ("current_ride", current_ride),
+            ("tab_overview", switch(OVERVIEW)),
+            ("tab_optimizer", switch(OPTIMIZER)),
+        ]
+
+    def load(self):
+        return self._run(self.at.run)
+
+    def state_size(self):
+        state = self.at.session_state.to_dict()
+        try:
+            size = len(pickle.dumps(state))
+        except Exception:
+            size = None
+        return len(state), size
+
+
+def run_level(sessions, rounds):
+    # Eén ronde = elke stap voor alle sessies na elkaar
+    latencies = defaultdict(list)
+    bursts = defaultdict(list)
+    for _ in range(rounds):
+        plans = [session.steps() for session in sessions]
+        for step in range(len(plans[0])):
+            name = plans[0][step][0]
+            burst = 0.0
+            for session, plan in zip(sessions, plans):
+                elapsed = session._run(plan[step][1])
+                latencies[name].append(elapsed)
+                burst += elapsed
+            bursts[name].append(burst)
+    return latencies, bursts
+
+
+def summarize_level(count, latencies, bursts, rss, baseline, sessions, traced):
+    everything = [t for times in latencies.values() for t in times]
+    keys, sizes = zip(*(session.state_size() for session in sessions))
+    result = {
+        "sessions": count,
+        "rerun_p50_ms": round(percentile(everything, 0.5) * 1000, 1),
+        "rerun_p90_ms": round(percentile(everything, 0.9) * 1000, 1),
+        "rerun_p99_ms": round(percentile(everything, 0.99) * 1000, 1),
+        "burst_max_ms": round(max(max(b) for b in bursts.values()) * 1000, 1),
+        "steps": {
+            name: {
+                "p50_ms": round(percentile(times, 0.5) * 1000, 1),
+                "p90_ms": round(percentile(times, 0.9) * 1000, 1),
+                "burst_p50_ms": round(statistics.median(bursts[name]) * 1000, 1),
+            }
+            for name, times in latencies.items()
+        },
+        "rss_mb": round(rss / 2**20, 1),
+        "rss_per_session_mb": round((rss - baseline) / 2**20 / max(1, count - 1), 2) if count > 1 else None,
+        "state_keys": max(keys),
+        "state_kb": round(max(s or 0 for s in sizes) / 1024, 1),
+    }
+    if traced is not None:
+        result["traced_per_session_kb"] = round(traced / max(1, count - 1) / 1024, 1) if count > 1 else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,5,10,25", help="oplopende aantallen gelijktijdige sessies")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="Python-allocaties per sessie (trager)")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--check", action="store_true", help="exit-code 1 bij een regressie")
+    args = parser.parse_args()
+    levels = sorted({int(n) for n in args.sessions.split(",") if n})
+
+    logging.disable(logging.WARNING)
+    standin = StandIn().start()
+    client.UPSTREAM_OVERRIDE = standin.url
+    tmp = tempfile.mkdtemp(prefix="walibi-load-")
+    os.environ.update(
+        WALIBI_UPSTREAM=standin.url,
+        WALIBI_HISTORY_DIR=os.path.join(tmp, "history"),
+        WALIBI_WIKI_DIR=os.path.join(tmp, "wiki"),
+        WALIBI_SNAPSHOT_DIR=os.path.join(tmp, "snapshots"),
+        WALIBI_ROLLUP_DIR=os.path.join(tmp, "rollups"),
+    )
+
+    results = []
+    try:
+        # De eerste sessie laadt alle modules en vult de gedeelde caches (kaart,
+        # ingest, park); de groei daarna is wat elke extra sessie kost
+        sessions = [Session(args.seed)]
+        sessions[0].load()
+        run_level(sessions, 1)
+        gc.collect()
+        baseline = rss_bytes()
+        if args.tracemalloc:
+            tracemalloc.start()
+            traced_baseline = tracemalloc.take_snapshot()
+
+        for count in levels:
+            while len(sessions) < count:
+                session = Session(args.seed + len(sessions))
+                session.load()
+                sessions.append(session)
+            latencies, bursts = run_level(sessions, args.rounds)
+            gc.collect()
+            traced = None
+            if args.tracemalloc:
+                snapshot = tracemalloc.take_snapshot()
+                traced = sum(stat.size_diff for stat in snapshot.compare_to(traced_baseline, "filename"))
+            results.append(summarize_level(count, latencies, bursts, rss_bytes(), baseline, sessions, traced))
+
+        if args.tracemalloc:
+            print(f"Grootste groei in Python-allocaties bij {len(sessions)} sessies:")
+            for stat in snapshot.compare_to(traced_baseline, "filename")[:TRACEMALLOC_TOP]:
+                print(f"  {stat.size_diff / 2**20:8.2f} MB  {stat.traceback[0].filename}")
+            print()
+    finally:
+        standin.stop()
+
+    print(f"{'sessies':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'burst':>9} {'RSS':>8} {'/sessie':>9} {'state':>12}"
+          + (f" {'Python/sessie':>14}" if args.tracemalloc else ""))
+    for r in results:
+        per_session = f"{r['rss_per_session_mb']:6.2f} MB" if r["rss_per_session_mb"] is not None else " " * 9
+        traced = r.get("traced_per_session_kb")
+        print(f"{r['sessions']:>7} {r['rerun_p50_ms']:6.0f}ms {r['rerun_p90_ms']:6.0f}ms {r['rerun_p99_ms']:6.0f}ms "
+              f"{r['burst_max_ms']:7.0f}ms {r['rss_mb']:6.0f}MB {per_session} "
+              f"{r['state_keys']:>3} / {r['state_kb']:5.1f}kB"
+              + (f" {traced:11.1f} kB" if traced is not None else ""))
+    print("\nper stap bij", results[-1]["sessions"], "sessies (p50 / p90 / burst p50):")
+    for name, step in results[-1]["steps"].items():
+        print(f"  {name:<14} {step['p50_ms']:7.0f}ms {step['p90_ms']:7.0f}ms {step['burst_p50_ms']:8.0f}ms")
+    if args.tracemalloc:
+        return
+
+    host = platform.node()
+    previous = previous_run(args.history, host)
+    regressions = []
+    if previous:
+        before = {r["sessions"]: r for r in previous["results"]}
+        for r in results:
+            old = before.get(r["sessions"])
+            if not old:
+                continue
+            now_mb, old_mb = r["rss_per_session_mb"], old.get("rss_per_session_mb")
+            if (now_mb is not None and old_mb is not None
+                    and now_mb > old_mb * (1 + MEMORY_THRESHOLD) and now_mb - old_mb > MEMORY_FLOOR_MB):
+                regressions.append(f"{r['sessions']} sessies: {old_mb} -> {now_mb} MB per sessie")
+            if (r["rerun_p90_ms"] > old["rerun_p90_ms"] * (1 + LATENCY_THRESHOLD)
+                    and r["rerun_p90_ms"] - old["rerun_p90_ms"] > LATENCY_FLOOR_MS):
+                regressions.append(f"{r['sessions']} sessies: p90 {old['rerun_p90_ms']} -> {r['rerun_p90_ms']} ms")
+    for regression in regressions:
+        print("REGRESSIE", regression)
+
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "host": host,
+        "python": platform.python_version(),
+        "rounds": args.rounds,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Parse-tijd van de streaming extractor tegen de BeautifulSoup-referentie op
+# een opgenomen looopings.nl-pagina. Dat beide hetzelfde opleveren staat in
+# tests/test_scraper.py.
+#
+#   python benchmarks/bench_parse.py [aantal_herhalingen]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bs4 import BeautifulSoup
+
+from scraper import extract_park_page, parse_opening_hours, parse_wait_times
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def reference_parse(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return {
+        "attractions": parse_wait_times(soup),
+        "opening_hours": parse_opening_hours(soup),
+    }
+
+
+def main(number=200):
+    html = load_fixture("looopings_walibiholland.html")
+    result = extract_park_page(html)
+    print(f"{len(result['attractions'])} attracties, open {result['opening_hours']}")
+
+    for label, func in [("bs4 (referentie)", reference_parse), ("streaming", extract_park_page)]:
+        best = min(timeit.repeat(lambda: func(html), number=number, repeat=5)) / number
+        print(f"{label:<18} {best * 1000:8.3f} ms per parse")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
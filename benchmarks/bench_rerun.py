@@ -0,0 +1,118 @@
+# Meet hoe lang een rerun van de app duurt bij typische interacties, met
+# de opgenomen looopings.nl-pagina in plaats van het netwerk.
+#
+#   python benchmarks/bench_rerun.py [pad/naar/main.py] [herhalingen]
+#
+# AppTest draait bij elke interactie het hele script; de tijd per fragment
+# (wat Streamlit bij een widget in dat fragment opnieuw draait) wordt apart
+# gemeten door st.fragment tijdens de benchmark in te pakken.
+
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from unittest import mock
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+fragment_times = defaultdict(list)
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+
+def fake_get(source, url, **kwargs):
+    if "looopings" in url:
+        with open(os.path.join(FIXTURES, "looopings_walibiholland.html"), encoding="utf-8") as f:
+            return FakeResponse(f.read())
+    if "queue-times" in url:
+        return FakeResponse(json.dumps({"lands": []}))
+    return FakeResponse('<div id="mw-content-text"><p>' + "Walibi Holland is een attractiepark. " * 3 + "</p></div>")
+
+
+def timed_fragment(func=None, **kwargs):
+    if func is None:
+        return lambda f: timed_fragment(f, **kwargs)
+
+    def wrapper(*args, **kw):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kw)
+        finally:
+            fragment_times[func.__name__].append(time.perf_counter() - start)
+
+    wrapper.__name__ = func.__name__
+    return real_fragment(wrapper, **kwargs)
+
+
+real_fragment = st.fragment
+
+
+def median_ms(action, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(script, repeat=15):
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("WALIBI_HISTORY_DIR", tempfile.mkdtemp())
+    os.environ.setdefault("WALIBI_WIKI_DIR", tempfile.mkdtemp())
+    os.environ.setdefault("WALIBI_ROLLUP_DIR", tempfile.mkdtemp())
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+
+    with mock.patch("client.get", fake_get), mock.patch("streamlit.fragment", timed_fragment):
+        at = AppTest.from_file(script, default_timeout=60).run()
+        at.run()
+
+        values = iter(range(10 ** 6))
+        results = {
+            "full rerun": median_ms(lambda: at.run(), repeat),
+            "rating change": median_ms(lambda: at.slider(key="Condor").set_value(next(values) % 10 + 1).run(), repeat),
+        }
+
+        def change_sort():
+            # AppTest stuurt de gekozen tab niet mee; zonder lazy tabs wordt
+            # deze sleutel genegeerd en draait tab 2 altijd mee
+            at.session_state["active_tab"] = "🗺️ Overview Attractions"
+            sort = [s for s in at.selectbox if "Sort" in s.label][0]
+            sort.select(sort_options[next(values) % len(sort_options)]).run()
+
+        sort_options = ["Alphabetical", "Wait time (low to high)", "Wait time (high to low)", "Status"]
+        at.session_state["active_tab"] = "🗺️ Overview Attractions"
+        at.run()
+        results["sort change (tab 2)"] = median_ms(change_sort, repeat)
+
+    for label, ms in results.items():
+        print(f"{label:<24} {ms:8.1f} ms")
+    for name, timings in sorted(fragment_times.items()):
+        print(f"fragment {name:<24} {statistics.median(timings) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "main.py"),
+        int(sys.argv[2]) if len(sys.argv) > 2 else 15,
+    )
@@ -0,0 +1,128 @@
+# Koude start zoals bij een nieuwe pod: elke meting draait in een vers
+# Python-proces, met de stand-in (benchmarks/standin.py) als upstream.
+# Per tab de tijd tot het eerste volledige script (AppTest) en welke zware
+# modules daarna geladen zijn; "api" meet het importeren van de JSON-API.
+# Met --importtime de imports die het meest kosten, per pakket opgeteld
+# (python -X importtime).
+#
+# --latency vertraagt elk antwoord van de stand-in (een trage bron). Zonder
+# --no-snapshot start elk proces met de snapshot die het vorige bewaarde,
+# zoals een herstarte pod; met --no-snapshot wacht de eerste run op de scrape.
+#
+#   python benchmarks/bench_startup.py [--runs N] [--main pad/naar/main.py] [--importtime]
+#                                      [--latency S] [--no-snapshot]
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+TARGETS = ["🚀 Ride Optimizer", "🗺️ Overview Attractions", "📖 Park Info", "📈 History", "api"]
+HEAVY = ["folium", "streamlit_folium", "pandas", "pyarrow", "bs4", "altair"]
+IMPORTTIME_TOP = 15
+
+
+def child(target, main_path):
+    # Draait in het verse proces; meldt de tijden als één JSON-regel op stdout
+    started = time.perf_counter()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(main_path)))
+    if target == "api":
+        import api  # noqa: F401
+        result = {"import": time.perf_counter() - started}
+    else:
+        from streamlit.testing.v1 import AppTest
+
+        imported = time.perf_counter()
+        at = AppTest.from_file(main_path, default_timeout=60)
+        at.session_state["active_tab"] = target
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        result = {"import": imported - started, "first_run": time.perf_counter() - imported}
+    result["loaded"] = [name for name in HEAVY if name in sys.modules]
+    print(json.dumps(result))
+
+
+def spawn(target, main_path, env, importtime=False, fresh=False):
+    if fresh:
+        shutil.rmtree(env["WALIBI_SNAPSHOT_DIR"], ignore_errors=True)
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), __file__, "--child", target, "--main", main_path]
+    started = time.perf_counter()
+    done = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    result["wall"] = wall
+    return result, done.stderr
+
+
+def slowest_imports(stderr, top=IMPORTTIME_TOP):
+    # Alleen imports op het bovenste niveau (ook die binnen functies), per pakket
+    per_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  "):
+            continue
+        per_package[name.strip().split(".")[0]] += int(cumulative)
+    return sorted(per_package.items(), key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--main", default=os.path.join(ROOT, "main.py"))
+    parser.add_argument("--importtime", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0, help="extra seconden per upstream-antwoord")
+    parser.add_argument("--no-snapshot", action="store_true", help="elke run zonder bewaarde snapshot")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.main)
+        return
+
+    from standin import StandIn
+
+    standin = StandIn(latency=args.latency).start()
+    tmp = tempfile.mkdtemp(prefix="walibi-startup-")
+    env = dict(
+        os.environ,
+        WALIBI_UPSTREAM=standin.url,
+        WALIBI_HISTORY_DIR=os.path.join(tmp, "history"),
+        WALIBI_WIKI_DIR=os.path.join(tmp, "wiki"),
+        WALIBI_SNAPSHOT_DIR=os.path.join(tmp, "snapshots"),
+        WALIBI_ROLLUP_DIR=os.path.join(tmp, "rollups"),
+    )
+    main_path = os.path.abspath(args.main)
+    try:
+        spawn(TARGETS[0], main_path, env)  # bytecode en schijfcache opwarmen
+
+        print(f"{'doel':<26} {'proces':>9} {'imports':>9} {'1e run':>9}  geladen")
+        for target in TARGETS:
+            runs = [spawn(target, main_path, env, fresh=args.no_snapshot)[0] for _ in range(args.runs)]
+            wall = statistics.median(r["wall"] for r in runs) * 1000
+            imports = statistics.median(r["import"] for r in runs) * 1000
+            first_run = f"{statistics.median(r['first_run'] for r in runs) * 1000:7.0f}ms" if "first_run" in runs[0] else " " * 9
+            print(f"{target:<26} {wall:7.0f}ms {imports:7.0f}ms {first_run}  {', '.join(runs[-1]['loaded'])}")
+
+        if args.importtime:
+            for target in TARGETS:
+                _, stderr = spawn(target, main_path, env, importtime=True)
+                print(f"\n-X importtime, {target}:")
+                for package, micros in slowest_imports(stderr):
+                    print(f"  {package:<28} {micros / 1000:8.1f} ms")
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Wat de tijdmetingen kosten, met WALIBI_TIMING uit en aan: per span(),
+# per timed()-aanroep, en op plan_itinerary (een van de kortere gemeten
+# fasen) als verhouding.
+#
+#   python benchmarks/bench_timing.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import timing
+from planner import plan_itinerary
+from recommend import get_open_rides, preset_ratings
+from registry import get_park
+from scraper import extract_park_page
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+NUMBER = 200_000
+
+
+def per_call(stmt, number=NUMBER):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def noop():
+    pass
+
+
+def with_span():
+    with timing.span("bench.span"):
+        pass
+
+
+def main():
+    park = get_park("walibi_holland")
+    with open(os.path.join(FIXTURES, "looopings_walibiholland.html"), encoding="utf-8") as f:
+        wait_data = extract_park_page(f.read())["attractions"]
+    rides = sorted(get_open_rides(park, wait_data))
+    ratings = preset_ratings("all_on", park, wait_data, rides)
+    waits = {ride: wait_data.wait_of(ride) for ride in rides}
+
+    baseline = per_call(noop)
+    plan_time = per_call(lambda: plan_itinerary("Goliath", ratings, waits, park.walk, park.index, 60, 15, 8 * 60), number=200)
+
+    for enabled in (False, True):
+        timing.ENABLED = enabled
+        timed_noop = timing.timed("bench.timed")(noop)
+        span_cost = per_call(with_span) - baseline
+        timed_cost = per_call(timed_noop) - baseline
+        label = "aan" if enabled else "uit"
+        print(f"metingen {label}:  span {span_cost * 1e9:6.0f} ns  timed {timed_cost * 1e9:6.0f} ns  "
+              f"(plan_itinerary {plan_time * 1e3:.2f} ms: +{max(span_cost, timed_cost) / plan_time:.4%})")
+    timing.timings.reset()
+
+
+if __name__ == "__main__":
+    main()
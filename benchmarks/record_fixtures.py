@@ -0,0 +1,35 @@
+# Neemt de fixtures voor de stand-in opnieuw op van de echte bronnen (heeft
+# netwerk nodig; de benchmarks zelf niet). Daarna bench_parse.py draaien om
+# te zien of de streaming extractor de nieuwe pagina nog net zo leest.
+#
+#   python benchmarks/record_fixtures.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import client
+from scraper import LOOOPINGS_URL, QUEUE_TIMES_URL, WIKIPEDIA_URL
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SOURCES = [
+    ("looopings", LOOOPINGS_URL, "looopings_walibiholland.html"),
+    ("queue_times", QUEUE_TIMES_URL.format(park_id=53), "queue_times_53.json"),
+    ("wikipedia", WIKIPEDIA_URL.format(title="Walibi_Holland"), "wikipedia_walibi_holland.html"),
+]
+
+
+def main():
+    for source, url, name in SOURCES:
+        response = client.get(source, url)
+        response.raise_for_status()
+        with open(os.path.join(FIXTURES, name), "wb") as f:
+            f.write(response.content)
+        print(f"{name:<32} {len(response.content):>8} bytes  {url}")
+
+
+if __name__ == "__main__":
+    main()
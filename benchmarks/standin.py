@@ -0,0 +1,121 @@
+# Lokale stand-in voor looopings.nl, queue-times.com en Wikipedia: serveert
+# de opgenomen fixtures over echte HTTP. Met client.UPSTREAM_OVERRIDE (of
+# WALIBI_UPSTREAM) wijzend naar deze server gaat er geen verkeer naar buiten.
+#
+#   python benchmarks/standin.py [poort]
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# (host, padprefix, fixture, content-type); elk Wikipedia-artikel krijgt
+# dezelfde opgenomen pagina
+ROUTES = [
+    ("www.looopings.nl", "/wachten/walibiholland", "looopings_walibiholland.html", "text/html; charset=utf-8"),
+    ("queue-times.com", "/parks/53/queue_times.json", "queue_times_53.json", "application/json"),
+    ("nl.wikipedia.org", "/wiki/", "wikipedia_walibi_holland.html", "text/html; charset=utf-8"),
+]
+
+LAST_MODIFIED = formatdate(0, usegmt=True)
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        body = f.read()
+    return body, '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+
+class StandIn:
+    # `latency` (s) wordt bij elk antwoord opgeteld, om een trage upstream na te bootsen;
+    # met `failing` antwoordt elke route met 503 (een storing bij de bron)
+
+    def __init__(self, port=0, latency=0.0, failing=False):
+        self.latency = latency
+        self.failing = failing
+        self.hits = Counter()
+        self._routes = [(host, prefix, *_load(name), content_type) for host, prefix, name, content_type in ROUTES]
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Zonder dit wacht de body op de ACK van de kop (Nagle + delayed
+            # ACK): ~40 ms extra per antwoord op een keep-alive verbinding
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                # Pad is /<host>/<pad> (zie client._rewrite)
+                _, host, path = self.path.split("?", 1)[0].split("/", 2)
+                path = "/" + path
+                for route_host, prefix, body, etag, content_type in standin._routes:
+                    if host == route_host and path.startswith(prefix):
+                        break
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                standin.hits[route_host] += 1
+                if standin.latency:
+                    time.sleep(standin.latency)
+
+                if standin.failing:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    standin = StandIn(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8053).start()
+    print(f"stand-in draait op {standin.url}; start de app met WALIBI_UPSTREAM={standin.url}")
+    try:
+        standin._thread.join()
+    except KeyboardInterrupt:
+        standin.stop()
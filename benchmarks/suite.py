@@ -0,0 +1,366 @@
+# Offline benchmarksuite: alle upstream-verkeer gaat naar de lokale stand-in
+# met opgenomen fixtures (benchmarks/standin.py), opslag gaat naar tijdelijke
+# mappen. Elke run wordt als één JSON-regel aan de geschiedenis toegevoegd
+# en vergeleken met de vorige run op dezelfde machine.
+#
+#   python benchmarks/suite.py [--repeat N] [--only prefix] [--history pad] [--check]
+#
+# --check geeft exit-code 1 als een meting meer dan REGRESSION_THRESHOLD
+# trager is dan de vorige run. Vergeleken wordt de snelste run (minder ruis
+# dan de mediaan), en verschillen onder REGRESSION_FLOOR_MS tellen niet.
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_parse import load_fixture, reference_parse
+import client
+from history import HistoryStore, snapshot_readings
+from ingest import IngestWorker, SnapshotStore
+from maps import build_base_map, build_marker_layer
+from planner import plan_itinerary
+from recommend import get_open_rides, preset_ratings, recommend
+from registry import get_park
+from rollups import WaitRollups
+from scraper import extract_park_page
+from standin import StandIn
+from views import SORT_OPTIONS, best_times, heatmap_chart, history_profile, overview_table, wait_curve_chart
+from wikicache import WikiCache
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "history.jsonl")
+
+REGRESSION_THRESHOLD = 0.25
+REGRESSION_FLOOR_MS = 0.05
+
+# Opgebouwde geschiedenis voor de leesbenchmarks: zoveel dagen, één poll per
+# zoveel minuten tussen 10:00 en 18:00 (UTC)
+HISTORY_DAYS = 56
+HISTORY_POLL_MINUTES = 5
+
+benchmarks = []
+
+
+def benchmark(name, repeat=None):
+    # `func(ctx)` bereidt voor en geeft de te timen functie zonder argumenten terug
+    def register(func):
+        benchmarks.append((name, func, repeat))
+        return func
+    return register
+
+
+class Context:
+    def __init__(self, standin):
+        self.standin = standin
+        self.park = get_park("walibi_holland")
+        self.tmp = tempfile.mkdtemp(prefix="walibi-bench-")
+        self.store = SnapshotStore()
+        self.worker = IngestWorker(
+            self.store,
+            park_id=self.park.park_id,
+            looopings_url=self.park.looopings_url,
+            queue_times_id=self.park.queue_times_id,
+        )
+        self.worker.poll_once()
+        self.snapshot = self.store.latest()
+        self._history = None
+        self._rollups = None
+
+    def path(self, name):
+        path = os.path.join(self.tmp, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def history(self):
+        # Acht weken geschiedenis met licht wisselende wachttijden, gecompacteerd per dag
+        if self._history is None:
+            store = HistoryStore(self.path("history"))
+            readings = snapshot_readings(self.snapshot)
+            today = datetime.now(timezone.utc).replace(hour=10, minute=0, second=0, microsecond=0)
+            for day in range(HISTORY_DAYS, 0, -1):
+                start = today - timedelta(days=day)
+                for step in range(8 * 60 // HISTORY_POLL_MINUTES):
+                    shifted = [
+                        (source, ride, None if wait is None else max(0, wait + (step * 7 + len(ride)) % 11 - 5), status)
+                        for source, ride, wait, status in readings
+                    ]
+                    moment = start + timedelta(minutes=step * HISTORY_POLL_MINUTES)
+                    store.append(self.park.park_id, shifted, moment, polled=["looopings"])
+            store.close()
+            self._history = HistoryStore(store.root)
+        return self._history
+
+    def rollups(self):
+        # De acht weken geschiedenis als rollups, zoals na de inhaalslag bij het starten
+        if self._rollups is None:
+            self._rollups = WaitRollups(self.park.rides, self.park.timezone)
+            self._rollups.catch_up(self.history(), self.park.park_id, datetime.now(timezone.utc))
+        return self._rollups
+
+
+# ---- Ophalen (via de stand-in) ----
+
+@benchmark("ingest.poll_once")
+def bench_poll(ctx):
+    return ctx.worker.poll_once
+
+
+# Wachttijden en openingstijden komen uit één parse van de pagina; de
+# referentie is de BeautifulSoup-versie die get_wait_times() en
+# get_opening_hours() elk apart deden
+@benchmark("parse.streaming")
+def bench_parse(ctx):
+    html = load_fixture("looopings_walibiholland.html")
+    return lambda: extract_park_page(html)
+
+
+@benchmark("parse.bs4_reference")
+def bench_parse_reference(ctx):
+    html = load_fixture("looopings_walibiholland.html")
+    return lambda: reference_parse(html)
+
+
+@benchmark("calendar.status")
+def bench_calendar(ctx):
+    # Wat een rerun van tab 1 met de openingstijden doet: geparst is er al
+    calendar = ctx.store.calendar
+
+    def run():
+        now = calendar.now()
+        day = calendar.day(now)
+        return day.is_open(now), day.minutes_until_close(now), day.planning_window(now)
+    return run
+
+
+@benchmark("get_full_wikipedia_text.cold")
+def bench_wiki_cold(ctx):
+    directory = ctx.path("wiki-cold")
+
+    def run():
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        return "\n\n".join(WikiCache(directory, ttl=3600).get("Walibi_Holland")[:15])
+    return run
+
+
+@benchmark("get_full_wikipedia_text.revalidate")
+def bench_wiki_revalidate(ctx):
+    # Verlopen cache: conditionele GET, de stand-in antwoordt 304
+    cache = WikiCache(ctx.path("wiki-revalidate"), ttl=0)
+    cache.get("Walibi_Holland")
+    return lambda: "\n\n".join(cache.get("Walibi_Holland")[:15])
+
+
+@benchmark("get_full_wikipedia_text.warm")
+def bench_wiki_warm(ctx):
+    cache = WikiCache(ctx.path("wiki-warm"), ttl=3600)
+    cache.get("Walibi_Holland")
+    return lambda: "\n\n".join(cache.get("Walibi_Holland")[:15])
+
+
+# ---- Geschiedenis ----
+
+@benchmark("fetch_historical_wait_times.ride_day")
+def bench_history_ride_day(ctx):
+    store = ctx.history()
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return lambda: store.read(ctx.park.park_id, ride="Goliath", start=end - timedelta(days=1), end=end).to_pandas()
+
+
+@benchmark("fetch_historical_wait_times.all_8_weeks")
+def bench_history_all(ctx):
+    store = ctx.history()
+    start = datetime.now(timezone.utc) - timedelta(weeks=8)
+    return lambda: store.read(ctx.park.park_id, start=start).to_pandas()
+
+
+@benchmark("rollups.observe")
+def bench_rollups_observe(ctx):
+    # Wat de ingest per poll extra doet; elke aanroep een minuut later
+    rollups = WaitRollups(ctx.park.rides, ctx.park.timezone)
+    attractions = ctx.snapshot["attractions"]
+    moments = (datetime.now(timezone.utc) + timedelta(minutes=i) for i in range(10 ** 7))
+    return lambda: rollups.observe(attractions, next(moments))
+
+
+@benchmark("rollups.catch_up.8_weeks", repeat=3)
+def bench_rollups_catch_up(ctx):
+    store = ctx.history()
+    now = datetime.now(timezone.utc)
+    return lambda: WaitRollups(ctx.park.rides, ctx.park.timezone).catch_up(store, ctx.park.park_id, now)
+
+
+@benchmark("history.render")
+def bench_history_render(ctx):
+    # Alles wat tab 4 per rerun doet behalve het versturen: percentielen,
+    # beste tijden en beide grafieken als Vega-Lite-spec
+    rollups = ctx.rollups()
+
+    def run():
+        profile = history_profile(ctx.park, rollups)
+        best_times(profile)
+        wait_curve_chart(profile[profile["Attraction"].isin(["Goliath", "Lost Gravity"])]).to_dict()
+        return heatmap_chart(profile).to_dict()
+    return run
+
+
+# ---- Optimalisatie ----
+
+@benchmark("optimize.recommend")
+def bench_recommend(ctx):
+    wait_data = ctx.snapshot["attractions"]
+    rides = sorted(get_open_rides(ctx.park, wait_data))
+    ratings = preset_ratings("all_on", ctx.park, wait_data, rides)
+    return lambda: recommend(ctx.park, wait_data, "Goliath", ratings, 45, 10, ctx.worker.forecaster)
+
+
+@benchmark("optimize.plan_itinerary")
+def bench_plan(ctx):
+    wait_data = ctx.snapshot["attractions"]
+    rides = sorted(get_open_rides(ctx.park, wait_data))
+    ratings = preset_ratings("all_on", ctx.park, wait_data, rides)
+    waits = {ride: wait_data.wait_of(ride) for ride in rides}
+    return lambda: plan_itinerary("Goliath", ratings, waits, ctx.park.walk, ctx.park.index, 60, 15, 8 * 60)
+
+
+# ---- Weergave ----
+
+def _register_sorts():
+    for option in SORT_OPTIONS:
+        def bench_sort(ctx, option=option):
+            return lambda: overview_table(ctx.park, ctx.snapshot["attractions"], option)
+        benchmark(f"overview_sort.{option}")(bench_sort)
+
+
+_register_sorts()
+
+
+@benchmark("map.build_and_render")
+def bench_map(ctx):
+    waits, statuses = ctx.snapshot["attractions"].align(ctx.park.locations)
+
+    def run():
+        m = build_base_map(ctx.park)
+        build_marker_layer(ctx.park, waits.tolist(), statuses.tolist(), "Goliath").add_to(m)
+        return m.get_root().render()
+    return run
+
+
+@benchmark("app.full_rerun", repeat=10)
+def bench_rerun(ctx):
+    # De hele pagina via AppTest, met de stand-in als upstream
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["WALIBI_HISTORY_DIR"] = ctx.path("app-history")
+    os.environ["WALIBI_WIKI_DIR"] = ctx.path("app-wiki")
+    os.environ["WALIBI_SNAPSHOT_DIR"] = ctx.path("app-snapshots")
+    os.environ["WALIBI_ROLLUP_DIR"] = ctx.path("app-rollups")
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=60).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at.run
+
+
+# ---- Uitvoeren en vastleggen ----
+
+def measure(func, repeat):
+    func()  # opwarmen
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(timings[0], 4),
+        "p90_ms": round(timings[int(len(timings) * 0.9) - 1 if len(timings) >= 10 else -1], 4),
+        "runs": repeat,
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(history_file, host):
+    if not os.path.exists(history_file):
+        return None
+    previous = None
+    with open(history_file, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["host"] == host:
+                previous = entry
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--only", default="", help="alleen benchmarks waarvan de naam zo begint")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--check", action="store_true", help="exit-code 1 bij een regressie")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    standin = StandIn().start()
+    client.UPSTREAM_OVERRIDE = standin.url
+    try:
+        ctx = Context(standin)
+        results = {}
+        for name, setup, repeat in benchmarks:
+            if name.startswith(args.only):
+                results[name] = measure(setup(ctx), repeat or args.repeat)
+    finally:
+        standin.stop()
+
+    host = platform.node()
+    previous = previous_run(args.history, host)
+    regressions = []
+    print(f"{'benchmark':<44} {'mediaan':>10} {'min':>10} {'vorige min':>11}")
+    for name, result in results.items():
+        before = (previous or {}).get("results", {}).get(name)
+        delta = ""
+        if before:
+            change = result["min_ms"] / before["min_ms"] - 1
+            delta = f"{before['min_ms']:9.3f}ms {change:+.0%}"
+            if change > REGRESSION_THRESHOLD and result["min_ms"] - before["min_ms"] > REGRESSION_FLOOR_MS:
+                delta += "  REGRESSIE"
+                regressions.append(name)
+        print(f"{name:<44} {result['median_ms']:9.3f}ms {result['min_ms']:9.3f}ms {delta}")
+    print(f"stand-in requests: {dict(standin.hits)}")
+
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "host": host,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
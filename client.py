@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from timing import span
+
+
+USER_AGENT = "WalibiOptimizer/1.0"
+
+# (connect, read) in seconden per bron. Met de retries erbij blijft één
+# fetch begrensd op ongeveer (1 + RETRIES) × (connect + read) + backoff.
+TIMEOUTS = {
+    "looopings": (3.05, 10),
+    "queue_times": (3.05, 8),
+    "wikipedia": (3.05, 10),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Alleen idempotente GETs, alleen bij verbindingsfouten en tijdelijke
+# serverfouten; 0.5 s, 1 s, ... tussen pogingen
+RETRIES = 2
+BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+POOL_SIZE = 8
+
+# Stroomonderbreker per bron: na BREAKER_FAILURES mislukte fetches op rij
+# gaan er BREAKER_COOLDOWN seconden geen requests meer naar die bron. Daarna
+# mag er één proef-request door; mislukt die ook, dan verdubbelt de wachttijd
+# (tot BREAKER_MAX_COOLDOWN).
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 30
+BREAKER_MAX_COOLDOWN = 600
+
+# Stuurt al het upstream-verkeer naar een lokale stand-in (benchmarks,
+# offline draaien): https://host/pad?q wordt <WALIBI_UPSTREAM>/host/pad?q
+UPSTREAM_OVERRIDE = os.environ.get("WALIBI_UPSTREAM")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=RETRIES,
+        backoff_factor=BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session():
+    # Eén gedeelde sessie per proces: keep-alive en een connectiepool per host.
+    # De pool van urllib3 is thread-safe, dus ingest, prefetch en reruns
+    # kunnen hem tegelijk gebruiken.
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+class CircuitOpen(requests.RequestException):
+    # Geen request gedaan: de bron faalde te vaak op rij
+
+    def __init__(self, source, retry_in):
+        super().__init__(f"{source}: stroomonderbreker open, nieuwe poging over {retry_in:.0f} s")
+        self.source = source
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, source, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.source = source
+        self.failures = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self._failed = 0
+        self._open_until = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._open_until is not None
+
+    def before(self):
+        # Gooit CircuitOpen als er nu geen request naar deze bron mag
+        with self._lock:
+            if self._open_until is None:
+                return
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise CircuitOpen(self.source, max(remaining, 0))
+            self._probing = True
+
+    def success(self):
+        with self._lock:
+            self._failed = 0
+            self._open_until = None
+            self._probing = False
+            self.cooldown = self.base_cooldown
+
+    def failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._probing:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self._failed < self.failures:
+                return
+            self._probing = False
+            self._open_until = time.monotonic() + self.cooldown
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(source):
+    with _breakers_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(source)
+        return _breakers[source]
+
+
+def _rewrite(url):
+    parts = urlsplit(url)
+    query = "?" + parts.query if parts.query else ""
+    return f"{UPSTREAM_OVERRIDE.rstrip('/')}/{parts.netloc}{parts.path}{query}"
+
+
+def get(source, url, **kwargs):
+    if UPSTREAM_OVERRIDE:
+        url = _rewrite(url)
+    kwargs.setdefault("timeout", TIMEOUTS.get(source, DEFAULT_TIMEOUT))
+    guard = breaker(source)
+    guard.before()
+    try:
+        with span(f"http.{source}"):
+            response = session().get(url, **kwargs)
+    except requests.RequestException:
+        guard.failure()
+        raise
+    # Pas na de retries van urllib3: een 503 hier is dus al een paar keer geprobeerd
+    if response.status_code in RETRY_STATUS:
+        guard.failure()
+    else:
+        guard.success()
+    return response
+
+
+def fetch_all(calls, max_workers=None):
+    # Voert onafhankelijke fetches tegelijk uit: `calls` is een dict
+    # naam -> functie zonder argumenten. Geeft naam -> (resultaat, fout)
+    # terug, zodat één falende bron de andere niet meeneemt. De totale tijd
+    # is die van de traagste bron, niet de som.
+    if not calls:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(calls), thread_name_prefix="fetch") as pool:
+        futures = {name: pool.submit(call) for name, call in calls.items()}
+
+    results = {}
+    for name, future in futures.items():
+        error = future.exception()
+        results[name] = (None if error else future.result(), error)
+    return results
@@ -0,0 +1,132 @@
+import threading
+from collections import deque
+from datetime import timedelta
+
+import numpy as np
+import pytz
+
+from waits import NO_WAIT, OPEN
+
+
+# Profielen per kwartier van de dag en per weekdag
+BUCKET_MINUTES = 15
+BUCKETS_PER_DAY = 24 * 60 // BUCKET_MINUTES
+
+# Venster voor de korte-termijntrend en hoe zwaar die meetelt
+TREND_WINDOW = timedelta(minutes=30)
+TREND_DAMPING = 0.5
+
+# Een kwartier telt pas mee in het profiel vanaf zoveel samples
+MIN_SAMPLES = 2
+
+
+def _bucket(moments):
+    return (moments.hour * 60 + moments.minute) // BUCKET_MINUTES
+
+
+class WaitForecaster:
+    # Verwachte wachttijd op het moment van aankomst:
+    #
+    #   huidige wachttijd
+    #   + (typisch profiel bij aankomst - typisch profiel nu)
+    #   + gedempte trend van het afgelopen half uur × looptijd
+    #
+    # Het profiel (ride × weekdag × kwartier) wordt getraind op de
+    # opgebouwde geschiedenis; zonder geschiedenis blijft alleen de trend over.
+
+    def __init__(self, tz="Europe/Amsterdam"):
+        self.tz = pytz.timezone(tz)
+        self._lock = threading.Lock()
+        self._index = {}
+        self._profile = np.zeros((0, 7, BUCKETS_PER_DAY))
+        self._recent = deque()
+
+    def fit(self, history):
+        # `history` is een Arrow-tabel uit HistoryStore.read(): rijen zijn
+        # wijzigingen, dus elke waarde geldt tot de volgende rij van die ride.
+        # pandas pas hier laden: fit() draait in de ingest-thread, niet bij het
+        # importeren door de app of de API.
+        import pandas as pd
+
+        df = history.select(["timestamp", "ride", "wait", "status"]).to_pandas()
+        rides = sorted(df["ride"].unique()) if len(df) else []
+        sums = np.zeros((len(rides), 7, BUCKETS_PER_DAY))
+        counts = np.zeros_like(sums)
+
+        for i, (ride, group) in enumerate(df.sort_values("timestamp").groupby("ride", sort=True)):
+            times = group["timestamp"].to_numpy(dtype="datetime64[ns]")
+            waits = group["wait"].where(group["status"] == "open").to_numpy(dtype=float)
+
+            # Stapfunctie bemonsteren in het midden van elk kwartier
+            step = np.timedelta64(BUCKET_MINUTES, "m")
+            grid = np.arange(times[0], times[-1], step) + step // 2
+            if not len(grid):
+                continue
+            values = waits[np.searchsorted(times, grid, side="right") - 1]
+            keep = ~np.isnan(values)
+
+            local = pd.DatetimeIndex(grid[keep]).tz_localize("UTC").tz_convert(self.tz.zone)
+            flat = (local.weekday.to_numpy() * BUCKETS_PER_DAY + _bucket(local).to_numpy())
+            sums[i] += np.bincount(flat, weights=values[keep], minlength=7 * BUCKETS_PER_DAY).reshape(7, -1)
+            counts[i] += np.bincount(flat, minlength=7 * BUCKETS_PER_DAY).reshape(7, -1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            profile = np.where(counts >= MIN_SAMPLES, sums / counts, np.nan)
+            # Ontbrekende weekdag-kwartieren: gemiddelde van dat kwartier over alle dagen
+            any_day = sums.sum(axis=1) / counts.sum(axis=1)
+        profile = np.where(np.isnan(profile), any_day[:, None, :], profile)
+
+        with self._lock:
+            self._index = {ride: i for i, ride in enumerate(rides)}
+            self._profile = profile
+
+    def observe(self, snapshot, moment):
+        # Houdt de open wachttijden van het laatste half uur bij voor de trend
+        attractions = snapshot["attractions"]
+        known = np.flatnonzero((attractions.status == OPEN) & (attractions.wait != NO_WAIT))
+        waits = {attractions.names[i]: int(attractions.wait[i]) for i in known}
+        with self._lock:
+            self._recent.append((moment, waits))
+            while self._recent and moment - self._recent[0][0] > TREND_WINDOW:
+                self._recent.popleft()
+
+    def _trend(self, rides):
+        # Wachttijdverandering per minuut sinds de oudste meting in het venster
+        slope = np.zeros(len(rides))
+        if len(self._recent) < 2:
+            return slope
+        (first_at, first), (last_at, last) = self._recent[0], self._recent[-1]
+        minutes = (last_at - first_at).total_seconds() / 60
+        if minutes <= 0:
+            return slope
+        for i, ride in enumerate(rides):
+            if ride in first and ride in last:
+                slope[i] = (last[ride] - first[ride]) / minutes
+        return slope
+
+    def predict(self, rides, waits, horizons, now):
+        # Verwachte wachttijd voor alle rides in één keer. `waits` en
+        # `horizons` (minuten tot aankomst) lopen gelijk met `rides`.
+        waits = np.asarray(waits, dtype=float)
+        horizons = np.asarray(horizons, dtype=float)
+
+        with self._lock:
+            index, profile = self._index, self._profile
+            slope = self._trend(rides)
+
+        expected = waits + TREND_DAMPING * slope * horizons
+
+        rows = np.array([index.get(ride, -1) for ride in rides], dtype=int)
+        known = rows >= 0
+        if known.any():
+            # Minuut van de week (lokale tijd) nu en bij aankomst
+            local_now = now.astimezone(self.tz)
+            minute_now = local_now.weekday() * 24 * 60 + local_now.hour * 60 + local_now.minute
+            minute_arrival = (minute_now + horizons[known].astype(int)) % (7 * 24 * 60)
+
+            at_now = profile[rows[known], minute_now // (24 * 60), minute_now % (24 * 60) // BUCKET_MINUTES]
+            at_arrival = profile[rows[known], minute_arrival // (24 * 60), minute_arrival % (24 * 60) // BUCKET_MINUTES]
+            delta = at_arrival - at_now
+            expected[known] += np.where(np.isnan(delta), 0, delta)
+
+        return np.clip(np.round(expected), 0, None).astype(int)
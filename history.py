@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# pyarrow (~180 ms) wordt pas geladen bij het eerste lezen of schrijven, niet
+# bij het importeren: tabs die geen geschiedenis tonen hebben het niet nodig.
+
+
+@lru_cache(maxsize=1)
+def schema():
+    # Eén rij per gewijzigde meting; ongewijzigde metingen worden niet opnieuw
+    # opgeslagen, dus een rij geldt tot de volgende rij van dezelfde ride/bron.
+    import pyarrow as pa
+
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("source", pa.string()),
+        ("ride", pa.string()),
+        ("wait", pa.int16()),
+        ("status", pa.string()),
+    ])
+
+DAY_FILE = "day.arrow"
+
+# Hartslag: bij elke geslaagde poll één rij met deze bron (ride = de bron die
+# gepold is), ook als er niets veranderd is. Zo betekent een gat in de
+# historie "geen poll" en niet "niets veranderd" (zie rollups.catch_up).
+POLL_SOURCE = "poll"
+
+
+def snapshot_readings(snapshot):
+    # Zet een ingest-snapshot om naar (bron, ride, wachttijd, status)-tuples;
+    # een ontbrekende bron levert geen rijen op
+    readings = []
+    if "attractions" in snapshot:
+        for name, wait, status in snapshot["attractions"].records():
+            readings.append(("looopings", name, wait, status))
+    for record in snapshot.get("queue_times", []):
+        status = "open" if record["is_open"] else "closed"
+        readings.append(("queue_times", record["ride"], record["wait_time"], status))
+    return readings
+
+
+def _utc_day(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=64)
+def _load_segment(path, size):
+    # Een lopend segment (stream met één kleine batch per poll). `size` zit in
+    # de cache-key zodat een segment dat nog groeit opnieuw gelezen wordt.
+    import pyarrow as pa
+
+    batches = []
+    reader = pa.ipc.open_stream(pa.memory_map(path))
+    try:
+        for batch in reader:
+            batches.append(batch)
+    except (pa.ArrowInvalid, OSError):
+        # Laatste batch wordt mogelijk nog geschreven; die lezen we de volgende keer
+        pass
+    return pa.Table.from_batches(batches, schema=schema()).combine_chunks()
+
+
+@lru_cache(maxsize=64)
+def _load_day(path, mtime):
+    # Een gecompacteerde dag wordt gememory-mapt: de kolommen verwijzen direct
+    # naar het bestand. De index in de metadata geeft per ride het bereik van
+    # rijen, zodat een ride zonder scan gevonden wordt. Elke map houdt een
+    # file descriptor open zolang hij in de cache zit; 64 dekt de acht weken
+    # die de voorspeller leest (ingest.FORECAST_HISTORY).
+    import pyarrow as pa
+
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    table = reader.read_all()
+    index = json.loads(reader.schema.metadata[b"ride_index"])
+    return table, index
+
+
+class HistoryStore:
+    # Append-only opslag van wachttijden in Arrow IPC, gepartitioneerd per
+    # park en per (UTC-)dag:
+    #
+    #   <root>/<park_id>/<YYYY-MM-DD>/<starttijd>.arrows   lopende segmenten
+    #   <root>/<park_id>/<YYYY-MM-DD>/day.arrow            gecompacteerde dag
+    #
+    # Elke schrijfsessie krijgt per dag een eigen stream-segment. Zodra een
+    # dag voorbij is worden de segmenten samengevoegd tot één bestand,
+    # gesorteerd op ride en tijd.
+    #
+    # Met readonly=True wordt niets geschreven of gecompacteerd: voor een
+    # tweede proces (de API) dat de historie van de app alleen leest.
+
+    def __init__(self, root, readonly=False):
+        self.root = root
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._writers = {}
+        self._last = {}
+        if not readonly:
+            self.compact_closed_days()
+
+    def _day_dir(self, park_id, day):
+        return os.path.join(self.root, str(park_id), day)
+
+    def _writer(self, park_id, day):
+        import pyarrow as pa
+
+        key = (park_id, day)
+        if key not in self._writers:
+            # Segment van de vorige dag afsluiten en compacteren
+            for old_key in [k for k in self._writers if k[0] == park_id]:
+                self._close(old_key)
+                self.compact(*old_key)
+
+            directory = self._day_dir(park_id, day)
+            os.makedirs(directory, exist_ok=True)
+            name = datetime.now(timezone.utc).strftime("%H%M%S%f") + ".arrows"
+            sink = pa.OSFile(os.path.join(directory, name), "wb")
+            self._writers[key] = (pa.ipc.new_stream(sink, schema()), sink)
+        return self._writers[key]
+
+    def _close(self, key):
+        writer, sink = self._writers.pop(key)
+        writer.close()
+        sink.close()
+
+    def append(self, park_id, readings, timestamp=None, polled=()):
+        # Slaat alleen metingen op die verschillen van de vorige voor die
+        # ride en bron, plus een hartslagrij per bron in `polled`. Geeft het
+        # aantal geschreven rijen terug.
+        if self.readonly:
+            return 0
+        timestamp = timestamp or datetime.now(timezone.utc)
+        with self._lock:
+            rows = [(POLL_SOURCE, source, None, None) for source in polled]
+            for source, ride, wait, status in readings:
+                key = (park_id, source, ride)
+                if self._last.get(key) != (wait, status):
+                    self._last[key] = (wait, status)
+                    rows.append((source, ride, wait, status))
+            if not rows:
+                return 0
+
+            import pyarrow as pa
+
+            sources, rides, waits, statuses = zip(*rows)
+            batch = pa.record_batch([
+                pa.array([timestamp] * len(rows), schema().field("timestamp").type),
+                pa.array(sources, pa.string()),
+                pa.array(rides, pa.string()),
+                pa.array(waits, pa.int16()),
+                pa.array(statuses, pa.string()),
+            ], schema=schema())
+
+            writer, sink = self._writer(park_id, _utc_day(timestamp))
+            writer.write_batch(batch)
+            sink.flush()
+            return len(rows)
+
+    def append_snapshot(self, park_id, snapshot, timestamp=None, polled=()):
+        return self.append(park_id, snapshot_readings(snapshot), timestamp, polled)
+
+    def compact(self, park_id, day):
+        # Voegt alle segmenten van een afgesloten dag samen tot day.arrow
+        directory = self._day_dir(park_id, day)
+        segments = [os.path.join(directory, n) for n in sorted(os.listdir(directory)) if n.endswith(".arrows")]
+        if not segments:
+            return
+
+        import pyarrow as pa
+
+        tables = [_load_segment(path, os.path.getsize(path)) for path in segments]
+        day_path = os.path.join(directory, DAY_FILE)
+        if os.path.exists(day_path):
+            tables.append(_load_day(day_path, os.path.getmtime(day_path))[0])
+
+        table = pa.concat_tables(tables).sort_by([("ride", "ascending"), ("timestamp", "ascending")])
+
+        index = {}
+        rides = table["ride"].to_pylist()
+        for offset, ride in enumerate(rides):
+            if ride not in index:
+                index[ride] = [offset, 0]
+            index[ride][1] += 1
+
+        table = table.replace_schema_metadata({"ride_index": json.dumps(index)})
+        tmp_path = day_path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=table.num_rows or None)
+        os.replace(tmp_path, day_path)
+        for path in segments:
+            os.remove(path)
+
+    def compact_closed_days(self):
+        if not os.path.isdir(self.root):
+            return
+        today = _utc_day(datetime.now(timezone.utc))
+        for park_id in os.listdir(self.root):
+            for day in os.listdir(os.path.join(self.root, park_id)):
+                if day < today:
+                    self.compact(park_id, day)
+
+    def read(self, park_id, ride=None, start=None, end=None, source=None):
+        # Leest alle rijen met start <= timestamp < end. Alleen de dag-
+        # partities binnen het venster worden geopend; per dag wordt alleen
+        # het rijbereik van de gevraagde ride gebruikt.
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        park_dir = os.path.join(self.root, str(park_id))
+        if not os.path.isdir(park_dir):
+            return schema().empty_table()
+
+        first_day = _utc_day(start) if start else None
+        last_day = _utc_day(end) if end else None
+
+        tables = []
+        for day in sorted(os.listdir(park_dir)):
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+
+            directory = os.path.join(park_dir, day)
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if name == DAY_FILE:
+                    table, index = _load_day(path, os.path.getmtime(path))
+                    if ride is not None:
+                        if ride not in index:
+                            continue
+                        table = table.slice(*index[ride])
+                    tables.append(table)
+                elif name.endswith(".arrows"):
+                    table = _load_segment(path, os.path.getsize(path))
+                    if ride is not None:
+                        table = table.filter(pc.equal(table["ride"], ride))
+                    tables.append(table)
+
+        if not tables:
+            return schema().empty_table()
+        table = pa.concat_tables([t.replace_schema_metadata() for t in tables])
+
+        timestamp_type = schema().field("timestamp").type
+        mask = None
+        for condition in (
+            pc.equal(table["source"], source) if source is not None else None,
+            pc.greater_equal(table["timestamp"], pa.scalar(start, timestamp_type)) if start else None,
+            pc.less(table["timestamp"], pa.scalar(end, timestamp_type)) if end else None,
+        ):
+            if condition is not None:
+                mask = condition if mask is None else pc.and_(mask, condition)
+        return table if mask is None else table.filter(mask)
+
+    def close(self):
+        with self._lock:
+            for key in list(self._writers):
+                self._close(key)
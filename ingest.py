@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from client import CircuitOpen, fetch_all
+from schedule import ParkCalendar
+from scraper import LOOOPINGS_URL, fetch_looopings, fetch_queue_times
+from timing import timed
+from waits import EMPTY, RideWaits
+
+
+log = logging.getLogger(__name__)
+
+# Hoe ver terug de voorspeller traint en hoe vaak hij opnieuw traint
+FORECAST_HISTORY = timedelta(weeks=8)
+FORECAST_REFIT = timedelta(hours=1)
+
+# Een opgeslagen snapshot die ouder is dan dit wordt bij het starten niet
+# meer gebruikt (statussen van gisteren zijn erger dan even niets)
+PERSIST_MAX_AGE = timedelta(hours=6)
+
+
+def empty_snapshot():
+    return {
+        "attractions": EMPTY,
+        "opening_hours": None,
+        "queue_times": [],
+        "fetched_at": None,
+        "version": 0,
+    }
+
+
+class SnapshotStore:
+    # Houdt de laatst gepubliceerde snapshot vast. Lezers krijgen altijd een
+    # compleet object terug en mogen het niet aanpassen (gedeeld tussen sessies).
+    #
+    # snapshot["version"] gaat alleen omhoog als een wachttijd, status of de
+    # openingstijden echt veranderd zijn. Een poll met dezelfde inhoud houdt
+    # de vorige versie en het vorige RideWaits-object (en dus alles wat daarop
+    # gecachet is); alleen fetched_at en queue_times schuiven mee.
+    #
+    # Met `path` bewaart save() de laatst goed geparste snapshot op schijf en
+    # wordt die bij het aanmaken meteen gepubliceerd: na een herstart krijgen
+    # pagina's direct de vorige stand (met zijn leeftijd) terwijl de eerste
+    # poll op de achtergrond loopt.
+    #
+    # `calendar` (schedule.ParkCalendar in de tijdzone van het park) krijgt
+    # bij elke publicatie de openingstijden van die dag; `tz` is die tijdzone.
+
+    def __init__(self, path=None, max_age=PERSIST_MAX_AGE, tz="Europe/Amsterdam"):
+        self.path = path
+        self.calendar = ParkCalendar(tz)
+        self.tz = self.calendar.tz
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._snapshot = empty_snapshot()
+        if path:
+            self._restore(max_age)
+
+    def _restore(self, max_age):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            fetched_at = datetime.fromisoformat(saved["fetched_at"]).astimezone(self.tz)
+            attractions = RideWaits.from_records(saved["attractions"])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError):
+            log.warning("opgeslagen snapshot %s onleesbaar, genegeerd", self.path, exc_info=True)
+            return
+
+        if datetime.now(self.tz) - fetched_at > max_age:
+            return
+        self.publish(dict(
+            empty_snapshot(),
+            attractions=attractions,
+            opening_hours=saved.get("opening_hours"),
+            fetched_at=fetched_at,
+        ))
+
+    def save(self):
+        # Schrijft atomair (tijdelijk bestand + rename), zodat een crash nooit
+        # een half bestand achterlaat
+        snapshot = self.latest()
+        if not self.path or snapshot["fetched_at"] is None:
+            return
+        saved = {
+            "fetched_at": snapshot["fetched_at"].isoformat(),
+            "opening_hours": snapshot["opening_hours"],
+            "attractions": list(snapshot["attractions"].records()),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Per proces een eigen tijdelijk bestand: app en API kunnen dezelfde map delen
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def publish(self, snapshot):
+        snapshot = dict(snapshot)
+        with self._lock:
+            previous = self._snapshot
+            if (snapshot["attractions"].digest == previous["attractions"].digest
+                    and snapshot["opening_hours"] == previous["opening_hours"]):
+                snapshot["attractions"] = previous["attractions"]
+                snapshot["version"] = previous["version"]
+            else:
+                snapshot["version"] = previous["version"] + 1
+            self._snapshot = snapshot
+        if snapshot["fetched_at"] is not None and snapshot["opening_hours"]:
+            self.calendar.update(snapshot["opening_hours"], snapshot["fetched_at"])
+        self._ready.set()
+
+    def latest(self):
+        with self._lock:
+            return self._snapshot
+
+    def wait_ready(self, timeout=None):
+        self._ready.wait(timeout)
+        return self.latest()
+
+
+def log_fetch_error(source, error):
+    # Een open stroomonderbreker is verwacht gedrag: één regel, geen traceback
+    if isinstance(error, CircuitOpen):
+        log.warning("%s overgeslagen: %s", source, error)
+    else:
+        log.error("%s ophalen mislukt", source, exc_info=error)
+
+
+class IngestWorker(threading.Thread):
+    # Scrapet looopings.nl en queue-times.com op een vast schema en publiceert
+    # het resultaat in de store. Pagina's lezen alleen de store en wachten dus
+    # nooit op het netwerk; het aantal uitgaande requests is onafhankelijk van
+    # het aantal bezoekers. Alle tijden zijn in de tijdzone van het park
+    # (die van de store).
+
+    def __init__(self, store, interval=60, park_id=53, looopings_url=LOOOPINGS_URL, queue_times_id=None,
+                 history=None, forecaster=None, rollups=None):
+        super().__init__(name=f"walibi-ingest-{park_id}", daemon=True)
+        self.store = store
+        self.tz = store.tz
+        self.interval = interval
+        self.park_id = park_id
+        self.looopings_url = looopings_url
+        self.queue_times_id = queue_times_id or park_id
+        self.history = history
+        self.forecaster = forecaster
+        self.rollups = rollups
+        self._fitted_at = None
+        self._stop_event = threading.Event()
+
+    @timed("ingest.poll")
+    def poll_once(self):
+        snapshot = dict(self.store.latest())
+
+        # Beide bronnen tegelijk; een poll duurt zo lang als de traagste
+        calls = {"queue_times": lambda: fetch_queue_times(self.queue_times_id)}
+        if self.looopings_url:
+            calls["looopings"] = lambda: fetch_looopings(self.looopings_url)
+        results = fetch_all(calls)
+
+        park_page, error = results.get("looopings", (None, None))
+        if park_page is not None:
+            snapshot.update(park_page)
+            snapshot["fetched_at"] = datetime.now(self.tz)
+        elif error is not None:
+            # Vorige gegevens blijven staan tot de volgende poll
+            log_fetch_error("looopings.nl", error)
+
+        queue_times, error = results["queue_times"]
+        if error is None:
+            snapshot["queue_times"] = queue_times
+        else:
+            log_fetch_error("queue-times.com", error)
+
+        self.store.publish(snapshot)
+        if park_page is not None:
+            try:
+                self.store.save()
+            except OSError:
+                log.exception("snapshot bewaren mislukt")
+
+        if self.history is not None:
+            # Alleen wat deze poll echt opgehaald heeft: na een herstart staat
+            # in de snapshot nog de bewaarde (oude) stand, die hoort niet met
+            # de tijd van nu in de historie. Met een hartslagrij als looopings
+            # geslaagd is (zie rollups.catch_up).
+            fresh = {}
+            if park_page is not None:
+                fresh["attractions"] = snapshot["attractions"]
+            if error is None:
+                fresh["queue_times"] = queue_times
+            try:
+                polled = ["looopings"] if park_page is not None else []
+                self.history.append_snapshot(self.park_id, fresh, polled=polled)
+            except Exception:
+                log.exception("wachttijden opslaan mislukt")
+
+        if self.forecaster is not None:
+            self.update_forecaster(snapshot)
+
+        # Pas na de inhaalslag in run(), anders telt deze poll dubbel
+        if self.rollups is not None and park_page is not None and (self.rollups.caught_up or self.history is None):
+            try:
+                self.rollups.observe(snapshot["attractions"], snapshot["fetched_at"])
+            except Exception:
+                log.exception("rollups bijwerken mislukt")
+
+    def update_forecaster(self, snapshot):
+        now = datetime.now(self.tz)
+        if snapshot["fetched_at"] is not None:
+            self.forecaster.observe(snapshot, snapshot["fetched_at"])
+
+        if self.history is None or (self._fitted_at and now - self._fitted_at < FORECAST_REFIT):
+            return
+        try:
+            self.forecaster.fit(self.history.read(self.park_id, source="looopings", start=now - FORECAST_HISTORY))
+            self._fitted_at = now
+        except Exception:
+            log.exception("voorspeller trainen mislukt")
+
+    def catch_up_rollups(self):
+        # Eén keer bij het starten, na de eerste poll (pagina's hebben dan al
+        # data): alles wat de historie heeft sinds de rollups bewaard zijn
+        started = datetime.now(self.tz)
+        try:
+            added = self.rollups.catch_up(self.history, self.park_id, started)
+        except Exception:
+            # Niet elke poll opnieuw proberen; verder met alleen nieuwe polls
+            log.exception("rollups bijwerken uit de historie mislukt")
+            self.rollups.caught_up = True
+            return
+        log.info("rollups bijgewerkt met %.0f attractie-minuten historie in %.1fs", added,
+                 (datetime.now(self.tz) - started).total_seconds())
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Eén onverwachte fout mag de thread niet stoppen: dan serveren alle
+            # sessies een steeds oudere snapshot. Volgende poll gewoon opnieuw.
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("poll mislukt")
+            if self.rollups is not None and self.history is not None and not self.rollups.caught_up:
+                self.catch_up_rollups()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
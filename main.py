@@ -1,278 +1,222 @@
 import streamlit as st
-import altair as alt
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import pytz
-import pandas as pd
-from pytz import timezone
-import folium
-from streamlit_folium import st_folium
-import re 
-
-
-def get_wait_times():
-    url = "https://www.looopings.nl/wachten/walibiholland"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-    attractions = {}
-
-    for row in soup.select("tr"):
-        cols = row.find_all("td")
-        if len(cols) >= 3:
-            name = cols[0].text.strip()
-            wait_td = cols[1]
-            status_td = cols[2]  # <-- hier de fix
-
-            status_text = status_td.text.strip()
-            status_class = status_td.get("class", [])
-
-            if "state_1" in status_class:
-                # Attractie is open – probeer wachttijd te extraheren
-                match = re.search(r"(\d+)", wait_td.text.strip())
-                wait_time = int(match.group(1)) if match else 0
-                attractions[name] = {"wait": wait_time, "status": "open"}
-            elif "state_2" in status_class:
-                attractions[name] = {"wait": None, "status": "closed"}
-            elif "state_3" in status_class:
-                attractions[name] = {"wait": None, "status": "breakdown"}
-            elif "state_4" in status_class:
-                attractions[name] = {"wait": None, "status": "maintenance"}
-            else:
-                attractions[name] = {"wait": None, "status": "unknown"}
-
-    return attractions
-
-
-def get_opening_hours():
-    url = "https://www.looopings.nl/wachten/walibiholland"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    text_blocks = soup.find_all(text=True)
-    for text in text_blocks:
-        if "Open:" in text:
-            cleaned = text.replace("Open:", "").replace("\xa0", " ").strip()
-            return cleaned
-    return None
-
-
-
-def is_park_open(opening_hours_str):
-    try:
-        open_str, close_str = opening_hours_str.split(" - ")
-        walibi_tz = pytz.timezone("Europe/Amsterdam")
-        now = datetime.now(walibi_tz).time()
-
-        open_time = datetime.strptime(open_str.strip(), "%H:%M").time()
-        close_time = datetime.strptime(close_str.strip(), "%H:%M").time()
-
-        if open_time < close_time:
-            return open_time <= now <= close_time
-        else:
-            # Handle edge case where park might close after midnight
-            return now >= open_time or now <= close_time
-    except Exception as e:
-        return None
-
-def get_time_until_close(open_str, close_str):
-    walibi_tz = pytz.timezone("Europe/Amsterdam")
-    now = datetime.now(walibi_tz)
-
-    open_time = datetime.strptime(open_str.strip(), "%H:%M").time()
-    close_time = datetime.strptime(close_str.strip(), "%H:%M").time()
-
-    open_dt_naive = datetime.combine(now.date(), open_time)
-    close_dt_naive = datetime.combine(now.date(), close_time)
-
-    open_dt = walibi_tz.localize(open_dt_naive)
-    close_dt = walibi_tz.localize(close_dt_naive)
-
-    if now > close_dt:
-        return "🛑 The park is already closed."
-    elif now < open_dt:
-        delta = open_dt - now
-        minutes = delta.seconds // 60
-        hours = minutes // 60
-        mins = minutes % 60
-        if hours > 0:
-            return f"🕐 Opens in {hours}h {mins}m"
-        else:
-            return f"🕐 Opens in {mins} minutes"
-    else:
-        delta = close_dt - now
-        minutes = delta.seconds // 60
-        hours = minutes // 60
-        mins = minutes % 60
-        if hours > 0:
-            return f"⌛ Closes in {hours}h {mins}m"
-        else:
-            return f"⌛ Closes in {mins} minutes"
-
-def fetch_historical_wait_times(park_id=53):
-    url = f"https://queue-times.com/parks/{park_id}/queue_times.json"
-    resp = requests.get(url, headers={"User-Agent": "WalibiOptimizer/1.0"})
-    data = resp.json()
-
-    records = []
-    now = datetime.utcnow()
-    for land in data.get("lands", []):
-        for ride in land.get("rides", []):
-            records.append({
-                "timestamp": now,
-                "ride": ride.get("name"),
-                "wait_time": ride.get("wait_time"),
-                "is_open": ride.get("is_open")
-            })
-    return pd.DataFrame(records)
-
-def wait_time_color(wait, status=None):
-    if status == "maintenance":
-        return "gray"
-    elif status == "breakdown":
-        return "#2a0000"
-    elif wait is None:
-        return "white"
-    elif wait <= 10:
-        return "green"          
-    elif wait < 20:
-        return "#7bb172"        
-    elif wait <= 30:
-        return "orange"
-    else:
-        return "red"
-
-def get_full_wikipedia_text(title: str, max_paragraphs: int = 15) -> str:
-    url = f"https://nl.wikipedia.org/wiki/{title}"
-    try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+from datetime import datetime, timedelta
+import os
+import copy
+import time
+
+import timing
+
+from forecast import WaitForecaster
+from history import HistoryStore
+from ingest import IngestWorker, SnapshotStore
+from planner import plan_itinerary
+from recommend import DEFAULT_RATING, get_open_rides, preset_ratings, recommend
+from registry import available_parks, get_park
+from rollups import WaitRollups
+from scraper import WikipediaError
+from waits import BREAKDOWN, CLOSED, MAINTENANCE
+from wikicache import WikiCache
+
+# folium en streamlit_folium (via maps), pandas (via views) en altair worden
+# pas geïmporteerd in de functie die ze gebruikt: samen ruim een seconde bij
+# een koude start. Zo staan de openingstijden en de aanbeveling al op het
+# scherm voordat de kaart geladen wordt, en laden tab 2 t/m 4 geen kaartcode.
+# Meten: python benchmarks/bench_startup.py [--importtime]
+
+
+# Hoe vaak (seconden) de ingest-thread de bronnen opnieuw ophaalt
+POLL_INTERVAL = int(os.environ.get("WALIBI_POLL_INTERVAL", "60"))
+
+# Hoe vaak (seconden) een open pagina kijkt of er een nieuwe snapshot is
+REFRESH_CHECK = int(os.environ.get("WALIBI_REFRESH_CHECK", "10"))
+
+# Map met de opgebouwde wachttijdgeschiedenis (Arrow, per park en per dag)
+HISTORY_DIR = os.environ.get("WALIBI_HISTORY_DIR", "data/history")
+
+# Laatste goede snapshot per park: na een herstart direct beschikbaar
+SNAPSHOT_DIR = os.environ.get("WALIBI_SNAPSHOT_DIR", "data/snapshots")
+
+# Voorgeaggregeerde wachttijden per park voor de geschiedenis-tab
+ROLLUP_DIR = os.environ.get("WALIBI_ROLLUP_DIR", "data/rollups")
+
+# Ouder dan dit (een paar gemiste polls) tonen we de gegevens als verouderd
+STALE_AFTER = 3 * POLL_INTERVAL
+
+# Wikipedia-teksten veranderen zelden: een week houdbaar, daarna revalideren
+WIKI_DIR = os.environ.get("WALIBI_WIKI_DIR", "data/wiki")
+WIKI_TTL = 7 * 24 * 3600
+
+# Park zonder ?park= in de URL, en hoeveel parken tegelijk een eigen
+# ingest-thread hebben (de minst recent bekeken wordt gestopt)
+DEFAULT_PARK = os.environ.get("WALIBI_PARK", "walibi_holland")
+MAX_ACTIVE_PARKS = 8
+
+
+# ---- Shared snapshot ----
+# Eén achtergrondthread per park per proces scrapet de bronnen; alle sessies
+# lezen alleen de laatst gepubliceerde snapshot van hun park.
+@st.cache_resource
+def get_history_store():
+    return HistoryStore(HISTORY_DIR)
+
+
+@st.cache_resource(max_entries=MAX_ACTIVE_PARKS, on_release=lambda worker: worker.stop())
+def get_ingest_worker(slug):
+    park = get_park(slug)
+    worker = IngestWorker(
+        SnapshotStore(os.path.join(SNAPSHOT_DIR, f"{slug}.json"), tz=park.timezone),
+        interval=POLL_INTERVAL,
+        park_id=park.park_id,
+        looopings_url=park.looopings_url,
+        queue_times_id=park.queue_times_id,
+        history=get_history_store(),
+        forecaster=WaitForecaster(park.timezone),
+        rollups=WaitRollups(park.rides, park.timezone, os.path.join(ROLLUP_DIR, f"{slug}.npz")),
+    )
+    worker.start()
+    return worker
 
-        if response.status_code != 200:
-            return f"⚠️ Wikipedia-pagina kon niet worden opgehaald. Statuscode: {response.status_code}"
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        content = soup.find("div", {"id": "mw-content-text"})
+@st.cache_resource
+def get_wiki_cache():
+    return WikiCache(WIKI_DIR, ttl=WIKI_TTL)
 
-        if not content:
-            return "⚠️ Geen geschikte tekst gevonden op de pagina."
 
-        paragraphs = content.find_all("p")
-        clean_paragraphs = []
+@st.cache_resource(max_entries=MAX_ACTIVE_PARKS)
+def prefetch_wiki(slug):
+    # Eén keer per park: alle Wikipedia-pagina's op de achtergrond ophalen
+    park = get_park(slug)
+    get_wiki_cache().prefetch([park.wiki_title, *park.wiki_titles.values()])
 
-        for p in paragraphs:
-            text = p.get_text().strip()
-            text = re.sub(r'\[\d+\]', '', text)
-            text = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', text)
 
-            if len(text) > 50:
-                clean_paragraphs.append(text)
+def get_forecaster(slug):
+    return get_ingest_worker(slug).forecaster
 
-            if len(clean_paragraphs) >= max_paragraphs:
-                break
 
-        if not clean_paragraphs:
-            return "⚠️ Geen geschikte tekst gevonden op de pagina."
+def get_park_snapshot(slug):
+    # Alleen bij een koude start wachten op de eerste poll
+    return get_ingest_worker(slug).store.wait_ready(timeout=20)
 
-        return "\n\n".join(clean_paragraphs)
 
+def get_full_wikipedia_text(title: str, max_paragraphs: int = 15) -> str:
+    try:
+        paragraphs = get_wiki_cache().get(title)
+    except WikipediaError as e:
+        return f"⚠️ Wikipedia-pagina kon niet worden opgehaald. Statuscode: {e.status_code}"
     except Exception as e:
         return f"⚠️ Er is een fout opgetreden bij het ophalen: {e}"
 
+    if not paragraphs:
+        return "⚠️ Geen geschikte tekst gevonden op de pagina."
 
-# ---- Score formula ----
-def score(wait_time, walk_time, user_score):
-    return wait_time + walk_time - user_score * 3
-
-# ---- Distance matrix ----
-distance_matrix = {
-    "UNTAMED": {"Lost Gravity": 6, "Xpress: Platform 13": 7, "YOY THRILL side": 10, "Space Shot": 2, "El Rio Grande": 8, "YOY CHILL side": 10, "Speed Of Sound": 10, "Goliath": 4, "Condor": 5, "Crazy River": 5},
-    "Lost Gravity": {"UNTAMED": 6, "Xpress: Platform 13": 6, "YOY THRILL side": 9, "Space Shot": 7, "El Rio Grande": 7, "YOY CHILL side": 9, "Speed Of Sound": 4, "Goliath": 9, "Condor": 7, "Crazy River": 2},
-    "Xpress: Platform 13": {"UNTAMED": 7, "Lost Gravity": 6, "YOY THRILL side": 3, "Space Shot": 6, "El Rio Grande": 3, "YOY CHILL side": 3, "Speed Of Sound": 2, "Goliath": 8, "Condor": 6, "Crazy River": 6},
-    "YOY THRILL side": {"UNTAMED": 10, "Lost Gravity": 9, "Xpress: Platform 13": 3, "Space Shot": 7, "El Rio Grande": 4, "YOY CHILL side": 0, "Speed Of Sound": 8, "Goliath": 11, "Condor": 6, "Crazy River": 9},
-    "Space Shot": {"UNTAMED": 2, "Lost Gravity": 7, "Xpress: Platform 13": 6, "YOY THRILL side": 7, "El Rio Grande": 5, "YOY CHILL side": 7, "Speed Of Sound": 11, "Goliath": 3, "Condor": 3, "Crazy River": 6},
-    "El Rio Grande": {"UNTAMED": 8, "Lost Gravity": 7, "Xpress: Platform 13": 3, "YOY THRILL side": 4, "Space Shot": 5, "YOY CHILL side": 4, "Speed Of Sound": 8, "Goliath": 9, "Condor": 5, "Crazy River": 7},
-    "YOY CHILL side": {"UNTAMED": 10, "Lost Gravity": 9, "Xpress: Platform 13": 3, "YOY THRILL side": 0, "Space Shot": 7, "El Rio Grande": 4, "Speed Of Sound": 8, "Goliath": 11, "Condor": 6, "Crazy River": 9},
-    "Speed Of Sound": {"UNTAMED": 10, "Lost Gravity": 4, "Xpress: Platform 13": 2, "YOY THRILL side": 8, "Space Shot": 11, "El Rio Grande": 8, "YOY CHILL side": 8, "Goliath": 11, "Condor": 5, "Crazy River": 8},
-    "Goliath": {"UNTAMED": 4, "Lost Gravity": 9, "Xpress: Platform 13": 8, "YOY THRILL side": 11, "Space Shot": 3, "El Rio Grande": 9, "YOY CHILL side": 11, "Speed Of Sound": 11, "Condor": 5, "Crazy River": 9},
-    "Condor": {"UNTAMED": 5, "Lost Gravity": 7, "Xpress: Platform 13": 6, "YOY THRILL side": 6, "Space Shot": 3, "El Rio Grande": 5, "YOY CHILL side": 6, "Speed Of Sound": 9, "Goliath": 5, "Crazy River": 8},
-    "Crazy River": {"UNTAMED": 5, "Lost Gravity": 2, "Xpress: Platform 13": 6, "YOY THRILL side": 9, "Space Shot": 6, "El Rio Grande": 7, "YOY CHILL side": 9, "Speed Of Sound": 8, "Goliath": 9, "Condor": 8},
-}
+    return "\n\n".join(paragraphs[:max_paragraphs])
 
-ride_locations = {
-    "UNTAMED": (52.4426, 5.76115),
-    "Lost Gravity": (52.4425, 5.76622),
-    "Xpress: Platform 13": (52.439, 5.76409),
-    "YOY THRILL side": (52.439473, 5.763067),  # origineel
-    "Space Shot": (52.4417, 5.76104),
-    "El Rio Grande": (52.4399, 5.76366),
-    "YOY CHILL side": (52.439473 + 0.00015, 5.763067 + 0.000015),  # iets verschoven
-    "Speed Of Sound": (52.4406, 5.76816),
-    "Goliath": (52.4386, 5.76156),
-    "Condor": (52.4405, 5.76151),
-    "Crazy River": (52.4422, 5.76459),
+
+# ---- Streamlit UI ----
+# Presets in de keuzelijst en hun naam in recommend.PRESETS
+PRESET_LABELS = {
+    "🎚️ Custom": None,
+    "✅ All On": "all_on",
+    "🎢 Roller Coasters Only": "roller_coasters",
+    "🚫 No Water": "no_water",
+    "⚡ Short Wait Boost": "short_wait",
+    "🎢 Thrill Seeker": "thrill",
+    "🧘 Chill Mode": "chill",
 }
 
+# Elk onderdeel is een fragment: een widget binnen een fragment laat alleen
+# dat fragment opnieuw draaien. Gegevens gaan expliciet als argument mee.
 
-TARGET_RIDES = list(distance_matrix.keys())
+def format_countdown(prefix, minutes):
+    hours, mins = divmod(minutes, 60)
+    if hours > 0:
+        return f"{prefix} {hours}h {mins}m"
+    return f"{prefix} {mins} minutes"
 
-# ---- Streamlit UI ----
-st.set_page_config(page_title="Walibi Ride Optimizer", layout="centered")
-st.title("🎢 Walibi Ride Optimizer")
 
-tab1, tab2, tab3 = st.tabs([
-    "🚀 Ride Optimizer",  
-    "🗺️ Overview Attractions",
-    "📖 Park Info"
-])
-
-
-with tab1:
-    opening_hours = get_opening_hours()
-    if opening_hours:
-        open_status = is_park_open(opening_hours)
-        st.markdown("### 🕒 Park Opening Hours")
-        st.write(f"Today: {opening_hours}")
-
-        # Toon open/gesloten status
-        if open_status is True:
-            st.success("✅ The park is currently **OPEN**")
-        elif open_status is False:
-            st.error("❌ The park is currently **CLOSED**")
-        else:
-            st.warning("⚠️ Could not determine current open status.")
-
-        # Toon countdown tot opening of sluiting
-        try:
-            open_str, close_str = opening_hours.split(" - ")
-            time_until = get_time_until_close(open_str, close_str)
-            st.info(time_until)
-        except Exception:
-            st.warning("⚠️ Could not calculate time until open/close.")
-    else:
+def render_opening_hours(opening_hours, park_day, now):
+    # `park_day` komt uit de kalender van de snapshot (schedule.ParkDay);
+    # None als de openingstijden niet te lezen waren
+    if not opening_hours:
         st.warning("⚠️ Opening hours not found on the site.")
+        return
+
+    st.markdown("### 🕒 Park Opening Hours")
+    st.write(f"Today: {opening_hours}")
+    if park_day is None:
+        st.warning("⚠️ Could not determine current open status.")
+        return
+
+    if park_day.is_open(now):
+        st.success("✅ The park is currently **OPEN**")
+        st.info(format_countdown("⌛ Closes in", park_day.minutes_until_close(now)))
+    elif now < park_day.opens:
+        st.error("❌ The park is currently **CLOSED**")
+        st.info(format_countdown("🕐 Opens in", park_day.minutes_until_open(now)))
+    else:
+        st.error("❌ The park is currently **CLOSED**")
+        st.info("🛑 The park is already closed.")
+
+
+@st.fragment(run_every=REFRESH_CHECK)
+def watch_snapshot(slug):
+    # Draait elke REFRESH_CHECK seconden, maar alleen dit fragment: het
+    # bijschrift blijft actueel, en de pagina draait pas opnieuw als er echt
+    # een wachttijd, status of openingstijd veranderd is (zie SnapshotStore).
+    # Daarbij draait alleen de open tab, en ongewijzigde markers en tabellen
+    # komen uit de cache.
+    snapshot = get_park_snapshot(slug)
+    if st.session_state.get("snapshot_version") != (slug, snapshot["version"]):
+        st.rerun()
+
+    fetched_at = snapshot["fetched_at"]
+    if fetched_at is None:
+        return
+    age = datetime.now(fetched_at.tzinfo) - fetched_at
+    if age.total_seconds() > STALE_AFTER:
+        st.warning(
+            f"⚠️ Wachttijden van {fetched_at.strftime('%H:%M')} ({format_age(age)} oud): "
+            "de bron is nu niet bereikbaar, we proberen het op de achtergrond opnieuw."
+        )
+    else:
+        st.caption(f"🕒 Gegevens bijgewerkt op {fetched_at.strftime('%H:%M:%S')}")
 
 
+def format_age(age):
+    minutes = int(age.total_seconds() // 60)
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} u {minutes % 60:02d} min"
 
-    st.write("Find the best ride to go to next based on real-time wait times, your location, and preferences.")
 
-    wait_data = get_wait_times()
-    open_rides = [r for r in TARGET_RIDES if wait_data.get(r, {}).get("status") == "open"]
+@st.fragment
+def render_optimizer(park, wait_data, calendar):
+    st.write("Find the best ride to go to next based on real-time wait times, your location, and preferences.")
 
-    walibi_tz = timezone("Europe/Amsterdam")
-    local_time = datetime.now(walibi_tz)
-    st.caption(f"🕒 Gegevens bijgewerkt op {local_time.strftime('%H:%M:%S')}")
+    open_rides = get_open_rides(park, wait_data)
 
+    watch_snapshot(park.slug)
 
     if not open_rides:
-        st.warning("No thrill rides are currently open.")
+        if get_park_snapshot(park.slug)["fetched_at"] is None:
+            # Nog nooit een goede poll (ook niet van schijf): de bron is onbereikbaar
+            st.warning("Nog geen wachttijden beschikbaar; we blijven het op de achtergrond proberen.")
+        else:
+            st.warning("No thrill rides are currently open.")
     
 
-    current_ride = st.selectbox("🎡 Which ride did you just exit?", sorted(open_rides))
+    current_ride = st.selectbox("🎡 Which ride did you just exit?", sorted(open_rides), key="current_ride")
 
-    max_wait = st.slider("⏳ Max wait time (min)", 0, 120, 45, help="Maximale wachttijd die je bereid bent te accepteren")
-    max_walk = st.slider("🚶 Max walking time (min)", 0, 20, 10, help="Maximale loopafstand tussen attracties in minuten")
+    max_wait = st.slider("⏳ Max wait time (min)", 0, 120, key="max_wait", help="Maximale wachttijd die je bereid bent te accepteren")
+    max_walk = st.slider("🚶 Max walking time (min)", 0, 20, key="max_walk", help="Maximale loopafstand tussen attracties in minuten")
 
+    render_recommendation(park, wait_data, calendar, open_rides, current_ride, max_wait, max_walk)
+    render_closed_rides(park, wait_data)
+    render_map(park, wait_data, current_ride)
 
+
+@st.fragment
+def render_recommendation(park, wait_data, calendar, open_rides, current_ride, max_wait, max_walk):
     st.markdown("### 🎯 Rate each ride (0 = skip, 10 = must-do)")
 
     if "last_preset" not in st.session_state:
@@ -280,70 +224,27 @@ with tab1:
 
     preset = st.selectbox(
         "🎛️ Choose a preference preset",
-        [
-            "🎚️ Custom",
-            "✅ All On",
-            "🎢 Roller Coasters Only",
-            "🚫 No Water",
-            "⚡ Short Wait Boost",
-            "🎢 Thrill Seeker",
-            "🧘 Chill Mode",
-        ],
-        index=[
-            "🎚️ Custom",
-            "✅ All On",
-            "🎢 Roller Coasters Only",
-            "🚫 No Water",
-            "⚡ Short Wait Boost",
-            "🎢 Thrill Seeker",
-            "🧘 Chill Mode",
-        ].index(st.session_state["last_preset"]),
+        list(PRESET_LABELS),
+        index=list(PRESET_LABELS).index(st.session_state["last_preset"]),
     )
 
-
-    # Define ride categories
-    water_rides = ["Crazy River", "El Rio Grande"]
-    thrill_rides = [
-        "UNTAMED", "Lost Gravity", "Goliath",
-        "Speed Of Sound", "Condor",
-        "YOY THRILL side", "Xpress: Platform 13", "Space Shot"
-    ]
-    chill_rides = ["YOY CHILL side", "Crazy River", "El Rio Grande"]
-    roller_coasters = [
-        "UNTAMED", "Lost Gravity", "Goliath",
-        "Speed Of Sound", "Condor", "Xpress: Platform 13",
-        "YOY THRILL side", "YOY CHILL side"
-    ]
-
     # Apply presets to session_state
     if preset != st.session_state["last_preset"]:
-        for ride in open_rides:
-            wait = wait_data[ride]["wait"] or 0
-            if preset == "✅ All On":
-                st.session_state[ride] = 5
-            elif preset == "🎢 Roller Coasters Only":
-                st.session_state[ride] = 5 if ride in roller_coasters else 0
-            elif preset == "🚫 No Water":
-                st.session_state[ride] = 0 if ride in water_rides else 5
-            elif preset == "⚡ Short Wait Boost":
-                st.session_state[ride] = 8 if wait <= 5 else 5
-            elif preset == "🎢 Thrill Seeker":
-                st.session_state[ride] = 10 if ride in thrill_rides else 5
-            elif preset == "🧘 Chill Mode":
-                st.session_state[ride] = 8 if ride in chill_rides else 0
+        if PRESET_LABELS[preset]:
+            st.session_state.update(preset_ratings(PRESET_LABELS[preset], park, wait_data, open_rides))
         st.session_state["last_preset"] = preset
 
 
     # Reset button
     if st.button("🔄 Reset Ratings"):
         for ride in open_rides:
-            st.session_state[ride] = 5
+            st.session_state[ride] = DEFAULT_RATING
         st.session_state["last_preset"] = "🎚️ Custom"
 
 
     ride_scores = {}
     for ride in sorted(open_rides):
-        wait = wait_data[ride]["wait"]
+        wait = wait_data.wait_of(ride)
         wait_display = f"⏱️ {wait} min" if wait is not None else "⏱️ onbekend"
 
         # Titel boven de slider
@@ -351,7 +252,7 @@ with tab1:
 
         # Slider eronder
         if ride not in st.session_state:
-            st.session_state[ride] = 5
+            st.session_state[ride] = DEFAULT_RATING
 
         previous_value = st.session_state[ride]
         current_value = st.slider("", 0, 10, key=ride, label_visibility="collapsed")
@@ -370,51 +271,51 @@ with tab1:
     # ---- Optimization logic ----
     # Filter out rides that user scored 0
     filtered_rides = {ride: score for ride, score in ride_scores.items() if score > 0}
-    best_ride = None
-    best_score = float("inf")
-
-
-    for ride, preference in filtered_rides.items():
-        wait_time = wait_data[ride]["wait"]
-
-        if ride == current_ride:
-            walk_time = 0
-        else:
-            walk_time = distance_matrix.get(current_ride, {}).get(ride, 10)
-
-        if wait_time is not None and (wait_time > max_wait or walk_time > max_walk):
-            continue
-
-        s = score(wait_time, walk_time, preference)
-        if s < best_score:
-            best_score = s
-            best_ride = ride
 
+    candidates = recommend(park, wait_data, current_ride, filtered_rides, max_wait, max_walk, get_forecaster(park.slug))
 
+    if candidates:
+        best = candidates[0]
+        st.success(f"🎢 Best next ride: **{best['ride']}**")
+        st.write(f"⏳ Wait time: {best['wait']} minutes")
+        if best["expected_wait"] != best["wait"]:
+            st.write(f"🔮 Expected when you arrive: {best['expected_wait']} minutes")
+        st.write(f"🚶 Walking time: {best['walk']} minutes")
+    else:
+        st.warning("No rides fit your limits.")
 
-    if best_ride:
-        st.success(f"🎢 Best next ride: **{best_ride}**")
-        st.write(f"⏳ Wait time: {wait_data[best_ride]['wait']} minutes")
-        walk_time = distance_matrix.get(current_ride.strip(), {}).get(best_ride.strip())
-        if current_ride == best_ride:
-            walk_time = 0
-        else:
-            walk_time = distance_matrix.get(current_ride.strip(), {}).get(best_ride.strip())
+    # ---- Plan for the rest of the day ----
+    # De kalender heeft de openingstijden al geparst: alleen nog rekenen
+    now = calendar.now()
+    park_day = calendar.day(now)
+    if park_day:
+        plan_start, minutes_left = park_day.planning_window(now)
+        plan = plan_itinerary(
+            current_ride,
+            filtered_rides,
+            {ride: wait_data.wait_of(ride) for ride in filtered_rides},
+            park.walk,
+            park.index,
+            max_wait,
+            max_walk,
+            minutes_left,
+        )
 
-        if walk_time is not None:
-            st.write(f"🚶 Walking time: {walk_time} minutes")
-        else:
-            st.warning("Walking time data not available for selected rides.")
+        if plan:
+            st.markdown("### 🗓️ Plan for the rest of the day")
+            for i, stop in enumerate(plan, start=1):
+                arrival = plan_start + timedelta(minutes=stop["arrival"])
+                st.markdown(
+                    f"{i}. **{stop['ride']}** – 🕒 {arrival.strftime('%H:%M')} · "
+                    f"🚶 {stop['walk']} min · ⏳ {stop['wait']} min"
+                )
 
 
-    else:
-        st.warning("No rides fit your limits.")
-
-    # ---- Show closed rides for transparency ----
-# ---- Show closed rides for transparency ----
+def render_closed_rides(park, wait_data):
+    _, statuses = wait_data.align(park.rides)
     closed_rides = [
-    ride for ride in TARGET_RIDES
-    if wait_data.get(ride, {}).get("status") in ["closed", "maintenance", "breakdown"]
+    (ride, status) for ride, status in zip(park.rides, statuses.tolist())
+    if status in (CLOSED, MAINTENANCE, BREAKDOWN)
 ]
 
     if closed_rides:
@@ -422,186 +323,155 @@ with tab1:
         st.markdown("### ❌ Closed or not-available rides")
 
     status_display = {
-        "closed": ("🔴", "Closed"),
-        "maintenance": ("🔧", "Maintenance"),
-        "breakdown": ("⚠️", "Storing"),
+        CLOSED: ("🔴", "Closed"),
+        MAINTENANCE: ("🔧", "Maintenance"),
+        BREAKDOWN: ("⚠️", "Storing"),
     }
 
-    for ride in closed_rides:
-        status = wait_data.get(ride, {}).get("status", "unknown")
-        emoji, label = status_display.get(status, ("❔", status))
+    for ride, status in closed_rides:
+        emoji, label = status_display[status]
         st.markdown(
             f"- **{ride}** {emoji} &nbsp;&nbsp;<span style='color:red;'>[{label.upper()}]</span>",
             unsafe_allow_html=True
         )
 
 
-    
-    # Filter alleen rides met coördinaten
-    valid_rides = {r: loc for r, loc in ride_locations.items() if loc != "TBD"}
+@st.cache_resource(max_entries=MAX_ACTIVE_PARKS)
+def get_base_map(slug):
+    # Eén keer per park per proces opgebouwd (alleen het opzoeken van de
+    # tegelprovider kost al ~8 ms). st_folium past de kaart aan, dus elke rerun
+    # werkt op een kopie; die heeft dezelfde id's, zodat de kaart-JS steeds
+    # identiek is.
+    from maps import build_base_map
 
-    # 🗺️ Streamlit kaartweergave
-    st.markdown("### 🗺️ Interactive map of the park")
-    m = folium.Map(location=[52.441, 5.763], zoom_start=17)
+    return build_base_map(get_park(slug))
 
-    for ride, (lat, lon) in valid_rides.items():
-        ride_info = wait_data.get(ride, {})
-        wait = ride_info.get("wait")
-        status = ride_info.get("status", "unknown")
 
-        # Looptijd van huidige locatie naar deze attractie (indien bekend)
-        walk_time = None
-        if current_ride in distance_matrix and ride in distance_matrix[current_ride]:
-            walk_time = distance_matrix[current_ride][ride]
+@st.cache_resource(max_entries=256)
+def get_marker_layer(slug, walkway_version, waits, statuses, current_ride):
+    # `waits` en `statuses` zijn tuples langs park.locations. Dezelfde toestand
+    # geeft dezelfde laag (en dezelfde id's), dus ongewijzigde markers worden
+    # niet opnieuw gebouwd of naar de browser gestuurd. `walkway_version`
+    # verandert als er een pad wijzigt, zodat de looptijden meeveranderen.
+    from maps import build_marker_layer
 
-        popup_lines = [f"<b>{ride}</b>"]
-        if wait is not None:
-            popup_lines.append(f"Wachttijd: {wait} min")
-        else:
-            popup_lines.append(f"Status: {status}")
+    return build_marker_layer(get_park(slug), waits, statuses, current_ride)
 
-        if walk_time is not None:
-            popup_lines.append(f"Looptijd: {walk_time} min")
 
-        popup = "<br>".join(popup_lines)
+@st.fragment
+def render_map(park, wait_data, current_ride):
+    from streamlit_folium import st_folium
+
+    # Alleen rides met coördinaten; als tuples, zodat ze de cachesleutel vormen
+    waits, statuses = wait_data.align(park.locations)
+    waits, statuses = tuple(waits.tolist()), tuple(statuses.tolist())
+
+    # 🗺️ Streamlit kaartweergave
+    st.markdown("### 🗺️ Interactive map of the park")
+    m = copy.deepcopy(get_base_map(park.slug))
+    layer = copy.deepcopy(get_marker_layer(park.slug, park.graph.version, waits, statuses, current_ride))
+
+    # Alleen de markerlaag gaat als feature group mee; met een vaste key houdt
+    # de browser de kaart vast en tekent hij alleen gewijzigde markers opnieuw.
+    # Geen returned_objects: pannen/zoomen op de kaart triggert dan geen rerun
+    with timing.span("map.st_folium"):
+        st_folium(m, key="park_map", width=700, height=500, returned_objects=[], feature_group_to_add=layer)
+
+
+@st.fragment
+def render_overview(park, wait_data):
+    from views import SORT_OPTIONS, overview_table
 
-        if wait is not None:
-            wait_text = f"{wait}m"
-        else:
-            if status == "closed":
-                wait_text = "❌"
-            elif status == "maintenance":
-                wait_text = "🔧"
-            elif status == "breakdown":
-                wait_text = "⚠️"
-            else:
-                wait_text = "?"
-
-        # Het rode uitroepteken is hier verwijderd
-
-        folium.Marker(
-            location=(lat, lon),
-            popup=popup,
-            icon=folium.DivIcon(html=f"""
-                <div style="
-                    background-color: {wait_time_color(wait, status)};
-                    color: white;
-                    padding: 6px 10px;
-                    min-width: 32px;
-                    border-radius: 6px;
-                    font-size: 16px;
-                    font-weight: bold;
-                    text-align: center;
-                    display: inline-block;
-                    box-shadow: 1px 1px 3px rgba(0,0,0,0.3);
-                ">
-                    {wait_text}
-                </div>
-            """)
-        ).add_to(m)
-
-
-
-    # Markeer huidige locatie (laatste attractie)
-    if current_ride in valid_rides:
-        folium.Marker(
-            location=valid_rides[current_ride],
-            popup="📍 Jij bent hier (net geweest)",
-            icon=folium.Icon(color="blue", icon="star")
-        ).add_to(m)
-
-    # Toon de kaart
-    st_data = st_folium(m, width=700, height=500)
-
-with tab2:
     st.header("📋 Attraction Overview")
+    watch_snapshot(park.slug)
 
     # Sort option dropdown
     sort_option = st.selectbox(
         "📊 Sort Attractions based on:",
-        ["Alphabetical", "Wait time (low to high)", "Wait time (high to low)", "Status"]
+        SORT_OPTIONS,
+        key="sort_option",
     )
 
-    ride_table = []
-
-    for ride in TARGET_RIDES:
-        ride_info = wait_data.get(ride, {})
-        status = ride_info.get("status")
-        wait = ride_info.get("wait")
-
-        if status == "open":
-            display = f"🟢 {wait} min" if wait is not None else "🟢 Unknown"
-        elif status == "closed":
-            display = "🔴 Closed"
-        elif status == "maintenance":
-            display = "🔧 Maintenance"
-        elif status == "breakdown":
-            display = "⚠️ Storing"
-        else:
-            display = "❔ Unknown"
+    df_overview = overview_table(park, wait_data, sort_option)
 
-        ride_table.append({
-            "Attraction": ride,
-            "Status / Wait Time": display
-        })
-
-    df_overview = pd.DataFrame(ride_table)
+    # Display table
+    st.dataframe(df_overview, use_container_width=True, hide_index=True)
 
-    # Sorting logic
-    if sort_option == "Alphabetical":
-        df_overview = df_overview.sort_values("Attraction")
 
-    elif sort_option == "Wait time (low to high)":
-        df_overview["WaitTimeNum"] = df_overview["Status / Wait Time"].str.extract(r'(\d+)').astype(float)
-        df_overview = df_overview.sort_values("WaitTimeNum", na_position="last")
+@st.cache_data(max_entries=64)
+def get_history_profile(slug, version, weekday):
+    # `version` (van de rollups) is alleen de cachesleutel: binnen een poll
+    # kost het schuiven met de filters geen nieuwe percentielen
+    from views import history_profile
 
-    elif sort_option == "Wait time (high to low)":
-        df_overview["WaitTimeNum"] = df_overview["Status / Wait Time"].str.extract(r'(\d+)').astype(float)
-        df_overview = df_overview.sort_values("WaitTimeNum", ascending=False, na_position="last")
+    return history_profile(get_park(slug), get_ingest_worker(slug).rollups, weekday)
 
-    elif sort_option == "Status":
-        # Define sorting priority for status icons
-        status_order = {"🟢": 0, "⚠️": 1, "🔴": 2}
-        df_overview["StatusCode"] = df_overview["Status / Wait Time"].str[0].map(status_order)
-        df_overview = df_overview.sort_values("StatusCode")
 
-    # Drop helper columns if they exist
-    df_overview = df_overview.drop(columns=["WaitTimeNum", "StatusCode"], errors="ignore")
+@st.fragment
+def render_history(park, rollups, calendar):
+    from views import WEEKDAYS, best_times, day_profile, heatmap_chart, wait_curve_chart
 
-    # Display table
-    st.dataframe(df_overview, use_container_width=True, hide_index=True)
+    st.header("📈 Wachttijden door de tijd")
+    if not rollups.observed_minutes().any():
+        st.info("Nog geen geschiedenis: die wordt opgebouwd terwijl de app wachttijden ophaalt.")
+        return
 
-with tab3:
+    today = calendar.now()
+    st.session_state.setdefault("history_weekday", today.weekday())
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        weekday = st.selectbox(
+            "📅 Dag van de week",
+            [None, *range(7)],
+            format_func=lambda d: "Alle dagen" if d is None else WEEKDAYS[d],
+            key="history_weekday",
+        )
+    profile = get_history_profile(park.slug, rollups.version, weekday)
+    if profile.empty:
+        st.info("Voor deze dag is nog te weinig geschiedenis.")
+        return
+
+    with col2:
+        known = sorted(profile["Attraction"].unique())
+        st.session_state["history_rides"] = [r for r in st.session_state.get("history_rides", known[:3]) if r in known]
+        selected = st.multiselect("🎢 Attracties", known, key="history_rides")
+
+    if selected:
+        st.subheader("Verloop over de dag")
+        st.caption("Lijn: mediaan, band: de middelste helft van de dagen"
+                   + (", stippellijn: vandaag." if weekday in (None, today.weekday()) else "."))
+        shown = profile[profile["Attraction"].isin(selected)]
+        current = None
+        if weekday in (None, today.weekday()):
+            current = day_profile(park, rollups, today.date())
+            current = current[current["Attraction"].isin(selected)]
+        st.altair_chart(wait_curve_chart(shown, current), use_container_width=True)
+
+    st.subheader("⏰ Beste tijd per attractie")
+    st.dataframe(best_times(profile), use_container_width=True, hide_index=True)
+
+    st.subheader("🗓️ Een typische dag")
+    st.altair_chart(heatmap_chart(profile), use_container_width=True)
+
+
+@st.fragment
+def render_park_info(park):
     st.header("📖 Informatie over het park en attracties")
 
     # Algemene parkintroductie in een expander
-    with st.expander("🎢 Over Walibi Holland (klik om te openen)"):
-        with st.spinner("Wikipedia-info over Walibi Holland laden..."):
-            park_intro = get_full_wikipedia_text("Walibi_Holland")
-            st.write(park_intro)
-            st.markdown("[🔗 Bekijk Walibi Holland op Wikipedia](https://nl.wikipedia.org/wiki/Walibi_Holland)")
+    if park.wiki_title:
+        with st.expander(f"🎢 Over {park.name} (klik om te openen)"):
+            with st.spinner(f"Wikipedia-info over {park.name} laden..."):
+                park_intro = get_full_wikipedia_text(park.wiki_title)
+                st.write(park_intro)
+                st.markdown(f"[🔗 Bekijk {park.name} op Wikipedia](https://nl.wikipedia.org/wiki/{park.wiki_title})")
 
     st.markdown("---")
 
-    # Mapping van attractienamen naar Wikipedia-paginatitels
-    ride_wiki_titles = {
-        "UNTAMED": "Untamed_(Walibi_Holland)",
-        "Lost Gravity": "Lost_Gravity",
-        "Xpress: Platform 13": "Xpress:_Platform_13",
-        "YOY THRILL side": "YOY",
-        "YOY CHILL side": "YOY",
-        "Space Shot": "Space_Shot_(Walibi_Holland)",
-        "El Rio Grande": "El_Rio_Grande",
-        "Speed Of Sound": "Speed_of_Sound_(achtbaan)",
-        "Goliath": "Goliath_(Walibi_Holland)",
-        "Condor": "Condor_(Walibi_Holland)",
-        "Crazy River": "Crazy_River"
-    }
-
     st.subheader("🎡 Kies een attractie voor meer info")
-    keuze = st.selectbox("Attractie", sorted(ride_wiki_titles.keys()))
+    keuze = st.selectbox("Attractie", sorted(park.wiki_titles.keys()), key="wiki_choice")
 
-    wiki_title = ride_wiki_titles.get(keuze)
+    wiki_title = park.wiki_titles.get(keuze)
 
     if wiki_title:
         with st.spinner(f"Informatie ophalen over {keuze}..."):
@@ -611,3 +481,90 @@ with tab3:
             st.markdown(f"[🔗 Bekijk volledige Wikipedia-pagina](https://nl.wikipedia.org/wiki/{wiki_title})")
     else:
         st.info("Geen Wikipedia-informatie beschikbaar voor deze attractie.")
+
+
+def render_debug_panel():
+    # Verborgen paneel (?debug=1): tijden per fase, over alle sessies van dit proces
+    with st.expander("⏱️ Timing"):
+        if not timing.ENABLED:
+            st.info("Metingen staan uit; start de app met WALIBI_TIMING=1.")
+            return
+        rows = timing.timings.summary()
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nog geen metingen.")
+        st.download_button(
+            "📥 Prometheus-export",
+            timing.timings.prometheus(),
+            file_name="walibi_timing.prom",
+            mime="text/plain",
+        )
+        if timing.LOG_PATH:
+            st.caption(f"Elke meting gaat ook naar {timing.LOG_PATH}")
+
+
+rerun_started = time.perf_counter()
+
+st.set_page_config(page_title="Walibi Ride Optimizer", layout="centered")
+st.title("🎢 Walibi Ride Optimizer")
+
+# Welk park: ?park=<slug> in de URL, met een keuzelijst zodra er meer dan één is
+parks = available_parks()
+slug = st.query_params.get("park", DEFAULT_PARK)
+if slug not in parks:
+    slug = DEFAULT_PARK
+if len(parks) > 1:
+    slug = st.selectbox("🏞️ Park", parks, index=parks.index(slug), format_func=lambda s: get_park(s).name)
+    st.query_params["park"] = slug
+park = get_park(slug)
+prefetch_wiki(slug)
+
+# Widgets in een tab die niet getoond wordt, worden niet gerenderd en dan
+# gooit Streamlit hun waarde weg. Opnieuw toewijzen houdt ze vast.
+for key in [*park.rides, "current_ride", "max_wait", "max_walk", "sort_option", "wiki_choice", "history_weekday",
+            "history_rides"]:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+
+st.session_state.setdefault("max_wait", 45)
+st.session_state.setdefault("max_walk", 10)
+
+# Met on_change="rerun" draait alleen de zichtbare tab
+tab1, tab2, tab3, tab4 = st.tabs([
+    "🚀 Ride Optimizer",  
+    "🗺️ Overview Attractions",
+    "📖 Park Info",
+    "📈 History",
+], key="active_tab", on_change="rerun")
+
+# Eén snapshot voor de hele rerun; watch_snapshot vergelijkt met deze versie
+snapshot = get_park_snapshot(slug)
+wait_data = snapshot["attractions"]
+st.session_state["snapshot_version"] = (slug, snapshot["version"])
+
+if tab1.open:
+    with tab1:
+        calendar = get_ingest_worker(slug).store.calendar
+        now = calendar.now()
+        render_opening_hours(snapshot["opening_hours"], calendar.day(now), now)
+        render_optimizer(park, wait_data, calendar)
+
+if tab2.open:
+    with tab2:
+        render_overview(park, wait_data)
+
+if tab3.open:
+    with tab3:
+        render_park_info(park)
+
+if tab4.open:
+    with tab4:
+        worker = get_ingest_worker(slug)
+        render_history(park, worker.rollups, worker.store.calendar)
+
+# Volledige reruns; een fragment dat alleen zichzelf herhaalt telt hier niet mee
+timing.record("page.rerun", time.perf_counter() - rerun_started)
+
+if st.query_params.get("debug") == "1":
+    render_debug_panel()
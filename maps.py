@@ -0,0 +1,121 @@
+# De parkkaart (tab 1), los van Streamlit opgebouwd zodat de benchmarks hem
+# ook zonder app kunnen draaien. main.py cachet de basiskaart en de markerlaag.
+
+import json
+
+import folium
+import numpy as np
+from jinja2 import Template
+
+from timing import timed
+from waits import BREAKDOWN, CLOSED, MAINTENANCE, NO_WAIT, STATUS_NAMES
+
+
+def wait_time_color(wait, status=None):
+    # `wait` en `status` zoals in waits.RideWaits (NO_WAIT, statuscode)
+    if status == MAINTENANCE:
+        return "gray"
+    elif status == BREAKDOWN:
+        return "#2a0000"
+    elif wait == NO_WAIT:
+        return "white"
+    elif wait <= 10:
+        return "green"
+    elif wait < 20:
+        return "#7bb172"
+    elif wait <= 30:
+        return "orange"
+    else:
+        return "red"
+
+
+def marker_label(wait, status):
+    if wait != NO_WAIT:
+        return f"{wait}m"
+    if status == CLOSED:
+        return "❌"
+    elif status == MAINTENANCE:
+        return "🔧"
+    elif status == BREAKDOWN:
+        return "⚠️"
+    return "?"
+
+
+# Opmaak van de wachttijd-markers staat één keer in de kaart-header in plaats
+# van inline in elke marker
+MARKER_CSS = """
+<style>
+    .ride-marker {
+        color: white;
+        padding: 6px 10px;
+        min-width: 32px;
+        border-radius: 6px;
+        font-size: 16px;
+        font-weight: bold;
+        text-align: center;
+        display: inline-block;
+        box-shadow: 1px 1px 3px rgba(0,0,0,0.3);
+    }
+</style>
+"""
+
+
+def build_base_map(park):
+    m = folium.Map(location=park.center(), zoom_start=17)
+    m.get_root().header.add_child(folium.Element(MARKER_CSS), name="ride_marker_css")
+    return m
+
+
+class RideMarkers(folium.MacroElement):
+    # Alle wachttijd-markers als één compacte datalijst plus een lusje JS,
+    # in plaats van een apart Marker/DivIcon/Popup-blok per attractie
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {{ this.data }}.forEach(function (r) {
+                L.marker([r[0], r[1]], {icon: L.divIcon({className: "empty",
+                    html: '<div class="ride-marker" style="background-color:' + r[2] + '">' + r[3] + '</div>'})})
+                    .bindPopup(r[4]).addTo({{ this._parent.get_name() }});
+            });
+        {% endmacro %}
+    """)
+
+    def __init__(self, rows):
+        super().__init__()
+        self._name = "RideMarkers"
+        self.data = json.dumps(rows, ensure_ascii=False)
+
+
+@timed("map.marker_layer")
+def build_marker_layer(park, waits, statuses, current_ride):
+    # `waits` en `statuses` lopen gelijk met park.locations (zie RideWaits.align)
+    layer = folium.FeatureGroup(name="Attracties")
+    valid_rides = park.locations
+
+    rows = []
+    for ride, wait, status in zip(valid_rides, waits, statuses):
+        # Looptijd van huidige locatie naar deze attractie (indien bekend)
+        walk_time = park.walk_time(current_ride, ride) if ride != current_ride else np.inf
+
+        popup_lines = [f"<b>{ride}</b>"]
+        if wait != NO_WAIT:
+            popup_lines.append(f"Wachttijd: {wait} min")
+        else:
+            popup_lines.append(f"Status: {STATUS_NAMES[status]}")
+
+        if np.isfinite(walk_time):
+            popup_lines.append(f"Looptijd: {walk_time:.0f} min")
+
+        lat, lon = valid_rides[ride]
+        rows.append([lat, lon, wait_time_color(wait, status), marker_label(wait, status), "<br>".join(popup_lines)])
+
+    RideMarkers(rows).add_to(layer)
+
+    # Markeer huidige locatie (laatste attractie)
+    if current_ride in valid_rides:
+        folium.Marker(
+            location=valid_rides[current_ride],
+            popup="📍 Jij bent hier (net geweest)",
+            icon=folium.Icon(color="blue", icon="star")
+        ).add_to(layer)
+
+    return layer
@@ -0,0 +1,166 @@
+import time
+
+import numpy as np
+
+from timing import timed
+
+
+# Geschatte tijd (min) voor de rit zelf plus in- en uitstappen
+RIDE_DURATION = 5
+
+# Tot zoveel attracties wordt exact opgelost (DP over subsets, 2^n states)
+EXACT_MAX_RIDES = 12
+
+# Tijdslimiet (s) voor de lokale verbetering in de heuristiek
+HEURISTIC_TIME_LIMIT = 0.05
+
+
+@timed("optimize.plan_itinerary")
+def plan_itinerary(current_ride, preferences, waits, walk_matrix, index, max_wait, max_walk,
+                   minutes_left, ride_duration=RIDE_DURATION):
+    # Kiest een volgorde van attracties die de som van de voorkeuren maximaliseert
+    # (bij gelijke som: zo vroeg mogelijk klaar). Elke stop moet binnen max_wait
+    # en max_walk vallen en de wachtrij moet voor sluitingstijd bereikt worden.
+    # `walk_matrix` is de dichte looptijdmatrix, `index` geeft per attractie
+    # de rij/kolom.
+    rides = [
+        ride for ride, preference in preferences.items()
+        if preference > 0 and ride in index and waits.get(ride) is not None and waits[ride] <= max_wait
+    ]
+    if not rides or minutes_left <= 0 or current_ride not in index:
+        return []
+
+    rows = np.array([index[ride] for ride in rides])
+    start = walk_matrix[index[current_ride], rows].astype(float)
+    walk = walk_matrix[np.ix_(rows, rows)].astype(float)
+    start[start > max_walk] = np.inf
+    walk[walk > max_walk] = np.inf
+    np.fill_diagonal(walk, np.inf)
+
+    visit = np.array([waits[r] for r in rides], dtype=float) + ride_duration
+    value = np.array([preferences[r] for r in rides], dtype=float)
+
+    if len(rides) <= EXACT_MAX_RIDES:
+        order = _solve_exact(start, walk, visit, value, minutes_left)
+    else:
+        order = _solve_heuristic(start, walk, visit, value, minutes_left)
+
+    stops = []
+    clock = 0
+    previous = None
+    for i in order:
+        leg = start[i] if previous is None else walk[previous, i]
+        clock += leg
+        stops.append({
+            "ride": rides[i],
+            "walk": int(leg),
+            "wait": waits[rides[i]],
+            "arrival": int(clock),
+        })
+        clock += visit[i]
+        previous = i
+    return stops
+
+
+def _solve_exact(start, walk, visit, value, budget):
+    # finish[mask, j]: vroegste eindtijd na het bezoeken van precies `mask`,
+    # eindigend bij j. Alle subsets met hetzelfde aantal attracties worden in
+    # één keer met numpy bijgewerkt.
+    n = len(start)
+    size = 1 << n
+    bits = 1 << np.arange(n)
+    masks = np.arange(size)
+    members = (masks[:, None] & bits) != 0
+    popcount = members.sum(axis=1)
+
+    finish = np.full((size, n), np.inf)
+    parent = np.full((size, n), -1, dtype=np.int16)
+
+    first = np.flatnonzero(start <= budget)
+    finish[bits[first], first] = start[first] + visit[first]
+
+    for k in range(1, n):
+        layer = masks[popcount == k]
+        rows = finish[layer]
+        reachable = np.isfinite(rows).any(axis=1)
+        layer, rows = layer[reachable], rows[reachable]
+        if not len(layer):
+            break
+
+        arrival = rows[:, :, None] + walk[None, :, :]
+        prev = arrival.argmin(axis=1)
+        best = np.take_along_axis(arrival, prev[:, None, :], axis=1)[:, 0, :]
+
+        li, j = np.nonzero(~members[layer] & (best <= budget))
+        target = layer[li] | bits[j]
+        finish[target, j] = best[li, j] + visit[j]
+        parent[target, j] = prev[li, j]
+
+    end = finish.min(axis=1)
+    feasible = np.flatnonzero(np.isfinite(end))
+    if not len(feasible):
+        return []
+
+    total = members[feasible] @ value
+    mask = int(feasible[np.lexsort((end[feasible], -total))[0]])
+
+    order = []
+    last = int(finish[mask].argmin())
+    while mask:
+        order.append(last)
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+    return order[::-1]
+
+
+def _route_finish(order, start, walk, visit, budget):
+    clock = 0.0
+    previous = None
+    for i in order:
+        clock += start[i] if previous is None else walk[previous, i]
+        if clock > budget:
+            return np.inf
+        clock += visit[i]
+        previous = i
+    return clock
+
+
+def _extend_greedy(order, start, walk, visit, value, budget):
+    # Voegt steeds de attractie met de meeste voorkeur per bestede minuut toe
+    visited = np.zeros(len(start), dtype=bool)
+    visited[order] = True
+    clock = _route_finish(order, start, walk, visit, budget) if order else 0.0
+    while True:
+        legs = start if not order else walk[order[-1]]
+        arrival = clock + legs
+        ok = ~visited & (arrival <= budget)
+        if not ok.any():
+            return order
+        gain = np.where(ok, value / (legs + visit), -np.inf)
+        j = int(gain.argmax())
+        order.append(j)
+        visited[j] = True
+        clock = arrival[j] + visit[j]
+
+
+def _solve_heuristic(start, walk, visit, value, budget, time_limit=HEURISTIC_TIME_LIMIT):
+    # Voor grotere parken: gretige opbouw, daarna 2-opt om looptijd te winnen
+    # en de vrijgekomen tijd opnieuw gretig vullen, tot de tijdslimiet.
+    deadline = time.perf_counter() + time_limit
+    order = _extend_greedy([], start, walk, visit, value, budget)
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        best = _route_finish(order, start, walk, visit, budget)
+        for i in range(len(order) - 1):
+            for k in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:k + 1][::-1] + order[k + 1:]
+                finish = _route_finish(candidate, start, walk, visit, budget)
+                if finish < best:
+                    order, best, improved = candidate, finish, True
+            if time.perf_counter() >= deadline:
+                break
+        order = _extend_greedy(order, start, walk, visit, value, budget)
+    return order
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from timing import timed
+from waits import OPEN
+
+
+# Voorkeur (0 = overslaan, 10 = must-do) voor een attractie zonder keuze
+DEFAULT_RATING = 5
+
+PRESETS = ("all_on", "roller_coasters", "no_water", "short_wait", "thrill", "chill")
+
+
+def score(wait_time, walk_time, user_score):
+    return wait_time + walk_time - user_score * 3
+
+
+def get_open_rides(park, wait_data):
+    # `wait_data` is een waits.RideWaits
+    _, status = wait_data.align(park.rides)
+    return [park.rides[i] for i in np.flatnonzero(status == OPEN)]
+
+
+def preset_ratings(preset, park, wait_data, rides):
+    # Voorkeuren volgens een preset voor de gegeven (open) attracties
+    ratings = {}
+    for ride in rides:
+        wait = wait_data.wait_of(ride) or 0
+        if preset == "all_on":
+            ratings[ride] = 5
+        elif preset == "roller_coasters":
+            ratings[ride] = 5 if ride in park.rides_in("roller_coaster") else 0
+        elif preset == "no_water":
+            ratings[ride] = 0 if ride in park.rides_in("water") else 5
+        elif preset == "short_wait":
+            ratings[ride] = 8 if wait <= 5 else 5
+        elif preset == "thrill":
+            ratings[ride] = 10 if ride in park.rides_in("thrill") else 5
+        elif preset == "chill":
+            ratings[ride] = 8 if ride in park.rides_in("chill") else 0
+        else:
+            raise ValueError(f"onbekende preset: {preset}")
+    return ratings
+
+
+@timed("optimize.recommend")
+def recommend(park, wait_data, current_ride, ratings, max_wait, max_walk, forecaster=None, now=None):
+    # Alle attracties met voorkeur > 0 die bereikbaar zijn en binnen max_wait
+    # (verwachte wachttijd bij aankomst) en max_walk vallen, beste eerst. Bij
+    # gelijke score wint de eerste in `ratings`.
+    walk_times = {}
+    for ride, rating in ratings.items():
+        if rating > 0:
+            walk = park.walk_time(current_ride, ride)
+            if np.isfinite(walk):
+                walk_times[ride] = walk
+
+    waits = [wait_data.wait_of(ride) or 0 for ride in walk_times]
+    if forecaster is not None and walk_times:
+        expected_waits = dict(zip(walk_times, forecaster.predict(
+            list(walk_times),
+            waits,
+            list(walk_times.values()),
+            now or datetime.now(pytz.utc),
+        )))
+    else:
+        expected_waits = dict(zip(walk_times, waits))
+
+    candidates = []
+    for ride, walk in walk_times.items():
+        walk = int(walk)
+        expected = int(expected_waits[ride])
+        if expected > max_wait or walk > max_walk:
+            continue
+        candidates.append({
+            "ride": ride,
+            "wait": wait_data.wait_of(ride),
+            "expected_wait": expected,
+            "walk": walk,
+            "score": score(expected, walk, ratings[ride]),
+        })
+
+    candidates.sort(key=lambda candidate: candidate["score"])
+    return candidates
+
+
+@timed("optimize.recommend_batch")
+def recommend_batch(park, wait_data, rides, current, ratings, max_wait, max_walk, forecaster=None, now=None, k=1,
+                    scoring=score):
+    # Zelfde regels als recommend(), voor veel bezoekers tegelijk:
+    #
+    #   rides     kolommen van `ratings` (volgorde bepaalt wie wint bij gelijke score)
+    #   current   (V,) index in park.rides van waar elke bezoeker nu is
+    #   ratings   (V, R) voorkeuren 0-10
+    #   max_wait, max_walk  scalar of (V,)
+    #   scoring   scoring(verwachte wachttijd, looptijd, voorkeur) op arrays,
+    #             laagste wint; standaard score() (de simulator vergelijkt andere)
+    #
+    # Geeft (top, scores) terug: de k beste kolommen per bezoeker (V, k), -1
+    # waar er minder kandidaten zijn, en de bijbehorende scores (inf bij -1).
+    current = np.asarray(current, dtype=int)
+    ratings = np.asarray(ratings)
+    columns = np.array([park.index[ride] for ride in rides], dtype=int)
+
+    # Looptijd en verwachte wachttijd hangen alleen af van (locatie, ride):
+    # eerst per unieke locatie uitrekenen, daarna per bezoeker opzoeken
+    locations, visitor_location = np.unique(current, return_inverse=True)
+    walk = park.walk[np.ix_(locations, columns)]
+    reachable = np.isfinite(walk)
+    walk = np.where(reachable, walk, 0).astype(int)
+
+    waits = np.maximum(wait_data.align(rides)[0], 0).astype(int)
+    if forecaster is not None and len(rides):
+        expected = forecaster.predict(
+            list(rides) * len(locations),
+            np.tile(waits, len(locations)),
+            walk.ravel(),
+            now or datetime.now(pytz.utc),
+        ).reshape(walk.shape)
+    else:
+        expected = np.broadcast_to(waits, walk.shape)
+
+    walk, expected, reachable = walk[visitor_location], expected[visitor_location], reachable[visitor_location]
+    ok = (
+        (ratings > 0)
+        & reachable
+        & (expected <= np.asarray(max_wait)[..., None])
+        & (walk <= np.asarray(max_walk)[..., None])
+    )
+    scores = np.where(ok, scoring(expected, walk, ratings), np.inf)
+
+    # Bij gelijke score wint de eerste kolom, net als recommend(): argmin geeft
+    # het eerste minimum, argsort moet stabiel zijn
+    if k == 1:
+        top = scores.argmin(axis=1)[:, None]
+    else:
+        top = np.argsort(scores, axis=1, kind="stable")[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    top[np.isinf(top_scores)] = -1
+    return top, top_scores
@@ -0,0 +1,117 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from walkways import WalkwayGraph
+
+
+# Elk park is één JSON-bestand in deze map; de bestandsnaam is de slug
+PARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parks")
+
+# Zoveel parken tegelijk in het geheugen; de rest wordt opnieuw ingelezen
+PARK_CACHE_SIZE = 16
+
+# Hemelsbrede afstand × omweg / wandeltempo (m/min) geeft de looptijd.
+# Geijkt op de handmatig gemeten tijden van Walibi Holland.
+EARTH_RADIUS = 6_371_000
+DETOUR_FACTOR = 1.5
+WALK_SPEED = 70
+
+
+def walking_matrix(locations, detour=DETOUR_FACTOR, speed=WALK_SPEED):
+    # Looptijden (hele minuten, naar boven afgerond) tussen alle paren in één
+    # keer. `locations` is een (n, 2)-array van lat/lon in graden; rijen met
+    # NaN (geen coördinaten) geven NaN.
+    lat, lon = np.radians(np.asarray(locations, dtype=float)).T
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    meters = 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    minutes = np.ceil(meters * detour / speed)
+    np.fill_diagonal(minutes, 0)
+    return minutes
+
+
+class Park:
+    # Attracties, coördinaten, categorieën en bronnen van één park, plus de
+    # looppaden als graaf. Zonder "walkways" in de parkgegevens wordt elk paar
+    # met coördinaten verbonden via de hemelsbrede looptijd; een walkway
+    # zonder minuten krijgt die ook.
+
+    def __init__(self, slug, data):
+        self.slug = slug
+        self.park_id = data["id"]
+        self.name = data["name"]
+        self.timezone = data.get("timezone", "Europe/Amsterdam")
+        self.wiki_title = data.get("wiki")
+        self.looopings_url = data["sources"].get("looopings")
+        self.queue_times_id = data["sources"].get("queue_times", self.park_id)
+
+        self.rides = [ride["name"] for ride in data["rides"]]
+        self.index = {name: i for i, name in enumerate(self.rides)}
+        self.locations = {
+            ride["name"]: tuple(ride["location"])
+            for ride in data["rides"] if ride.get("location")
+        }
+        self.wiki_titles = {ride["name"]: ride["wiki"] for ride in data["rides"] if ride.get("wiki")}
+
+        self.categories = {}
+        for ride in data["rides"]:
+            for category in ride.get("categories", []):
+                self.categories.setdefault(category, []).append(ride["name"])
+
+        # Attracties eerst, dan kruispunten: de attracties zijn zo het
+        # linkerbovenblok van de afstandsmatrix van de graaf
+        junctions = data.get("nodes", [])
+        nodes = self.rides + [node["name"] for node in junctions]
+        node_locations = dict(self.locations)
+        node_locations.update({node["name"]: tuple(node["location"]) for node in junctions if node.get("location")})
+
+        coords = np.full((len(nodes), 2), np.nan)
+        for i, name in enumerate(nodes):
+            if name in node_locations:
+                coords[i] = node_locations[name]
+        straight = walking_matrix(coords)
+
+        if "walkways" in data:
+            edges = []
+            for walkway in data["walkways"]:
+                a, b = walkway[:2]
+                minutes = walkway[2] if len(walkway) > 2 else straight[nodes.index(a), nodes.index(b)]
+                edges.append((a, b, minutes))
+        else:
+            edges = [
+                (nodes[i], nodes[j], straight[i, j])
+                for i, j in zip(*np.triu_indices(len(nodes), k=1))
+                if not np.isnan(straight[i, j])
+            ]
+        self.graph = WalkwayGraph(nodes, edges)
+
+    @property
+    def walk(self):
+        # Dichte (attracties × attracties)-matrix met kortste looptijden;
+        # inf = geen pad bekend
+        n = len(self.rides)
+        return self.graph.times[:n, :n]
+
+    def rides_in(self, category):
+        return self.categories.get(category, [])
+
+    def walk_time(self, from_ride, to_ride):
+        return self.graph.time(from_ride, to_ride)
+
+    def center(self):
+        return np.mean(list(self.locations.values()), axis=0).tolist()
+
+
+def available_parks():
+    return sorted(name[:-len(".json")] for name in os.listdir(PARKS_DIR) if name.endswith(".json"))
+
+
+@lru_cache(maxsize=PARK_CACHE_SIZE)
+def get_park(slug):
+    # Een park wordt pas ingelezen (en zijn matrix berekend) als erom gevraagd wordt
+    with open(os.path.join(PARKS_DIR, slug + ".json"), encoding="utf-8") as f:
+        return Park(slug, json.load(f))
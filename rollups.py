@@ -0,0 +1,295 @@
+# Voorgeaggregeerde wachttijden voor de geschiedenis-tab: per attractie, per
+# weekdag en per kwartier een histogram van de wachttijd (in minuten
+# waargenomen), plus per kwartier het gemiddelde van de laatste RECENT_DAYS
+# dagen. observe() telt elke nieuwe snapshot er in O(attracties) bij; de
+# grafieken lezen alleen deze arrays, nooit de ruwe metingen. Een seizoen
+# aan data blijft zo een paar MB, hoe lang de app ook draait.
+#
+# Bij de eerste start wordt eenmalig bijgewerkt uit de HistoryStore
+# (catch_up); daarna staat alles met save() op schijf.
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytz
+
+from forecast import BUCKET_MINUTES, BUCKETS_PER_DAY
+from waits import NO_WAIT, OPEN, STATUS_CODES, UNKNOWN
+
+
+log = logging.getLogger(__name__)
+
+# Histogrambakken van WAIT_BIN minuten; de laatste vangt alles vanaf MAX_WAIT
+WAIT_BIN = 5
+MAX_WAIT = 180
+BINS = MAX_WAIT // WAIT_BIN + 1
+
+# Zoveel dagen houden we per kwartier het gemiddelde van die dag bij
+RECENT_DAYS = 14
+
+# Hoe ver catch_up() terugkijkt bij een lege rollup (een seizoen)
+BACKFILL = timedelta(weeks=30)
+
+# Een meting telt voor de minuten tot de volgende, maar nooit langer dan dit:
+# daarna liep er waarschijnlijk geen ingest
+MAX_GAP = timedelta(minutes=15)
+
+# Een kwartier krijgt pas percentielen vanaf zoveel waargenomen minuten
+MIN_MINUTES = 30
+
+# Na zoveel waarnemingen gaan de rollups naar schijf
+SAVE_EVERY = 30
+
+QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+# Tijden rekenen we als lokale minuten sinds deze datum (een donderdag)
+EPOCH = datetime(1970, 1, 1)
+EPOCH_WEEKDAY = 3
+
+
+def bucket_label(bucket):
+    minutes = bucket * BUCKET_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def histogram_quantiles(hist, quantiles=QUANTILES):
+    # Percentielen uit histogrammen langs de laatste as, lineair binnen een
+    # bak. Geeft (len(quantiles), *hist.shape[:-1]) terug; NaN waar minder dan
+    # MIN_MINUTES waargenomen is.
+    cumulative = np.cumsum(hist, axis=-1)
+    total = cumulative[..., -1]
+    result = np.full((len(quantiles), *hist.shape[:-1]), np.nan)
+    enough = total >= MIN_MINUTES
+    if not enough.any():
+        return result
+    cum, counts, tot = cumulative[enough], hist[enough], total[enough]
+    for i, q in enumerate(quantiles):
+        target = q * tot
+        index = np.minimum((cum < target[:, None]).sum(axis=1), BINS - 1)
+        before = np.take_along_axis(cum, index[:, None], axis=1)[:, 0] - np.take_along_axis(counts, index[:, None], axis=1)[:, 0]
+        inside = np.take_along_axis(counts, index[:, None], axis=1)[:, 0]
+        fraction = np.where(inside > 0, (target - before) / np.maximum(inside, 1e-9), 0)
+        result[i][enough] = (index + np.clip(fraction, 0, 1)) * WAIT_BIN
+    return result
+
+
+class WaitRollups:
+    # Thread-safe: observe() komt uit de ingest-thread, de tab leest tegelijk.
+    # `version` gaat bij elke waarneming omhoog (cache-sleutel voor de tab).
+
+    def __init__(self, rides, tz="Europe/Amsterdam", path=None):
+        self.rides = list(rides)
+        self.tz = pytz.timezone(tz) if isinstance(tz, str) else tz
+        self.path = path
+        self.version = 0
+        self.caught_up = False
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._hist = np.zeros((len(self.rides), 7, BUCKETS_PER_DAY, BINS), dtype=np.float32)
+        self._days = {}
+        self._pending = None
+        self.last_at = None
+        if path:
+            self._load()
+
+    # ---- Bijwerken ----
+
+    def _add(self, rows, minutes, waits, weights):
+        # Voegt waarnemingen toe: attractie-rij, lokale tijd in minuten sinds
+        # 1970-01-01 00:00 (naïef), wachttijd en gewicht in minuten
+        days = minutes // 1440
+        weekday = (days + EPOCH_WEEKDAY) % 7
+        bucket = minutes % 1440 // BUCKET_MINUTES
+        bins = np.minimum(waits // WAIT_BIN, BINS - 1).astype(int)
+        np.add.at(self._hist, (rows, weekday, bucket, bins), weights)
+
+        newest = max(int(days.max()), max(self._days, default=0))
+        recent = days > newest - RECENT_DAYS
+        for day in np.unique(days[recent]).tolist():
+            mask = recent & (days == day)
+            sums, observed = self._days.setdefault(day, (
+                np.zeros((len(self.rides), BUCKETS_PER_DAY)), np.zeros((len(self.rides), BUCKETS_PER_DAY)),
+            ))
+            np.add.at(sums, (rows[mask], bucket[mask]), waits[mask] * weights[mask])
+            np.add.at(observed, (rows[mask], bucket[mask]), weights[mask])
+        for day in [d for d in self._days if d <= newest - RECENT_DAYS]:
+            del self._days[day]
+
+    def _local_minute(self, moment):
+        local = moment.astimezone(self.tz).replace(tzinfo=None)
+        return (local - EPOCH) // timedelta(minutes=1)
+
+    def observe(self, attractions, moment):
+        # Eén snapshot (waits.RideWaits) op `moment`. Zoals in de historie
+        # geldt een meting tot de volgende: de vorige snapshot telt mee zodra
+        # deze binnenkomt, voor de minuten ertussen (maximaal MAX_GAP).
+        with self._lock:
+            if self.last_at is not None and moment <= self.last_at:
+                return
+            if self._pending is not None and self.last_at is not None:
+                rows, minutes, waits = self._pending
+                weight = min(moment - self.last_at, MAX_GAP) / timedelta(minutes=1)
+                self._add(rows, minutes, waits, np.full(len(rows), weight))
+
+            wait, status = attractions.align(self.rides)
+            rows = np.flatnonzero((status == OPEN) & (wait != NO_WAIT))
+            self._pending = (
+                rows, np.full(len(rows), self._local_minute(moment), dtype=np.int64), wait[rows].astype(float),
+            ) if len(rows) else None
+            self.last_at = moment
+            self.version += 1
+            self._unsaved += 1
+        if self.path and self._unsaved >= SAVE_EVERY:
+            self.save()
+
+    def catch_up(self, history, park_id, now):
+        # Telt de geschiedenis sinds last_at (of de laatste BACKFILL) mee
+        # zoals observe() dat live had gedaan: per poll de stand van elke
+        # attractie, met als gewicht de tijd tot de volgende poll (maximaal
+        # MAX_GAP). De historie slaat alleen wijzigingen op; de polls zelf
+        # komen uit de hartslagrijen (history.POLL_SOURCE). Historie van vóór
+        # de hartslag heeft alleen de momenten waarop iets veranderde.
+        #
+        # De laatste poll blijft, net als bij observe(), staan tot de
+        # volgende binnenkomt. Ook de poll op last_at telt mee: die stond bij
+        # het bewaren nog open en is met de herstart verloren gegaan.
+        import pandas as pd
+        import pyarrow as pa
+
+        from history import POLL_SOURCE
+
+        start = self.last_at or now - BACKFILL
+        # Een dag extra terug voor de stand op `start`
+        table = history.read(park_id, source="looopings", start=start - timedelta(days=1), end=now)
+        beats = history.read(park_id, source=POLL_SOURCE, start=start, end=now)
+        millis = timedelta(milliseconds=1)
+        added = 0.0
+
+        times = table.sort_by("timestamp")["timestamp"].cast(pa.int64()).to_numpy() if table.num_rows else np.empty(0, np.int64)
+        polls = np.unique(np.concatenate([times, beats["timestamp"].cast(pa.int64()).to_numpy()]))
+        polls = polls[(polls >= int(start.timestamp() * 1000)) & (polls < int(now.timestamp() * 1000))]
+
+        if len(polls) and table.num_rows:
+            table = table.sort_by("timestamp")
+            index = {ride: i for i, ride in enumerate(self.rides)}
+            ride_rows = np.array([index.get(ride, -1) for ride in table["ride"].to_pylist()])
+            waits = table["wait"].fill_null(NO_WAIT).to_numpy()
+            statuses = np.array([STATUS_CODES.get(s, UNKNOWN) for s in table["status"].to_pylist()])
+
+            weights = np.minimum(np.diff(polls), MAX_GAP / millis) / (timedelta(minutes=1) / millis)
+            # Lokale minuten één keer voor alle polls, niet per attractie
+            local = (pd.DatetimeIndex(polls.astype("datetime64[ms]")).tz_localize("UTC")
+                     .tz_convert(self.tz.zone).tz_localize(None))
+            poll_minutes = local.as_unit("ms").asi8 // 60_000
+
+            rows, columns, sampled = [], [], []
+            for r in range(len(self.rides)):
+                mine = np.flatnonzero(ride_rows == r)
+                if not len(mine):
+                    continue
+                last = np.searchsorted(times[mine], polls, side="right") - 1
+                known = np.flatnonzero(last >= 0)
+                picked = mine[last[known]]
+                ok = (statuses[picked] == OPEN) & (waits[picked] != NO_WAIT)
+                rows.append(np.full(ok.sum(), r))
+                columns.append(known[ok])
+                sampled.append(waits[picked[ok]].astype(float))
+
+            rows, columns, sampled = np.concatenate(rows), np.concatenate(columns), np.concatenate(sampled)
+            counted = columns < len(polls) - 1
+            pending = ~counted
+            added = float(weights[columns[counted]].sum())
+            with self._lock:
+                if counted.any():
+                    self._add(rows[counted], poll_minutes[columns[counted]], sampled[counted], weights[columns[counted]])
+                self._pending = (rows[pending], poll_minutes[columns[pending]], sampled[pending]) if pending.any() else None
+                self.last_at = datetime.fromtimestamp(polls[-1] / 1000, timezone.utc)
+        elif len(polls):
+            with self._lock:
+                self._pending = None
+                self.last_at = datetime.fromtimestamp(polls[-1] / 1000, timezone.utc)
+
+        with self._lock:
+            self.caught_up = True
+            self.version += 1
+        if self.path:
+            self.save()
+        return added
+
+    # ---- Lezen ----
+
+    def profile(self, weekday=None):
+        # Percentielen (QUANTILES × attracties × kwartieren) voor één weekdag
+        # (0 = maandag) of, met None, over alle dagen samen
+        with self._lock:
+            hist = self._hist.sum(axis=1) if weekday is None else self._hist[:, weekday].copy()
+        return histogram_quantiles(hist)
+
+    def day_curve(self, day):
+        # Gemiddelde wachttijd per attractie en kwartier op datum `day`
+        # (lokaal); NaN zonder data
+        with self._lock:
+            sums, observed = self._days.get((day - EPOCH.date()).days, (None, None))
+            if sums is None:
+                return np.full((len(self.rides), BUCKETS_PER_DAY), np.nan)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(observed > 0, sums / observed, np.nan)
+
+    def observed_minutes(self, weekday=None):
+        # Waargenomen minuten per attractie, als maat voor hoeveel data er is
+        with self._lock:
+            hist = self._hist if weekday is None else self._hist[:, weekday]
+            return hist.reshape(len(self.rides), -1).sum(axis=1)
+
+    # ---- Opslag ----
+
+    def save(self):
+        with self._lock:
+            days = sorted(self._days)
+            shape = (len(days), len(self.rides), BUCKETS_PER_DAY)
+            arrays = {
+                "rides": np.array(self.rides),
+                "hist": self._hist.copy(),
+                "days": np.array(days, dtype=np.int64),
+                "day_sums": np.array([self._days[d][0] for d in days]).reshape(shape),
+                "day_minutes": np.array([self._days[d][1] for d in days]).reshape(shape),
+                "last_at": np.array([self.last_at.timestamp() if self.last_at else np.nan]),
+            }
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with np.load(self.path) as saved:
+                rides = saved["rides"].tolist()
+                hist = saved["hist"]
+                days = saved["days"].tolist()
+                day_sums, day_minutes = saved["day_sums"], saved["day_minutes"]
+                last_at = float(saved["last_at"][0])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError):
+            log.warning("rollups %s onleesbaar, opnieuw opbouwen", self.path, exc_info=True)
+            return
+        if hist.shape[1:] != self._hist.shape[1:]:
+            log.warning("rollups %s hebben een andere indeling, opnieuw opbouwen", self.path)
+            return
+
+        # Attracties op naam overnemen: het park kan er inmiddels bij of af hebben
+        columns = [(new, rides.index(ride)) for new, ride in enumerate(self.rides) if ride in rides]
+        for new, old in columns:
+            self._hist[new] = hist[old]
+        for day, sums, observed in zip(days, day_sums, day_minutes):
+            self._days[day] = (np.zeros((len(self.rides), BUCKETS_PER_DAY)), np.zeros((len(self.rides), BUCKETS_PER_DAY)))
+            for new, old in columns:
+                self._days[day][0][new] = sums[old]
+                self._days[day][1][new] = observed[old]
+        if not np.isnan(last_at):
+            self.last_at = datetime.fromtimestamp(last_at, timezone.utc)
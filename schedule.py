@@ -0,0 +1,105 @@
+# Openingstijden per datum, één keer geparst. De ingest publiceert de tekst
+# van looopings.nl ("10:00 - 18:00"); ParkCalendar zet die per dag om naar
+# tijdzonebewuste open- en sluitmomenten, zodat "is het park open", "hoe lang
+# nog" en het planningsvenster daarna alleen nog rekenen met datetimes zijn.
+# Sluit het park na middernacht, dan hoort de nacht nog bij de dag ervoor.
+
+from datetime import datetime, timedelta
+
+import pytz
+
+
+# Zoveel dagen bewaart een kalender
+CALENDAR_DAYS = 14
+
+
+def parse_hours(text):
+    # "HH:MM - HH:MM" -> (open, dicht) als datetime.time, of None
+    try:
+        open_str, close_str = text.split(" - ")
+        return (
+            datetime.strptime(open_str.strip(), "%H:%M").time(),
+            datetime.strptime(close_str.strip(), "%H:%M").time(),
+        )
+    except (AttributeError, ValueError):
+        return None
+
+
+def _minutes(delta):
+    return max(0, int(delta.total_seconds() // 60))
+
+
+class ParkDay:
+    # Eén dag: de tekst zoals gepubliceerd en de open- en sluitmomenten
+    __slots__ = ("date", "hours", "opens", "closes")
+
+    def __init__(self, date, hours, opens, closes):
+        self.date = date
+        self.hours = hours
+        self.opens = opens
+        self.closes = closes
+
+    @classmethod
+    def from_hours(cls, date, hours, tz):
+        parsed = parse_hours(hours)
+        if parsed is None:
+            return None
+        open_time, close_time = parsed
+        close_date = date + timedelta(days=1) if close_time <= open_time else date
+        return cls(
+            date,
+            hours,
+            tz.localize(datetime.combine(date, open_time)),
+            tz.localize(datetime.combine(close_date, close_time)),
+        )
+
+    def is_open(self, now):
+        return self.opens <= now < self.closes
+
+    def minutes_until_open(self, now):
+        return _minutes(self.opens - now)
+
+    def minutes_until_close(self, now):
+        return _minutes(self.closes - now)
+
+    def planning_window(self, now):
+        # (starttijd, minuten tot sluiting) voor de planner; voor opening
+        # begint de planning bij openingstijd
+        start = max(now, self.opens)
+        return start, _minutes(self.closes - start)
+
+
+class ParkCalendar:
+    # Thread-safe zonder lock: update() (alleen de ingest) vervangt de hele
+    # dict, lezers zien de oude of de nieuwe.
+
+    def __init__(self, tz="Europe/Amsterdam", keep_days=CALENDAR_DAYS):
+        self.tz = pytz.timezone(tz) if isinstance(tz, str) else tz
+        self.keep_days = keep_days
+        self._days = {}
+
+    def update(self, hours, moment):
+        # `hours` zoals gepubliceerd op `moment`; parsen alleen als de tekst
+        # voor die datum veranderd is
+        date = moment.astimezone(self.tz).date()
+        current = self._days.get(date)
+        if current is not None and current.hours == hours:
+            return current
+
+        day = ParkDay.from_hours(date, hours, self.tz)
+        days = {d: v for d, v in self._days.items() if d != date and (date - d).days < self.keep_days}
+        if day is not None:
+            days[date] = day
+        self._days = days
+        return day
+
+    def day(self, now):
+        # De parkdag waar `now` bij hoort, of None als die onbekend is
+        local = now.astimezone(self.tz)
+        previous = self._days.get(local.date() - timedelta(days=1))
+        if previous is not None and local < previous.closes:
+            return previous
+        return self._days.get(local.date())
+
+    def now(self):
+        return datetime.now(self.tz)
@@ -0,0 +1,213 @@
+import re
+from html.parser import HTMLParser
+
+import client
+from timing import timed
+from waits import RideWaits
+
+
+LOOOPINGS_URL = "https://www.looopings.nl/wachten/walibiholland"
+QUEUE_TIMES_URL = "https://queue-times.com/parks/{park_id}/queue_times.json"
+WIKIPEDIA_URL = "https://nl.wikipedia.org/wiki/{title}"
+
+
+def parse_wait_times(soup):
+    attractions = {}
+
+    for row in soup.select("tr"):
+        cols = row.find_all("td")
+        if len(cols) >= 3:
+            name = cols[0].text.strip()
+            wait_td = cols[1]
+            status_td = cols[2]  # <-- hier de fix
+
+            status_class = status_td.get("class", [])
+
+            if "state_1" in status_class:
+                # Attractie is open – probeer wachttijd te extraheren
+                match = re.search(r"(\d+)", wait_td.text.strip())
+                wait_time = int(match.group(1)) if match else 0
+                attractions[name] = {"wait": wait_time, "status": "open"}
+            elif "state_2" in status_class:
+                attractions[name] = {"wait": None, "status": "closed"}
+            elif "state_3" in status_class:
+                attractions[name] = {"wait": None, "status": "breakdown"}
+            elif "state_4" in status_class:
+                attractions[name] = {"wait": None, "status": "maintenance"}
+            else:
+                attractions[name] = {"wait": None, "status": "unknown"}
+
+    return attractions
+
+
+def parse_opening_hours(soup):
+    text_blocks = soup.find_all(text=True)
+    for text in text_blocks:
+        if "Open:" in text:
+            cleaned = text.replace("Open:", "").replace("\xa0", " ").strip()
+            return cleaned
+    return None
+
+
+STATUS_BY_CLASS = {
+    "state_1": "open",
+    "state_2": "closed",
+    "state_3": "breakdown",
+    "state_4": "maintenance",
+}
+
+
+class _ParkPageParser(HTMLParser):
+    # Streaming variant van parse_wait_times + parse_opening_hours: in één pass
+    # over de tokens worden alleen de tabelcellen en de "Open:"-tekst bewaard,
+    # zonder een volledige BeautifulSoup-boom op te bouwen.
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.opening_hours = None
+        self._open_rows = []
+        self._open_cells = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            row = []
+            self.rows.append(row)
+            self._open_rows.append(row)
+        elif tag == "td" and self._open_rows:
+            classes = []
+            for key, value in attrs:
+                if key == "class" and value:
+                    classes = value.split()
+            cell = (classes, [])
+            for row in self._open_rows:
+                row.append(cell)
+            self._open_cells.append(cell)
+        elif tag in ("script", "style"):
+            # .text van een cel slaat script/style over, net als bs4
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self._open_cells:
+            self._open_cells.pop()
+        elif tag == "tr" and self._open_rows:
+            row = self._open_rows.pop()
+            self._open_cells = [c for c in self._open_cells if c not in row]
+        elif tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_comment(self, data):
+        # find_all(text=True) in parse_opening_hours ziet ook commentaar
+        self._check_opening_hours(data)
+
+    def handle_data(self, data):
+        self._check_opening_hours(data)
+        if not self._skip:
+            for _, parts in self._open_cells:
+                parts.append(data)
+
+    def _check_opening_hours(self, data):
+        if self.opening_hours is None and "Open:" in data:
+            self.opening_hours = data.replace("Open:", "").replace("\xa0", " ").strip()
+
+    def attractions(self):
+        records = []
+        for row in self.rows:
+            if len(row) < 3:
+                continue
+            name = "".join(row[0][1]).strip()
+            status = "unknown"
+            for cls, label in STATUS_BY_CLASS.items():
+                if cls in row[2][0]:
+                    status = label
+                    break
+
+            wait_time = None
+            if status == "open":
+                match = re.search(r"(\d+)", "".join(row[1][1]))
+                wait_time = int(match.group(1)) if match else 0
+            records.append((name, wait_time, status))
+        return RideWaits.from_records(records)
+
+
+@timed("parse.looopings")
+def extract_park_page(html):
+    parser = _ParkPageParser()
+    parser.feed(html)
+    parser.close()
+    return {
+        "attractions": parser.attractions(),
+        "opening_hours": parser.opening_hours,
+    }
+
+
+def fetch_looopings(url=LOOOPINGS_URL):
+    response = client.get("looopings", url)
+    response.raise_for_status()
+    return extract_park_page(response.text)
+
+
+def fetch_queue_times(park_id=53):
+    url = QUEUE_TIMES_URL.format(park_id=park_id)
+    resp = client.get("queue_times", url)
+    resp.raise_for_status()
+    data = resp.json()
+
+    records = []
+    for land in data.get("lands", []):
+        for ride in land.get("rides", []):
+            records.append({
+                "ride": ride.get("name"),
+                "wait_time": ride.get("wait_time"),
+                "is_open": ride.get("is_open")
+            })
+    return records
+
+
+class WikipediaError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@timed("parse.wikipedia")
+def parse_wikipedia_paragraphs(html):
+    # bs4 alleen voor Wikipedia; de looopings-pagina gaat door _ParkPageParser
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    content = soup.find("div", {"id": "mw-content-text"})
+    if not content:
+        return []
+
+    clean_paragraphs = []
+    for p in content.find_all("p"):
+        text = p.get_text().strip()
+        text = re.sub(r'\[\d+\]', '', text)
+        text = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', text)
+
+        if len(text) > 50:
+            clean_paragraphs.append(text)
+    return clean_paragraphs
+
+
+def fetch_wikipedia(title, etag=None, last_modified=None):
+    # Conditionele GET: geeft None terug als de pagina niet veranderd is (304)
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = client.get("wikipedia", WIKIPEDIA_URL.format(title=title), headers=headers)
+    if response.status_code == 304:
+        return None
+    if response.status_code != 200:
+        raise WikipediaError(response.status_code)
+
+    return {
+        "paragraphs": parse_wikipedia_paragraphs(response.text),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
@@ -0,0 +1,317 @@
+# Simuleert een parkdag met duizenden bezoekers om de aanbevelingslogica te
+# beoordelen: elke bezoeker kiest steeds de attractie die recommend_batch()
+# aanwijst (met een preset als voorkeuren), loopt erheen, staat in de rij met
+# de wachttijd die er bij aankomst echt was, en herhaalt dat tot sluitingstijd.
+# De dag komt uit de opgebouwde geschiedenis (HistoryStore) of is synthetisch.
+#
+# Een sweep (strategie × preset × grenzen) wordt in stukken van CHUNK_VISITORS
+# bezoekers over een procespool verdeeld; elk stuk heeft een eigen seed, dus
+# de uitkomst hangt niet af van het aantal processen.
+#
+#   python simulate.py [--day synthetic|JJJJ-MM-DD] [--visitors N] [--workers N]
+#                      [--presets a,b] [--strategies a,b] [--max-wait 30,45] [--max-walk 10]
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from datetime import time as day_time
+from itertools import product
+
+import numpy as np
+import pytz
+
+from planner import RIDE_DURATION
+from recommend import PRESETS, preset_ratings, recommend_batch, score
+from registry import get_park
+from waits import BREAKDOWN, NO_WAIT, OPEN, STATUS_CODES, UNKNOWN, RideWaits
+
+
+# Resolutie van een gesimuleerde dag (minuten per rij)
+STEP_MINUTES = 5
+
+# Bezoekers komen binnen zoveel minuten na opening binnen
+ARRIVAL_SPREAD = 120
+
+# Zonder passende attractie wacht een bezoeker zo lang en kiest dan opnieuw
+IDLE_MINUTES = 5
+
+# Bezoekers per taak in de procespool
+CHUNK_VISITORS = 500
+
+# Synthetische dag: kans per rij dat een attractie in storing gaat, en hoe lang
+BREAKDOWN_RATE = 0.004
+BREAKDOWN_STEPS = 6
+
+
+# Alternatieven voor score(); laagste wint, net als in recommend_batch()
+STRATEGIES = {
+    "score": score,
+    "shortest_time": lambda wait, walk, rating: wait + walk,
+    "nearest": lambda wait, walk, rating: walk + 0 * wait,
+    "favourite": lambda wait, walk, rating: (wait + walk) / 1000 - rating,
+    "per_minute": lambda wait, walk, rating: -rating / (wait + walk + RIDE_DURATION),
+}
+
+
+class DayTimeline:
+    # Eén parkdag als raster: per `step` minuten (vanaf minuut `start` van de
+    # lokale dag) de wachttijd (NO_WAIT als onbekend) en statuscode van elke
+    # attractie in `rides`. Bezoekers komen tussen `opens` en `closes`.
+
+    def __init__(self, rides, start, wait, status, step=STEP_MINUTES, opens=None, closes=None):
+        self.rides = tuple(rides)
+        self.start = start
+        self.step = step
+        self.wait = np.asarray(wait, dtype=np.int16)
+        self.status = np.asarray(status, dtype=np.uint8)
+        self.opens = start if opens is None else opens
+        self.closes = start + len(self.wait) * step if closes is None else closes
+        self._snapshots = {}
+
+    def __getstate__(self):
+        # De RideWaits-cache gaat niet mee naar de processen in de pool
+        state = dict(self.__dict__)
+        state["_snapshots"] = {}
+        return state
+
+    def row_at(self, minutes):
+        rows = (np.asarray(minutes) - self.start) // self.step
+        return np.clip(rows, 0, len(self.wait) - 1).astype(int)
+
+    def snapshot(self, row):
+        waits = self._snapshots.get(row)
+        if waits is None:
+            waits = self._snapshots[row] = RideWaits(self.rides, self.wait[row], self.status[row])
+        return waits
+
+
+def synthetic_day(park, opens=10 * 60, closes=18 * 60, step=STEP_MINUTES, seed=0):
+    # Rustig bij opening, piek in de vroege middag, leeg naar sluiting; de
+    # piekwachttijd hangt af van de categorie, met ruis en af en toe een storing
+    rng = np.random.default_rng(seed)
+    thrill = np.isin(park.rides, park.rides_in("thrill"))
+    coaster = np.isin(park.rides, park.rides_in("roller_coaster"))
+    peak = np.where(
+        thrill, rng.integers(30, 65, len(park.rides)),
+        np.where(coaster, rng.integers(20, 45, len(park.rides)), rng.integers(5, 25, len(park.rides))),
+    )
+
+    minutes = np.arange(opens, closes, step)
+    phase = (minutes - opens) / (closes - opens)
+    crowd = 0.3 + 0.9 * np.sin(np.pi * np.clip(phase * 1.15, 0, 1))
+    wait = np.clip(np.round(peak * crowd[:, None] + rng.normal(0, 3, (len(minutes), len(park.rides)))), 0, None)
+
+    status = np.full(wait.shape, OPEN)
+    for row, ride in zip(*np.nonzero(rng.random(wait.shape) < BREAKDOWN_RATE)):
+        status[row:row + BREAKDOWN_STEPS, ride] = BREAKDOWN
+    wait[status != OPEN] = NO_WAIT
+    return DayTimeline(park.rides, opens, wait, status, step)
+
+
+def recorded_day(store, park, day, step=STEP_MINUTES):
+    # Een dag uit de geschiedenis (looopings.nl). Rijen zijn wijzigingen, dus
+    # de dag ervoor wordt meegelezen voor de stand bij middernacht. Open en
+    # dicht: de eerste en laatste rij waarin een attractie open was, en niet
+    # na de laatste meting (daarna weten we niets meer).
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    tz = pytz.timezone(park.timezone)
+    midnight = tz.localize(datetime.combine(day, day_time()))
+    table = store.read(park.park_id, source="looopings", start=midnight - timedelta(days=1),
+                       end=midnight + timedelta(days=1))
+    table = table.sort_by("timestamp")
+
+    times = table["timestamp"].cast(pa.int64()).to_numpy()
+    columns = np.array([park.index.get(ride, -1) for ride in table["ride"].to_pylist()], dtype=int)
+    waits = pc.fill_null(table["wait"], NO_WAIT).to_numpy()
+    statuses = np.array([STATUS_CODES.get(s, UNKNOWN) for s in table["status"].to_pylist()], dtype=np.uint8)
+
+    grid = int(midnight.timestamp() * 1000) + np.arange(0, 24 * 60, step) * 60_000
+    wait = np.full((len(grid), len(park.rides)), NO_WAIT, dtype=np.int16)
+    status = np.full((len(grid), len(park.rides)), UNKNOWN, dtype=np.uint8)
+    for ride, column in park.index.items():
+        rows = np.flatnonzero(columns == column)
+        if not len(rows):
+            continue
+        last = np.searchsorted(times[rows], grid, side="right") - 1
+        known = last >= 0
+        wait[known, column] = waits[rows[last[known]]]
+        status[known, column] = statuses[rows[last[known]]]
+
+    last_reading = np.searchsorted(grid, times[-1], side="right") if len(times) else 0
+    open_rows = np.flatnonzero((status[:last_reading] == OPEN).any(axis=1))
+    if not len(open_rows):
+        raise ValueError(f"geen open attracties in de geschiedenis op {day}")
+    return DayTimeline(park.rides, 0, wait, status, step,
+                       opens=int(open_rows[0]) * step, closes=int(open_rows[-1] + 1) * step)
+
+
+def simulate(park, timeline, preset, strategy, max_wait, max_walk, visitors, seed):
+    # Geeft per bezoeker de ritten, voorkeurspunten, minuten in de rij, lopend
+    # en wachtend zonder keuze, en hoe vaak een attractie bij aankomst dicht was
+    rng = np.random.default_rng(seed)
+    scoring = STRATEGIES[strategy]
+    walk = park.walk
+
+    # Voorkeuren zoals een bezoeker ze bij binnenkomst met de preset kiest
+    first = timeline.snapshot(int(timeline.row_at(timeline.opens)))
+    base = np.array([preset_ratings(preset, park, first, park.rides)[ride] for ride in park.rides])
+
+    starts = np.array([park.index[ride] for ride in park.locations])
+    location = rng.choice(starts, visitors)
+    clock = timeline.opens + rng.integers(0, ARRIVAL_SPREAD, visitors)
+    visited = np.zeros((visitors, len(park.rides)), dtype=bool)
+    stats = {name: np.zeros(visitors) for name in ("rides", "value", "queue", "walk", "idle", "missed")}
+
+    while True:
+        active = np.flatnonzero(clock < timeline.closes)
+        if not len(active):
+            break
+        rows = timeline.row_at(clock[active])
+        for row in np.unique(rows):
+            group = active[rows == row]
+            # Net als in de app: alleen open attracties, en (tot alles gedaan is) geen herhalingen
+            ratings = np.where(visited[group] | (timeline.status[row] != OPEN), 0, base)
+            top, _ = recommend_batch(park, timeline.snapshot(row), park.rides, location[group], ratings,
+                                     max_wait, max_walk, k=1, scoring=scoring)
+            choice = top[:, 0]
+
+            stuck = group[choice < 0]
+            clock[stuck] += IDLE_MINUTES
+            stats["idle"][stuck] += IDLE_MINUTES
+            visited[stuck] = False
+
+            going, target = group[choice >= 0], choice[choice >= 0]
+            legs = walk[location[going], target]
+            arrival = clock[going] + legs
+            at = timeline.row_at(arrival)
+            rides = (timeline.status[at, target] == OPEN) & (arrival < timeline.closes)
+            queue = np.where(rides, np.maximum(timeline.wait[at, target], 0), 0)
+
+            location[going] = target
+            visited[going[rides], target[rides]] = True
+            clock[going] = arrival + np.where(rides, queue + RIDE_DURATION, 0)
+            stats["walk"][going] += legs
+            stats["queue"][going] += queue
+            stats["rides"][going] += rides
+            stats["value"][going] += np.where(rides, base[target], 0)
+            stats["missed"][going] += ~rides & (arrival < timeline.closes)
+    return stats
+
+
+def summarize(stats):
+    rides = stats["rides"]
+    total_rides = rides.sum()
+    return {
+        "visitors": len(rides),
+        "rides": round(float(rides.mean()), 2),
+        "rides_p10": float(np.percentile(rides, 10)),
+        "rides_p90": float(np.percentile(rides, 90)),
+        "value": round(float(stats["value"].mean()), 1),
+        "queue_min": round(float(stats["queue"].mean()), 1),
+        "walk_min": round(float(stats["walk"].mean()), 1),
+        "idle_min": round(float(stats["idle"].mean()), 1),
+        "missed": round(float(stats["missed"].mean()), 2),
+        "queue_per_ride": round(float(stats["queue"].sum() / total_rides), 1) if total_rides else None,
+    }
+
+
+# ---- Procespool ----
+
+_worker = {}
+
+
+def _init_worker(slug, timeline):
+    _worker["park"] = get_park(slug)
+    _worker["timeline"] = timeline
+
+
+def _run_chunk(task):
+    return simulate(_worker["park"], _worker["timeline"], **task)
+
+
+def sweep(slug, timeline, configs, visitors, workers=None, seed=0):
+    # `configs`: dicts met preset, strategy, max_wait en max_walk. Geeft per
+    # config de samenvatting (plus de config zelf) terug, in dezelfde volgorde.
+    chunks = [min(CHUNK_VISITORS, visitors - i) for i in range(0, visitors, CHUNK_VISITORS)]
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(configs) * len(chunks)))
+    tasks = [dict(config, visitors=size, seed=next(seeds)) for config in configs for size in chunks]
+
+    if workers == 1:
+        _init_worker(slug, timeline)
+        results = [_run_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(slug, timeline)) as pool:
+            results = list(pool.map(_run_chunk, tasks))
+
+    rows = []
+    for i, config in enumerate(configs):
+        parts = results[i * len(chunks):(i + 1) * len(chunks)]
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        rows.append(dict(config, **summarize(merged)))
+    return rows
+
+
+def _list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--park", default=os.environ.get("WALIBI_PARK", "walibi_holland"))
+    parser.add_argument("--day", default="synthetic", help="'synthetic' of een datum (JJJJ-MM-DD) uit de geschiedenis")
+    parser.add_argument("--history-dir", default=os.environ.get("WALIBI_HISTORY_DIR", "data/history"))
+    parser.add_argument("--visitors", type=int, default=2000, help="per combinatie")
+    parser.add_argument("--presets", default=",".join(PRESETS))
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--max-wait", default="45")
+    parser.add_argument("--max-walk", default="10")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="resultaten ook als JSON-regels naar dit bestand")
+    args = parser.parse_args()
+
+    park = get_park(args.park)
+    if args.day == "synthetic":
+        timeline = synthetic_day(park, seed=args.seed)
+    else:
+        from history import HistoryStore
+
+        timeline = recorded_day(HistoryStore(args.history_dir), park, date.fromisoformat(args.day))
+
+    strategies = _list(args.strategies)
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        sys.exit(f"onbekende strategie: {', '.join(unknown)} (kies uit {', '.join(STRATEGIES)})")
+
+    configs = [
+        {"preset": preset, "strategy": strategy, "max_wait": max_wait, "max_walk": max_walk}
+        for preset, strategy, max_wait, max_walk in product(
+            _list(args.presets), strategies, _list(args.max_wait, int), _list(args.max_walk, int),
+        )
+    ]
+    started = time.perf_counter()
+    rows = sweep(park.slug, timeline, configs, args.visitors, args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'preset':<16} {'strategie':<14} {'wacht':>5} {'loop':>4} {'ritten':>7} {'p10-p90':>8} "
+          f"{'punten':>7} {'rij':>6} {'lopen':>6} {'niets':>6} {'dicht':>6}")
+    for row in rows:
+        print(f"{row['preset']:<16} {row['strategy']:<14} {row['max_wait']:>5} {row['max_walk']:>4} "
+              f"{row['rides']:>7.2f} {row['rides_p10']:>3.0f}-{row['rides_p90']:<4.0f} {row['value']:>7.1f} "
+              f"{row['queue_min']:>6.1f} {row['walk_min']:>6.1f} {row['idle_min']:>6.1f} {row['missed']:>6.2f}")
+    total = len(configs) * args.visitors
+    print(f"\n{total} bezoekersdagen in {elapsed:.1f} s ({total / elapsed:.0f}/s, {args.workers} processen)")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows)
+
+
+if __name__ == "__main__":
+    main()
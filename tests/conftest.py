@@ -0,0 +1,19 @@
+# De modules staan los in de root van de repo (geen package): maak ze
+# importeerbaar voor de tests, net als de benchmarks doen.
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def park_page_html():
+    # De opgenomen looopings.nl-pagina van Walibi Holland
+    with open(os.path.join(FIXTURES, "looopings_walibiholland.html"), encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,54 @@
+# Een poll schrijft alleen wat hij zelf opgehaald heeft naar de historie:
+# na een herstart staat de bewaarde snapshot in de store, en als een bron
+# dan faalt mag die oude stand niet met de tijd van nu opgeslagen worden.
+
+from datetime import datetime, timezone
+
+import pytest
+
+import ingest
+from history import POLL_SOURCE, HistoryStore
+from ingest import IngestWorker, SnapshotStore
+from scraper import extract_park_page
+
+
+QUEUE_TIMES = [{"ride": "Goliath", "wait_time": 20, "is_open": True}]
+
+
+@pytest.fixture
+def restarted(tmp_path, park_page_html):
+    # Store met een bewaarde snapshot van de vorige run
+    page = extract_park_page(park_page_html)
+    path = str(tmp_path / "snapshot.json")
+    previous = SnapshotStore(path)
+    previous.publish(dict(previous.latest(), **page, queue_times=QUEUE_TIMES, fetched_at=datetime.now(timezone.utc)))
+    previous.save()
+    return SnapshotStore(path), HistoryStore(str(tmp_path / "history")), page
+
+
+def poll(monkeypatch, store, history, looopings, queue_times):
+    def fetch_all(calls):
+        return {"looopings": looopings, "queue_times": queue_times}
+
+    monkeypatch.setattr(ingest, "fetch_all", fetch_all)
+    IngestWorker(store, park_id=1, history=history).poll_once()
+    return {
+        source: history.read(1, source=source).num_rows
+        for source in ("looopings", "queue_times", POLL_SOURCE)
+    }
+
+
+def test_failed_poll_writes_nothing(monkeypatch, restarted):
+    store, history, _ = restarted
+    assert len(store.latest()["attractions"])
+    rows = poll(monkeypatch, store, history, (None, OSError("down")), (None, OSError("down")))
+    assert rows == {"looopings": 0, "queue_times": 0, POLL_SOURCE: 0}
+
+
+def test_only_fresh_sources_are_written(monkeypatch, restarted):
+    store, history, page = restarted
+    rows = poll(monkeypatch, store, history, (page, None), (None, OSError("down")))
+    assert rows == {"looopings": len(page["attractions"]), "queue_times": 0, POLL_SOURCE: 1}
+
+    rows = poll(monkeypatch, store, history, (None, OSError("down")), (QUEUE_TIMES, None))
+    assert rows == {"looopings": len(page["attractions"]), "queue_times": 1, POLL_SOURCE: 1}
@@ -0,0 +1,90 @@
+# recommend_batch() moet per bezoeker precies hetzelfde geven als de lus in
+# recommend(): dezelfde top-k, dezelfde scores en bij gelijke score dezelfde
+# winnaar. Op de opgenomen looopings.nl-pagina, met en zonder voorspeller.
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import pytz
+
+from forecast import WaitForecaster
+from recommend import get_open_rides, recommend, recommend_batch
+from registry import get_park
+from scraper import extract_park_page
+from waits import NO_WAIT, OPEN, RideWaits
+
+
+NOW = datetime(2026, 7, 4, 12, 0, tzinfo=pytz.utc)
+
+
+@pytest.fixture(scope="module")
+def park():
+    return get_park("walibi_holland")
+
+
+@pytest.fixture(scope="module")
+def snapshot(park_page_html):
+    return extract_park_page(park_page_html)
+
+
+def trending_forecaster(snapshot):
+    # Twee metingen 20 minuten uit elkaar, alle wachttijden 7 minuten gestegen
+    forecaster = WaitForecaster()
+    waits = snapshot["attractions"]
+    later = {"attractions": RideWaits(waits.names, np.where(waits.wait != NO_WAIT, waits.wait + 7, NO_WAIT), waits.status)}
+    forecaster.observe(snapshot, NOW - timedelta(minutes=20))
+    forecaster.observe(later, NOW)
+    return forecaster
+
+
+def assert_batch_matches_loop(park, wait_data, rides, current, ratings, max_wait, max_walk, forecaster, k):
+    top, scores = recommend_batch(park, wait_data, rides, current, ratings, max_wait, max_walk, forecaster, NOW, k=k)
+    assert top.shape == scores.shape == (len(current), k)
+
+    # Zoals de API: de lus krijgt alleen de open attracties, de batch alle
+    # kolommen met voorkeur 0 voor wat dicht is
+    is_open = wait_data.align(rides)[1] == OPEN
+    for v in range(len(current)):
+        expected = recommend(
+            park, wait_data, park.rides[current[v]],
+            {ride: rating for ride, rating, open_ in zip(rides, ratings[v].tolist(), is_open) if open_},
+            max_wait[v], max_walk[v], forecaster, NOW,
+        )[:k]
+        actual = [(rides[i], s) for i, s in zip(top[v].tolist(), scores[v].tolist()) if i >= 0]
+        assert actual == [(c["ride"], c["score"]) for c in expected], f"bezoeker {v}"
+
+
+@pytest.mark.parametrize("trend", [False, True])
+@pytest.mark.parametrize("k", [1, 3])
+def test_batch_matches_loop(park, snapshot, trend, k):
+    wait_data = snapshot["attractions"]
+    rides = sorted(park.rides)
+    assert len(get_open_rides(park, wait_data)) < len(rides), "fixture hoort gesloten attracties te hebben"
+    forecaster = trending_forecaster(snapshot) if trend else None
+
+    rng = np.random.default_rng(k + 10 * trend)
+    count = 500
+    current = rng.integers(0, len(park.rides), count)
+    ratings = rng.integers(0, 11, (count, len(rides)))
+    ratings[:, wait_data.align(rides)[1] != OPEN] = 0
+    max_wait = rng.integers(0, 60, count)
+    max_walk = rng.integers(0, 15, count)
+    assert_batch_matches_loop(park, wait_data, rides, current, ratings, max_wait, max_walk, forecaster, k)
+
+
+@pytest.mark.parametrize("k", [1, 3])
+def test_ties_go_to_the_first_column(park, snapshot, k):
+    # Alles dezelfde voorkeur en ruime grenzen: veel gelijke scores
+    wait_data = snapshot["attractions"]
+    rides = sorted(get_open_rides(park, wait_data))
+    count = len(park.rides)
+    current = np.arange(count)
+    ratings = np.full((count, len(rides)), 5)
+    limits = np.full(count, 1000)
+
+    _, scores = recommend_batch(park, wait_data, rides, current, ratings, limits, limits, k=len(rides))
+    finite = [[s for s in row if np.isfinite(s)] for row in scores.tolist()]
+    assert any(len(set(row)) < len(row) for row in finite)
+    assert_batch_matches_loop(park, wait_data, rides, current, ratings, limits, limits, None, k)
+    assert_batch_matches_loop(park, wait_data, rides, current, ratings, limits, limits, trending_forecaster(snapshot), k)
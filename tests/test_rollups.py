@@ -0,0 +1,87 @@
+# De rollups moeten hetzelfde opleveren of ze nu live (observe per poll) of
+# achteraf uit de historie (catch_up) zijn opgebouwd, ook bij lange stukken
+# waarin geen enkele wachttijd verandert.
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from history import HistoryStore
+from rollups import WaitRollups
+from waits import RideWaits
+
+
+RIDES = ["Goliath", "Condor", "Crazy River"]
+
+
+def poll_sequence():
+    # Twee parkdagen: elke 2 minuten een poll, een uur lang niets veranderd,
+    # een storing, een gat van een half uur zonder polls en 's avonds dicht
+    rng = np.random.default_rng(1)
+    polls = []
+    for day in range(2):
+        moment = datetime(2026, 7, 3 + day, 8, 0, tzinfo=timezone.utc)
+        for step in range(240):
+            moment += timedelta(minutes=2)
+            if 100 <= step < 115:
+                continue
+            if 30 <= step < 60:
+                waits = [25, 10, 5]
+            else:
+                waits = rng.integers(0, 60, len(RIDES)).tolist()
+            statuses = ["breakdown" if step in range(70, 80) and ride == "Condor" else "open" for ride in RIDES]
+            polls.append((moment, RideWaits.from_records(zip(RIDES, waits, statuses))))
+        polls.append((moment + timedelta(minutes=2), RideWaits.from_records((ride, None, "closed") for ride in RIDES)))
+    return polls
+
+
+def record(store, polls):
+    for moment, attractions in polls:
+        store.append_snapshot(1, {"attractions": attractions}, moment, polled=["looopings"])
+
+
+def assert_same(live, rebuilt):
+    assert rebuilt.observed_minutes().sum() == pytest.approx(live.observed_minutes().sum())
+    np.testing.assert_allclose(rebuilt._hist, live._hist, atol=1e-3)
+    for day in (datetime(2026, 7, 3).date(), datetime(2026, 7, 4).date()):
+        np.testing.assert_allclose(rebuilt.day_curve(day), live.day_curve(day), equal_nan=True)
+
+
+def test_catch_up_matches_observe(tmp_path):
+    polls = poll_sequence()
+    live = WaitRollups(RIDES, "Europe/Amsterdam")
+    for moment, attractions in polls:
+        live.observe(attractions, moment)
+
+    store = HistoryStore(str(tmp_path))
+    record(store, polls)
+    rebuilt = WaitRollups(RIDES, "Europe/Amsterdam")
+    rebuilt.catch_up(store, 1, polls[-1][0] + timedelta(minutes=1))
+    assert_same(live, rebuilt)
+
+    # Daarna gaan beide live verder, met de laatste poll nog open
+    after = polls[-1][0] + timedelta(minutes=2)
+    for rollups in (live, rebuilt):
+        rollups.observe(polls[0][1], after)
+    assert_same(live, rebuilt)
+
+
+def test_restart_catches_up_from_saved_rollups(tmp_path):
+    polls = poll_sequence()
+    live = WaitRollups(RIDES, "Europe/Amsterdam")
+    for moment, attractions in polls:
+        live.observe(attractions, moment)
+
+    # Halverwege bewaard (de openstaande poll gaat verloren), daarna herstart
+    half = len(polls) // 2
+    saved = WaitRollups(RIDES, "Europe/Amsterdam", str(tmp_path / "rollups.npz"))
+    for moment, attractions in polls[:half]:
+        saved.observe(attractions, moment)
+    saved.save()
+
+    store = HistoryStore(str(tmp_path / "history"))
+    record(store, polls)
+    restarted = WaitRollups(RIDES, "Europe/Amsterdam", str(tmp_path / "rollups.npz"))
+    restarted.catch_up(store, 1, polls[-1][0] + timedelta(minutes=1))
+    assert_same(live, restarted)
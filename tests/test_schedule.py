@@ -0,0 +1,53 @@
+# Het planningsvenster uit de kalender moet gelijk zijn aan de oude
+# berekening in minuten-van-de-dag (hieronder als referentie), ook voor parken
+# die na middernacht sluiten. Alleen dagen zonder zomertijdwissel: daar telde
+# de oude berekening een uur te veel of te weinig.
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from schedule import ParkCalendar
+
+
+TZ = pytz.timezone("Europe/Amsterdam")
+
+
+def reference_window(opening_hours, now):
+    # planner.planning_window() van voor de kalender
+    open_str, close_str = opening_hours.split(" - ")
+    open_time = datetime.strptime(open_str.strip(), "%H:%M").time()
+    close_time = datetime.strptime(close_str.strip(), "%H:%M").time()
+
+    open_min = open_time.hour * 60 + open_time.minute
+    close_min = close_time.hour * 60 + close_time.minute
+    now_min = now.hour * 60 + now.minute
+
+    if close_min <= open_min:
+        close_min += 24 * 60
+        if now_min < close_min - 24 * 60:
+            now_min += 24 * 60
+
+    start_min = max(now_min, open_min)
+    start = now + timedelta(minutes=start_min - now_min)
+    return start, max(0, close_min - start_min)
+
+
+def test_planning_window_matches_reference():
+    rng = np.random.default_rng(0)
+    for _ in range(3000):
+        opens, closes = rng.integers(0, 24 * 60, 2)
+        hours = f"{opens // 60:02d}:{opens % 60:02d} - {closes // 60:02d}:{closes % 60:02d}"
+        date = datetime(2026, 7, 1) + timedelta(days=int(rng.integers(0, 60)))
+        now = TZ.localize(date + timedelta(minutes=int(rng.integers(0, 24 * 60))))
+
+        # Zoals de ingest: elke dag dezelfde tekst gepubliceerd
+        calendar = ParkCalendar(TZ)
+        calendar.update(hours, now - timedelta(days=1))
+        calendar.update(hours, now)
+        day = calendar.day(now)
+
+        start, minutes = day.planning_window(now)
+        expected_start, expected_minutes = reference_window(hours, now)
+        assert (start, minutes) == (expected_start, expected_minutes), f"{hours} om {now:%H:%M}"
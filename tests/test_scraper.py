@@ -0,0 +1,24 @@
+# De streaming extractor moet op een opgenomen looopings.nl-pagina exact
+# hetzelfde opleveren als de BeautifulSoup-referentie, in dezelfde volgorde.
+
+from bs4 import BeautifulSoup
+
+from scraper import extract_park_page, parse_opening_hours, parse_wait_times
+
+
+def reference_parse(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return {
+        "attractions": parse_wait_times(soup),
+        "opening_hours": parse_opening_hours(soup),
+    }
+
+
+def test_extractor_matches_reference(park_page_html):
+    expected = reference_parse(park_page_html)
+    actual = extract_park_page(park_page_html)
+    actual = dict(actual, attractions=actual["attractions"].to_dict())
+
+    assert expected["attractions"], "fixture bevat geen attracties"
+    assert actual == expected
+    assert list(actual["attractions"]) == list(expected["attractions"])
@@ -0,0 +1,70 @@
+# Het overzicht sorteert op de arrays van de snapshot. Elke sortering moet
+# dezelfde tabel geven als de oude versie die de weergavetekst terugparste
+# (hieronder als referentie, met stabiel sorteren en de bedoelde rang voor
+# storingen: "⚠️" is twee tekens, dus str[0] vond die nooit).
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from registry import get_park
+from views import SORT_OPTIONS, overview_table
+from waits import STATUS_NAMES, RideWaits
+
+
+def reference_table(park, wait_data, sort_option):
+    ride_table = []
+    for ride in park.rides:
+        ride_info = wait_data.get(ride, {})
+        status = ride_info.get("status")
+        wait = ride_info.get("wait")
+        if status == "open":
+            display = f"🟢 {wait} min" if wait is not None else "🟢 Unknown"
+        elif status == "closed":
+            display = "🔴 Closed"
+        elif status == "maintenance":
+            display = "🔧 Maintenance"
+        elif status == "breakdown":
+            display = "⚠️ Storing"
+        else:
+            display = "❔ Unknown"
+        ride_table.append({"Attraction": ride, "Status / Wait Time": display})
+
+    df = pd.DataFrame(ride_table)
+    if sort_option == "Alphabetical":
+        df = df.sort_values("Attraction", kind="stable")
+    elif sort_option in ("Wait time (low to high)", "Wait time (high to low)"):
+        df["WaitTimeNum"] = df["Status / Wait Time"].str.extract(r"(\d+)").astype(float)
+        df = df.sort_values("WaitTimeNum", ascending=sort_option == "Wait time (low to high)",
+                            na_position="last", kind="stable")
+    elif sort_option == "Status":
+        status_order = {"🟢": 0, "⚠️": 1, "🔴": 2}
+        df["StatusCode"] = df["Status / Wait Time"].str.split(" ").str[0].map(status_order)
+        df = df.sort_values("StatusCode", na_position="last", kind="stable")
+    return df.drop(columns=["WaitTimeNum", "StatusCode"], errors="ignore").reset_index(drop=True)
+
+
+def random_state(park, rng):
+    # Willekeurige status en wachttijd per attractie; sommige ontbreken of
+    # hebben geen wachttijd, en gelijke wachttijden komen veel voor
+    records = {}
+    for ride in park.rides:
+        if rng.random() < 0.1:
+            continue
+        status = STATUS_NAMES[rng.integers(len(STATUS_NAMES))]
+        wait = None if rng.random() < 0.1 else int(rng.integers(0, 30)) * 5
+        records[ride] = {"wait": wait, "status": status}
+    return records
+
+
+@pytest.mark.parametrize("sort_option", SORT_OPTIONS)
+def test_overview_matches_reference(sort_option):
+    park = get_park("walibi_holland")
+    rng = np.random.default_rng(SORT_OPTIONS.index(sort_option))
+    for _ in range(300):
+        records = random_state(park, rng)
+        wait_data = RideWaits.from_records((ride, r["wait"], r["status"]) for ride, r in records.items())
+        pd.testing.assert_frame_equal(
+            overview_table(park, wait_data, sort_option).reset_index(drop=True),
+            reference_table(park, records, sort_option),
+        )
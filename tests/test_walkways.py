@@ -0,0 +1,51 @@
+# Na elke incrementele wijziging (korter, langer, dicht, weer open) moet de
+# matrix gelijk zijn aan een volledige herberekening met Floyd-Warshall.
+
+import numpy as np
+import pytest
+
+from registry import get_park
+from walkways import WalkwayGraph, all_pairs_shortest_paths
+
+
+def random_graph(rng, size, edges):
+    nodes = [f"n{i}" for i in range(size)]
+    pairs = set()
+    while len(pairs) < edges:
+        a, b = sorted(rng.choice(size, 2, replace=False).tolist())
+        pairs.add((a, b))
+    return WalkwayGraph(nodes, [(nodes[a], nodes[b], int(rng.integers(1, 10))) for a, b in sorted(pairs)])
+
+
+def apply_random_changes(graph, rng, count):
+    # Vooral bestaande paden (die raken kortste paden), soms een nieuw paar
+    existing = [(graph.nodes[i], graph.nodes[j]) for i, j in zip(*np.nonzero(np.triu(np.isfinite(graph.weights), 1)))]
+    for _ in range(count):
+        if existing and rng.random() < 0.8:
+            a, b = existing[rng.integers(len(existing))]
+        else:
+            a, b = (graph.nodes[i] for i in rng.choice(len(graph.nodes), 2, replace=False))
+        if rng.random() < 0.3:
+            graph.close_walkway(a, b)
+        else:
+            graph.set_walkway(a, b, int(rng.integers(1, 10)))
+        np.testing.assert_array_equal(graph.times, all_pairs_shortest_paths(graph.weights))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_changes_match_full_recompute(seed):
+    # Dun genoeg dat afsluiten de graaf soms in stukken breekt
+    rng = np.random.default_rng(seed)
+    graph = random_graph(rng, 30, 45)
+    version = graph.version
+    apply_random_changes(graph, rng, 200)
+    assert graph.version > version
+
+
+def test_park_graph_changes_match_full_recompute():
+    graph = get_park("walibi_holland").graph
+    graph = WalkwayGraph(graph.nodes, [
+        (graph.nodes[i], graph.nodes[j], graph.weights[i, j])
+        for i, j in zip(*np.nonzero(np.triu(np.isfinite(graph.weights), 1)))
+    ])
+    apply_random_changes(graph, np.random.default_rng(0), 100)
@@ -0,0 +1,176 @@
+# Lichte tijdmetingen per fase (HTTP-fetch, parsen, optimizer, overzichts-
+# tabel, kaart), per proces samengevoegd tot rollende percentielen over de
+# laatste WINDOW metingen per span.
+#
+#   WALIBI_TIMING=1            metingen aan (standaard uit)
+#   WALIBI_TIMING_LOG=<pad>    elke meting ook als JSON-regel wegschrijven
+#
+# Uit kost het vrijwel niets: timed() geeft de functie zelf terug, span()
+# een gedeeld leeg contextobject en record() keert meteen terug. De vlag
+# wordt bij het importeren gelezen, dus hij moet bij het starten gezet zijn.
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+
+ENABLED = os.environ.get("WALIBI_TIMING", "") not in ("", "0")
+LOG_PATH = os.environ.get("WALIBI_TIMING_LOG")
+
+# Zoveel recente metingen per span tellen mee voor de percentielen
+WINDOW = 1000
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Na zoveel metingen gaat de buffer naar het JSONL-bestand
+LOG_FLUSH = 100
+
+_NOOP = nullcontext()
+
+
+class _Series:
+    __slots__ = ("recent", "count", "total", "max")
+
+    def __init__(self, window):
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.recent.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+def _quantile(ordered, q):
+    # Dichtstbijzijnde rang over het (gesorteerde) venster
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Timings:
+    # Alle spans van één proces; record() is thread-safe, zodat de ingest-
+    # thread, prefetch en de sessies dezelfde tellers delen.
+
+    def __init__(self, window=WINDOW, log_path=None):
+        self.window = window
+        self.log_path = log_path
+        self._series = {}
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series(self.window)
+            series.add(seconds)
+            if self.log_path:
+                self._pending.append({"ts": round(time.time(), 3), "span": name, "ms": round(seconds * 1000, 3)})
+                if len(self._pending) >= LOG_FLUSH:
+                    self._flush_locked()
+
+    def summary(self):
+        # Eén rij per span, gesorteerd op naam; tijden in milliseconden
+        with self._lock:
+            series = [(name, s, sorted(s.recent)) for name, s in self._series.items()]
+
+        rows = []
+        for name, s, ordered in sorted(series, key=lambda item: item[0]):
+            row = {"span": name, "count": s.count}
+            for q in QUANTILES:
+                row[f"p{round(q * 100)}_ms"] = round(_quantile(ordered, q) * 1000, 3)
+            row["max_ms"] = round(s.max * 1000, 3)
+            row["total_s"] = round(s.total, 3)
+            rows.append(row)
+        return rows
+
+    def prometheus(self):
+        # Tekstformaat van Prometheus: één summary met het span als label
+        with self._lock:
+            series = [(name, s, sorted(s.recent)) for name, s in self._series.items()]
+
+        lines = [
+            "# HELP walibi_span_seconds Duur per fase (rollend venster voor de kwantielen)",
+            "# TYPE walibi_span_seconds summary",
+        ]
+        for name, s, ordered in sorted(series, key=lambda item: item[0]):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'walibi_span_seconds{{span="{label}",quantile="{q}"}} {_quantile(ordered, q):.6f}')
+            lines.append(f'walibi_span_seconds_sum{{span="{label}"}} {s.total:.6f}')
+            lines.append(f'walibi_span_seconds_count{{span="{label}"}} {s.count}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self._pending)
+        except OSError:
+            pass
+        self._pending = []
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self._pending = []
+
+
+timings = Timings(log_path=LOG_PATH)
+if LOG_PATH:
+    atexit.register(timings.flush)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings.record(self.name, time.perf_counter() - self.start)
+
+
+def span(name):
+    # with span("map.st_folium"): ...
+    if not ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+def timed(name):
+    # Decorator; met metingen uit blijft de functie ongewijzigd
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record(name, seconds):
+    if ENABLED:
+        timings.record(name, seconds)
@@ -0,0 +1,145 @@
+# Het attractie-overzicht (tab 2) en de grafieken van de geschiedenis-tab,
+# los van Streamlit opgebouwd zodat de benchmarks ze ook zonder app kunnen
+# draaien. De kaart staat in maps.py, zodat deze tabs folium niet hoeven te
+# laden; altair wordt pas geladen als er een grafiek getekend wordt.
+
+import numpy as np
+import pandas as pd
+
+from forecast import BUCKET_MINUTES
+from timing import timed
+from waits import BREAKDOWN, CLOSED, MAINTENANCE, NO_WAIT, OPEN
+
+
+SORT_OPTIONS = ["Alphabetical", "Wait time (low to high)", "Wait time (high to low)", "Status"]
+
+# Rang per statuscode bij sorteren op status: open, storing, gesloten, de rest
+STATUS_RANK = np.array([0, 2, 1, 3, 3])
+
+
+def status_display(wait, status):
+    if status == OPEN:
+        return f"🟢 {wait} min" if wait != NO_WAIT else "🟢 Unknown"
+    elif status == CLOSED:
+        return "🔴 Closed"
+    elif status == MAINTENANCE:
+        return "🔧 Maintenance"
+    elif status == BREAKDOWN:
+        return "⚠️ Storing"
+    return "❔ Unknown"
+
+
+@timed("overview.table")
+def overview_table(park, wait_data, sort_option):
+    # Gesorteerd op de arrays van de snapshot; de tekst in de tabel is alleen
+    # weergave en wordt niet teruggelezen
+    wait, status = wait_data.align(park.rides)
+
+    if sort_option == "Alphabetical":
+        order = np.argsort(np.array(park.rides), kind="stable")
+    elif sort_option in ("Wait time (low to high)", "Wait time (high to low)"):
+        # Attracties zonder wachttijd altijd achteraan
+        known = np.flatnonzero((status == OPEN) & (wait != NO_WAIT))
+        unknown = np.flatnonzero((status != OPEN) | (wait == NO_WAIT))
+        key = wait[known].astype(int)
+        if sort_option == "Wait time (high to low)":
+            key = -key
+        order = np.concatenate([known[np.argsort(key, kind="stable")], unknown])
+    elif sort_option == "Status":
+        order = np.argsort(STATUS_RANK[status], kind="stable")
+    else:
+        order = np.arange(len(park.rides))
+
+    waits, statuses = wait.tolist(), status.tolist()
+    return pd.DataFrame({
+        "Attraction": [park.rides[i] for i in order],
+        "Status / Wait Time": [status_display(waits[i], statuses[i]) for i in order],
+    })
+
+
+WEEKDAYS = ["Maandag", "Dinsdag", "Woensdag", "Donderdag", "Vrijdag", "Zaterdag", "Zondag"]
+
+# De grafieken gebruiken één vaste datum; alleen de kloktijd telt
+CHART_DAY = pd.Timestamp("2000-01-01")
+
+
+@timed("history.profile")
+def history_profile(park, rollups, weekday=None):
+    # Lange tabel met per attractie en kwartier de percentielen uit de
+    # rollups; alleen kwartieren waar voor minstens één attractie genoeg data is
+    p25, p50, p75, p90 = rollups.profile(weekday)
+    buckets = np.flatnonzero(~np.isnan(p50).all(axis=0))
+    rides = np.repeat(np.arange(len(park.rides)), len(buckets))
+    columns = np.tile(buckets, len(park.rides))
+    frame = pd.DataFrame({
+        "Attraction": np.array(park.rides, dtype=object)[rides],
+        "Tijd": CHART_DAY + pd.to_timedelta(columns * BUCKET_MINUTES, unit="min"),
+        "p25": p25[rides, columns],
+        "p50": p50[rides, columns],
+        "p75": p75[rides, columns],
+        "p90": p90[rides, columns],
+    })
+    return frame.dropna(subset=["p50"]).reset_index(drop=True)
+
+
+def day_profile(park, rollups, day):
+    # Gemiddelde wachttijd per kwartier op één datum, zelfde vorm als history_profile
+    curve = rollups.day_curve(day)
+    rides, buckets = np.nonzero(~np.isnan(curve))
+    return pd.DataFrame({
+        "Attraction": np.array(park.rides, dtype=object)[rides],
+        "Tijd": CHART_DAY + pd.to_timedelta(buckets * BUCKET_MINUTES, unit="min"),
+        "Wachttijd": curve[rides, buckets],
+    })
+
+
+def best_times(profile):
+    # Per attractie het kwartier met de laagste en de hoogste mediaan
+    if profile.empty:
+        return pd.DataFrame(columns=["Attraction", "Beste tijd", "Mediaan", "Drukste tijd", "Mediaan piek"])
+    grouped = profile.groupby("Attraction", sort=True)["p50"]
+    best = profile.loc[grouped.idxmin()].set_index("Attraction")
+    worst = profile.loc[grouped.idxmax()].set_index("Attraction")
+    return pd.DataFrame({
+        "Attraction": best.index,
+        "Beste tijd": best["Tijd"].dt.strftime("%H:%M").to_numpy(),
+        "Mediaan": best["p50"].round().astype(int).to_numpy(),
+        "Drukste tijd": worst["Tijd"].dt.strftime("%H:%M").to_numpy(),
+        "Mediaan piek": worst["p50"].round().astype(int).to_numpy(),
+    }).sort_values("Mediaan", kind="stable").reset_index(drop=True)
+
+
+@timed("history.curve_chart")
+def wait_curve_chart(profile, today=None):
+    # Mediaan per attractie met de band p25-p75; `today` (day_profile) als stippellijn
+    import altair as alt
+
+    time_axis = alt.X("Tijd:T", axis=alt.Axis(format="%H:%M", title=None))
+    color = alt.Color("Attraction:N", title=None)
+    base = alt.Chart(profile).encode(time_axis, color)
+    chart = (
+        base.mark_area(opacity=0.2).encode(alt.Y("p25:Q", title="Wachttijd (min)"), alt.Y2("p75:Q"))
+        + base.mark_line().encode(
+            alt.Y("p50:Q"),
+            tooltip=[alt.Tooltip("Attraction:N"), alt.Tooltip("Tijd:T", format="%H:%M"),
+                     alt.Tooltip("p50:Q", format=".0f", title="mediaan"),
+                     alt.Tooltip("p90:Q", format=".0f", title="p90")],
+        )
+    )
+    if today is not None and not today.empty:
+        chart += alt.Chart(today).mark_line(strokeDash=[4, 3]).encode(time_axis, color, alt.Y("Wachttijd:Q"))
+    return chart.properties(height=320)
+
+
+@timed("history.heatmap")
+def heatmap_chart(profile):
+    # Attractie tegen kloktijd, kleur = mediaan: een typische dag in één beeld
+    import altair as alt
+
+    return alt.Chart(profile).mark_rect().encode(
+        alt.X("hoursminutes(Tijd):O", title=None, axis=alt.Axis(format="%H:%M", labelAngle=-45)),
+        alt.Y("Attraction:N", title=None, sort="-color"),
+        alt.Color("p50:Q", title="min", scale=alt.Scale(scheme="orangered")),
+        tooltip=[alt.Tooltip("Attraction:N"), alt.Tooltip("Tijd:T", format="%H:%M"),
+                 alt.Tooltip("p50:Q", format=".0f", title="mediaan")],
+    ).properties(height=alt.Step(18))
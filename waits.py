@@ -0,0 +1,111 @@
+# Wachttijden van één poll als onveranderlijke arrays in plaats van een dict
+# per attractie: namen in vaste volgorde, de wachttijd als int16 (NO_WAIT als
+# er geen is) en de status als kleine code. De arrays zijn read-only, dus één
+# object gaat zonder kopie naar alle sessies, de optimizer, de kaart en het
+# overzicht.
+
+import hashlib
+
+import numpy as np
+
+
+NO_WAIT = -1
+
+OPEN, CLOSED, BREAKDOWN, MAINTENANCE, UNKNOWN = range(5)
+STATUS_NAMES = ("open", "closed", "breakdown", "maintenance", "unknown")
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+# Zoveel volgordes onthoudt align() per object (park.rides, park.locations, ...)
+ALIGN_CACHE = 8
+
+
+def _frozen(values, dtype):
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+class RideWaits:
+    __slots__ = ("names", "index", "wait", "status", "digest", "_waits", "_statuses", "_aligned")
+
+    def __init__(self, names, wait, status):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.wait = _frozen(wait, np.int16)
+        self.status = _frozen(status, np.uint8)
+        # Losse opzoekingen via lijsten: een numpy-scalar per element is trager
+        self._waits = self.wait.tolist()
+        self._statuses = self.status.tolist()
+        # Vingerafdruk van de inhoud: gelijk als elke naam, wachttijd en status gelijk is
+        content = hashlib.blake2b(digest_size=16)
+        content.update("\0".join(self.names).encode())
+        content.update(self.wait.tobytes())
+        content.update(self.status.tobytes())
+        self.digest = content.hexdigest()
+        # align() per volgorde van namen; alleen een cache, geen toestand
+        self._aligned = {}
+
+    @classmethod
+    def from_records(cls, records):
+        # `records`: (naam, wachttijd of None, statusnaam). Komt een naam
+        # twee keer voor, dan telt de laatste (op de plek van de eerste).
+        latest = {}
+        for name, wait, status in records:
+            latest[name] = (NO_WAIT if wait is None else wait, STATUS_CODES.get(status, UNKNOWN))
+        return cls(latest, [w for w, _ in latest.values()], [s for _, s in latest.values()])
+
+    @classmethod
+    def from_dict(cls, attractions):
+        # De oude vorm: {naam: {"wait": ..., "status": ...}}
+        return cls.from_records((name, info["wait"], info["status"]) for name, info in attractions.items())
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def wait_of(self, name):
+        i = self.index.get(name)
+        if i is None or self._waits[i] == NO_WAIT:
+            return None
+        return self._waits[i]
+
+    def status_of(self, name):
+        i = self.index.get(name)
+        return UNKNOWN if i is None else self._statuses[i]
+
+    def is_open(self, name):
+        return self.status_of(name) == OPEN
+
+    def align(self, names):
+        # (wachttijden, statussen) in de volgorde van `names`; onbekende
+        # attracties krijgen NO_WAIT en UNKNOWN
+        key = tuple(names)
+        aligned = self._aligned.get(key)
+        if aligned is None:
+            rows = np.array([self.index.get(name, -1) for name in key], dtype=int)
+            known = rows >= 0
+            wait = np.full(len(key), NO_WAIT, dtype=np.int16)
+            status = np.full(len(key), UNKNOWN, dtype=np.uint8)
+            wait[known] = self.wait[rows[known]]
+            status[known] = self.status[rows[known]]
+            wait.flags.writeable = status.flags.writeable = False
+            if len(self._aligned) >= ALIGN_CACHE:
+                self._aligned.clear()
+            aligned = self._aligned[key] = (wait, status)
+        return aligned
+
+    def records(self):
+        # (naam, wachttijd of None, statusnaam), in volgorde
+        for name, wait, status in zip(self.names, self._waits, self._statuses):
+            yield name, None if wait == NO_WAIT else wait, STATUS_NAMES[status]
+
+    def to_dict(self):
+        return {name: {"wait": wait, "status": status} for name, wait, status in self.records()}
+
+
+EMPTY = RideWaits((), (), ())
@@ -0,0 +1,103 @@
+import threading
+
+import numpy as np
+
+
+# Geschat aantal min-plus-rondes van een reparatie; bepaalt wanneer een
+# volledige herberekening goedkoper is
+REPAIR_ROUNDS = 4
+
+
+def all_pairs_shortest_paths(weights):
+    # Floyd-Warshall, per tussenknoop k in één keer over de hele matrix
+    times = weights.copy()
+    np.fill_diagonal(times, 0)
+    for k in range(len(times)):
+        np.minimum(times, times[:, k, None] + times[None, k, :], out=times)
+    return times
+
+
+def _repair(times, weights, stale):
+    # Na een langer of afgesloten pad: de afstanden die niet `stale` zijn
+    # kloppen nog, de rest wordt opnieuw opgebouwd door rijen van de
+    # betrokken knopen te combineren met de hele matrix (min-plus). Elke ronde
+    # verdubbelt de lengte van de paden die gevonden worden. Raakt de wijziging
+    # een groot deel van de knopen, dan is alles opnieuw uitrekenen sneller.
+    sources = np.flatnonzero(stale.any(axis=1))
+    if len(sources) * REPAIR_ROUNDS > len(times):
+        return all_pairs_shortest_paths(weights)
+
+    times[stale] = np.inf
+    np.minimum(times, weights, out=times)
+    while True:
+        rows = (times[sources, :, None] + times[None, :, :]).min(axis=1)
+        if np.array_equal(rows, times[sources]):
+            return times
+        times[sources] = rows
+        times[:, sources] = rows.T
+
+
+class WalkwayGraph:
+    # Looppaden als ongerichte graaf: knopen zijn attracties en kruispunten,
+    # kanten hebben een looptijd in minuten. `times` is de dichte matrix met
+    # de kortste looptijd tussen elk paar knopen (inf = onbereikbaar), dus een
+    # opzoeking is O(1).
+    #
+    # Een gewijzigd pad wordt incrementeel verwerkt. Lezers houden hun
+    # referentie naar de oude matrix; een wijziging vervangt hem in één keer.
+
+    def __init__(self, nodes, edges):
+        self.nodes = list(nodes)
+        self.index = {name: i for i, name in enumerate(self.nodes)}
+        self.version = 0
+        self._lock = threading.Lock()
+
+        weights = np.full((len(self.nodes), len(self.nodes)), np.inf)
+        for a, b, minutes in edges:
+            i, j = self.index[a], self.index[b]
+            weights[i, j] = weights[j, i] = min(weights[i, j], minutes)
+        np.fill_diagonal(weights, 0)
+
+        self.weights = weights
+        self.times = all_pairs_shortest_paths(weights)
+
+    def time(self, a, b):
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None:
+            return np.inf
+        return self.times[i, j]
+
+    def set_walkway(self, a, b, minutes):
+        # Nieuwe looptijd voor het pad a-b; inf sluit het pad af
+        with self._lock:
+            i, j = self.index[a], self.index[b]
+            old = self.weights[i, j]
+            if minutes == old:
+                return
+
+            weights = self.weights.copy()
+            weights[i, j] = weights[j, i] = minutes
+            times = self.times.copy()
+
+            if minutes < old:
+                # Korter pad: elk paar kan hooguit via deze kant korter worden
+                via = np.minimum(
+                    times[:, i, None] + minutes + times[None, j, :],
+                    times[:, j, None] + minutes + times[None, i, :],
+                )
+                np.minimum(times, via, out=times)
+            else:
+                # Langer of dicht: alleen paren waarvan het kortste pad deze
+                # kant gebruikte opnieuw uitrekenen
+                with np.errstate(invalid="ignore"):
+                    used = (
+                        (times[:, i, None] + old + times[None, j, :] == times)
+                        | (times[:, j, None] + old + times[None, i, :] == times)
+                    ) & np.isfinite(times)
+                times = _repair(times, weights, used)
+
+            self.weights, self.times = weights, times
+            self.version += 1
+
+    def close_walkway(self, a, b):
+        self.set_walkway(a, b, np.inf)
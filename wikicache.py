@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from scraper import fetch_wikipedia
+
+
+log = logging.getLogger(__name__)
+
+
+class WikiCache:
+    # Opgeschoonde Wikipedia-paragrafen per titel, in het geheugen en op schijf.
+    # Na `ttl` seconden wordt de pagina gerevalideerd met ETag/If-Modified-Since;
+    # bij een 304 blijft de opgeslagen tekst staan. Lukt ophalen niet, dan wordt
+    # de oude versie gewoon geserveerd.
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, title):
+        return os.path.join(self.directory, quote(title, safe="") + ".json")
+
+    def _lock_for(self, title):
+        with self._guard:
+            return self._locks.setdefault(title, threading.Lock())
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry["checked_at"] < self.ttl
+
+    def _load(self, title):
+        try:
+            with open(self._path(title), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, title, entry):
+        tmp_path = self._path(title) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(title))
+
+    def get(self, title):
+        entry = self._entries.get(title)
+        if self._fresh(entry):
+            return entry["paragraphs"]
+
+        # Per titel maar één fetch tegelijk; wie wacht krijgt daarna het resultaat
+        with self._lock_for(title):
+            entry = self._entries.get(title) or self._load(title)
+            if self._fresh(entry):
+                self._entries[title] = entry
+                return entry["paragraphs"]
+
+            try:
+                if entry:
+                    fetched = fetch_wikipedia(title, entry.get("etag"), entry.get("last_modified"))
+                else:
+                    fetched = fetch_wikipedia(title)
+            except Exception:
+                if entry is None:
+                    raise
+                log.warning("Wikipedia %s niet gerevalideerd, oude versie gebruikt", title, exc_info=True)
+                self._entries[title] = entry
+                return entry["paragraphs"]
+
+            entry = dict(fetched or entry, checked_at=time.time())
+            self._save(title, entry)
+            self._entries[title] = entry
+            return entry["paragraphs"]
+
+    def _prefetch_one(self, title):
+        try:
+            self.get(title)
+        except Exception:
+            log.warning("Wikipedia %s vooraf ophalen mislukt", title, exc_info=True)
+
+    def prefetch(self, titles, max_workers=4):
+        # Haalt alle titels parallel op de achtergrond op; wacht er niet op
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wiki-prefetch")
+        for title in dict.fromkeys(titles):
+            executor.submit(self._prefetch_one, title)
+        executor.shutdown(wait=False)